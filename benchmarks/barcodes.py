@@ -0,0 +1,133 @@
+"""
+Load test of event-loop lag while indents are created with barcodes.
+
+Fires --concurrency (default 50) concurrent create_indent_for_Non_Consumable
+calls through the ASGI app, while a probe task sleeps in short ticks and
+records how late it wakes up: the time the event loop was blocked. The same
+load is then run with the barcode rendered inline on the event loop, as the
+handler used to do, for comparison.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.barcodes --concurrency 50 --rounds 5 --format png
+
+Every collection in --db-name (default "inventory_benchmark") is emptied first;
+MONGO_URI is read from the environment as usual.
+"""
+from typing import Any, Awaitable, Callable, Dict, List
+from datetime import datetime, timezone
+from benchmarks.lifecycle import clear_database, git_commit, percentile, stub_connect
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROBE_INTERVAL_SECONDS = 0.005
+
+
+async def probe_lag(samples: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+        samples.append(max(time.perf_counter() - start - PROBE_INTERVAL_SECONDS, 0.0))
+
+
+def indent_payload(number: int) -> Dict[str, Any]:
+    return {"item_name": f"Benchmark Asset {number}", "Quantity": 1, "Department": "Benchmark"}
+
+
+async def under_load(create: Callable[[int], Awaitable[None]], concurrency: int, rounds: int) -> Dict[str, Any]:
+    samples: List[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_lag(samples, stop))
+    start = time.perf_counter()
+    for round_number in range(rounds):
+        await asyncio.gather(*(create(round_number * concurrency + n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+
+    ordered = sorted(samples)
+    return {
+        "indents": concurrency * rounds,
+        "throughput_per_second": round(concurrency * rounds / elapsed, 2),
+        "loop_lag_ms": {
+            "p50": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99": round(percentile(ordered, 0.99) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        },
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # Imported here so DB_NAME above is in place before database.py reads it
+    import httpx
+    from main import app, lifespan
+    from models.enums import BarcodeFormatEnum
+    from models.indent import Indent, IndentCreate
+    from utils.barcodes import barcode_payload, render_barcode
+    from utils.mail_dispatcher import mail_dispatcher
+
+    mail_dispatcher._connect = stub_connect
+    fmt = BarcodeFormatEnum(args.format)
+
+    async with lifespan(app):
+        await clear_database()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+
+            async def offloaded(number: int) -> None:
+                response = await client.post(
+                    "/create_indent_for_Non_Consumable", params={"format": fmt.value}, json=indent_payload(number)
+                )
+                response.raise_for_status()
+
+            async def inline(number: int) -> None:
+                indent = IndentCreate(**indent_payload(number))
+                indent_model = Indent(
+                    item_name=indent.item_name, Quantity=indent.Quantity,
+                    Department=indent.Department, Item_Type="Non Consumable"
+                )
+                await indent_model.insert()
+                render_barcode(barcode_payload(indent_model), fmt)
+
+            results = {
+                "worker_pool": await under_load(offloaded, args.concurrency, args.rounds),
+                "inline": await under_load(inline, args.concurrency, args.rounds),
+            }
+        if args.drop:
+            await clear_database()
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "barcode_workers": int(os.getenv("BARCODE_WORKERS", 4)),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-name", default="inventory_benchmark")
+    parser.add_argument("--concurrency", type=int, default=50, help="Indents created at once")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--format", choices=["png", "svg"], default="png")
+    parser.add_argument("--drop", action="store_true", help="Empty the benchmark database afterwards")
+    parser.add_argument("--output", default="barcodes-report.json")
+    args = parser.parse_args()
+
+    os.environ["DB_NAME"] = args.db_name
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Latency of create_stock and create_request with many line items: the
+endpoints (insert_many for the child documents, one bulk_write of upserts
+for the running totals) against the one-document-at-a-time path they
+replaced, reproduced here as the baseline.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.bulk_insert --lines 500 --repeat 10
+
+Every collection in --db-name (default "inventory_benchmark") is emptied first;
+MONGO_URI is read from the environment as usual.
+"""
+from typing import Any, Awaitable, Callable, Dict, List
+from datetime import date, datetime, timezone
+from benchmarks.lifecycle import CAMPUSES, MAIL_ID, clear_database, git_commit, percentile, stub_connect
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def stock_payload(number: int, lines: int) -> Dict[str, Any]:
+    today = date.today().isoformat()
+    return {
+        "vendor_name": f"Bulk Vendor {number}",
+        "date_of_order": today,
+        "date_of_purchase": today,
+        # Non-consumables are not checked against the catalogue, so every line can be a distinct item
+        "items": [
+            {"item_name": f"Bulk Item {line}", "item_type": "Non Consumable",
+             "item_quantity": random.randint(1, 20), "item_price": round(random.uniform(5, 500), 2)}
+            for line in range(lines)
+        ],
+    }
+
+
+def request_payload(catalogue: List[str], lines: int) -> Dict[str, Any]:
+    return {
+        "your_mail_id": MAIL_ID,
+        "campus_name": random.choice(CAMPUSES),
+        "reason": "Bulk benchmark",
+        "items": [
+            {"item_name": catalogue[line % len(catalogue)], "qty": random.randint(1, 5), "description": None}
+            for line in range(lines)
+        ],
+    }
+
+
+async def sequential_create_stock(payload: Dict[str, Any]) -> None:
+    """
+    The create_stock path before bulk inserts: one insert per item and a
+    find_one + save (or insert) per running total.
+    """
+    from models.stock import Stock, Item, StockCreate, InventoryItemTotal
+    stock = StockCreate(**payload)
+    stock_model = Stock(
+        vendor_name=stock.vendor_name, date_of_order=stock.date_of_order, date_of_purchase=stock.date_of_purchase
+    )
+    await stock_model.insert()
+    item_docs = []
+    for item in stock.items:
+        item_doc = Item(
+            item_name=item.item_name, item_type=item.item_type, item_quantity=item.item_quantity,
+            item_price=item.item_price, stock=stock_model
+        )
+        await item_doc.insert()
+        item_docs.append(item_doc)
+        existing = await InventoryItemTotal.find_one({"item_name": item.item_name, "item_type": item.item_type})
+        if existing:
+            existing.total_quantity += item.item_quantity
+            await existing.save()
+        else:
+            await InventoryItemTotal(
+                item_name=item.item_name, item_type=item.item_type, total_quantity=item.item_quantity
+            ).insert()
+    stock_model.items = item_docs
+    await stock_model.save()
+
+
+async def sequential_create_request(payload: Dict[str, Any]) -> None:
+    """
+    The create_request path before bulk inserts: one insert per line item.
+    """
+    from models.inventory import Request, RequestItem, RequestCreate
+    request = RequestCreate(**payload)
+    request_model = Request(
+        your_mail_id=request.your_mail_id, campus_name=request.campus_name, reason=request.reason
+    )
+    await request_model.insert()
+    item_models = []
+    for item in request.items:
+        item_model = RequestItem(item_name=item.item_name, qty=item.qty, description=item.description, request=request_model)
+        await item_model.insert()
+        item_models.append(item_model)
+    request_model.items = item_models
+    await request_model.save()
+
+
+async def measure(fn: Callable[[int], Awaitable[None]], repeat: int) -> Dict[str, float]:
+    timings = []
+    for number in range(repeat):
+        start = time.perf_counter()
+        await fn(number)
+        timings.append(time.perf_counter() - start)
+    ordered = sorted(timings)
+    return {
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # Imported here so DB_NAME above is in place before database.py reads it
+    import httpx
+    from main import app, lifespan
+    from models.enums import ItemTypeEnum
+    from utils.catalogue import item_catalogue
+    from utils.mail_dispatcher import mail_dispatcher
+
+    mail_dispatcher._connect = stub_connect
+    random.seed(args.seed)
+
+    async with lifespan(app):
+        await clear_database()
+        catalogue = item_catalogue.names(ItemTypeEnum.CONSUMABLE)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+
+            async def bulk_stock(number: int) -> None:
+                response = await client.post("/central_stock/create_stock", json=stock_payload(number, args.lines))
+                response.raise_for_status()
+
+            async def bulk_request(number: int) -> None:
+                response = await client.post("/inventory/create_request", json=request_payload(catalogue, args.lines))
+                response.raise_for_status()
+
+            # Baseline vendors are numbered after the endpoint's so names never clash
+            results = {
+                "create_stock": {
+                    "bulk": await measure(bulk_stock, args.repeat),
+                    "sequential": await measure(
+                        lambda n: sequential_create_stock(stock_payload(args.repeat + n, args.lines)), args.repeat
+                    ),
+                },
+                "create_request": {
+                    "bulk": await measure(bulk_request, args.repeat),
+                    "sequential": await measure(
+                        lambda n: sequential_create_request(request_payload(catalogue, args.lines)), args.repeat
+                    ),
+                },
+            }
+        if args.drop:
+            await clear_database()
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "storage_mode": os.getenv("REQUEST_STORAGE_MODE", "linked"),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-name", default="inventory_benchmark")
+    parser.add_argument("--lines", type=int, default=500, help="Line items per stock entry / request")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--drop", action="store_true", help="Empty the benchmark database afterwards")
+    parser.add_argument("--output", default="bulk-insert-report.json")
+    args = parser.parse_args()
+
+    os.environ["DB_NAME"] = args.db_name
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Load test driving the full request lifecycle through the ASGI app in-process.
+
+Seeds a dedicated MongoDB database with historical requests, then drives
+create_stock -> create_request -> semi_approve -> mediator_approved ->
+final_approve_request and the /vc listings through httpx.AsyncClient, and
+writes throughput and p50/p95/p99 latency per route as JSON. Outbound mail is
+delivered to a stub SMTP connection, so the outbox workers run without a relay.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.lifecycle --history 10000 --requests 500 --concurrency 20 \\
+        --output benchmarks/results/$(git rev-parse --short HEAD).json
+
+Every collection in --db-name (default "inventory_benchmark") is emptied first;
+MONGO_URI is read from the environment as usual.
+"""
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timedelta, timezone
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CAMPUSES = ["Okhla-1", "Okhla-2", "Dwarka", "Rohini", "Pusa", "Shakarpur"]
+MAIL_ID = "benchmark@example.com"
+EMPLOYEE_ID = "BENCH-001"
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    # Nearest-rank on an already sorted list
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Recorder:
+    """
+    Latency samples per route template, grouped by benchmark phase.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.route_phase: Dict[str, str] = {}
+        self.phases: Dict[str, float] = {}
+        self.phase: Optional[str] = None
+
+    async def call(self, method: str, route: str, url: str, **kwargs) -> Any:
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        key = f"{method} {route}"
+        self.samples.setdefault(key, []).append(elapsed)
+        self.route_phase[key] = self.phase
+        if response.status_code >= 400:
+            self.errors[key] = self.errors.get(key, 0) + 1
+            logger.debug(f"{key} returned {response.status_code}: {response.text[:200]}")
+            return None
+        return response.json()
+
+    async def run_phase(self, name: str, jobs: List, concurrency: int) -> None:
+        self.phase = name
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(job):
+            async with semaphore:
+                await job()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run(job) for job in jobs))
+        self.phases[name] = time.perf_counter() - start
+        logger.info(f"Phase {name}: {len(jobs)} jobs in {self.phases[name]:.2f}s")
+
+    def report(self) -> Dict[str, Any]:
+        routes = {}
+        for key, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            duration = self.phases[self.route_phase[key]]
+            routes[key] = {
+                "phase": self.route_phase[key],
+                "count": len(ordered),
+                "errors": self.errors.get(key, 0),
+                "throughput_rps": round(len(ordered) / duration, 2) if duration else None,
+                "latency_ms": {
+                    "p50": round(percentile(ordered, 0.50) * 1000, 3),
+                    "p95": round(percentile(ordered, 0.95) * 1000, 3),
+                    "p99": round(percentile(ordered, 0.99) * 1000, 3),
+                    "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+                    "max": round(ordered[-1] * 1000, 3),
+                },
+            }
+        phases = {
+            name: {
+                "duration_seconds": round(duration, 3),
+                "requests": sum(len(s) for k, s in self.samples.items() if self.route_phase[k] == name),
+            }
+            for name, duration in self.phases.items()
+        }
+        for summary in phases.values():
+            summary["throughput_rps"] = round(summary["requests"] / summary["duration_seconds"], 2) \
+                if summary["duration_seconds"] else None
+        return {"phases": phases, "routes": routes}
+
+
+class StubSMTP:
+    """
+    Stands in for aiosmtplib.SMTP: accepts every message and keeps a count.
+    """
+    sent = 0
+
+    def __init__(self):
+        self.is_connected = True
+
+    async def send_message(self, message) -> None:
+        StubSMTP.sent += 1
+
+    async def quit(self) -> None:
+        self.is_connected = False
+
+    def close(self) -> None:
+        self.is_connected = False
+
+
+async def stub_connect() -> StubSMTP:
+    return StubSMTP()
+
+
+async def clear_database() -> None:
+    from database import DOCUMENT_MODELS
+    from models.catalogue import CatalogueItem
+    # delete_many rather than drop, so the indexes created by init_beanie stay;
+    # the catalogue is kept since the app validates against it
+    for model in DOCUMENT_MODELS:
+        if model is not CatalogueItem:
+            await model.get_motor_collection().delete_many({})
+
+
+async def seed_history(
+    count: int,
+    catalogue: List[str],
+    batch_size: int = 1000,
+    campuses: List[str] = CAMPUSES,
+    embedded: Optional[bool] = None,
+) -> None:
+    """
+    Insert `count` past requests directly, spread over the last year and all
+    statuses, so the listing endpoints page through a realistic collection.
+    Approved ones get issued rows matching their line items. The rows are
+    stored inline when `embedded` is set, linked otherwise; it defaults to
+    REQUEST_STORAGE_MODE.
+    """
+    from beanie import PydanticObjectId
+    from models.enums import StatusEnum
+    from models.inventory import Request, RequestItem, RequestItemBase, ReqIssue, EmbeddedReqIssue
+    from utils.queries import EMBEDDED_STORAGE
+
+    if embedded is None:
+        embedded = EMBEDDED_STORAGE
+    statuses = list(StatusEnum)
+    today = date.today()
+    for offset in range(0, count, batch_size):
+        requests, lines, issues = [], [], []
+        for _ in range(min(batch_size, count - offset)):
+            status = random.choice(statuses)
+            request = Request(
+                id=PydanticObjectId(),
+                your_mail_id=MAIL_ID,
+                campus_name=random.choice(campuses),
+                reason="Benchmark history",
+                date_of_request=today - timedelta(days=random.randint(0, 365)),
+                status=status,
+            )
+            items = [
+                {"item_name": name, "qty": random.randint(1, 5), "description": None}
+                for name in random.sample(catalogue, k=min(3, len(catalogue)))
+            ]
+            issued = [
+                {"item_name": item["item_name"], "qty": item["qty"], "Item_Type": "Consumable", "employee_id": EMPLOYEE_ID}
+                for item in items
+            ] if status == StatusEnum.Approved else []
+            if issued:
+                request.date_of_approval = request.date_of_request
+            if embedded:
+                request.embedded_items = [RequestItemBase(**item) for item in items]
+                if issued:
+                    request.embedded_issued = [EmbeddedReqIssue(**row) for row in issued]
+            else:
+                request_lines = [RequestItem(id=PydanticObjectId(), request=request, **item) for item in items]
+                request.items = request_lines
+                lines.extend(request_lines)
+                request_issues = [ReqIssue(id=PydanticObjectId(), request=request, **row) for row in issued]
+                request.issued = request_issues
+                issues.extend(request_issues)
+            requests.append(request)
+        await Request.insert_many(requests)
+        if lines:
+            await RequestItem.insert_many(lines)
+        if issues:
+            await ReqIssue.insert_many(issues)
+    logger.info(f"Seeded {count} historical requests")
+
+
+def stock_job(recorder: Recorder, number: int, catalogue: List[str], qty_per_item: int):
+    async def job():
+        today = date.today().isoformat()
+        await recorder.call("POST", "/central_stock/create_stock", "/central_stock/create_stock", json={
+            "vendor_name": f"Benchmark Vendor {number}",
+            "date_of_order": today,
+            "date_of_purchase": today,
+            "items": [
+                {"item_name": name, "item_type": "Consumable", "item_quantity": qty_per_item,
+                 "item_price": round(random.uniform(5, 500), 2)}
+                for name in catalogue
+            ],
+        })
+    return job
+
+
+def lifecycle_job(recorder: Recorder, catalogue: List[str], lines_per_request: int, max_qty: int):
+    async def job():
+        lines = [
+            {"item_name": name, "qty": random.randint(1, max_qty), "description": "benchmark"}
+            for name in random.sample(catalogue, k=min(lines_per_request, len(catalogue)))
+        ]
+        created = await recorder.call("POST", "/inventory/create_request", "/inventory/create_request", json={
+            "your_mail_id": MAIL_ID,
+            "campus_name": random.choice(CAMPUSES),
+            "reason": "Benchmark",
+            "items": lines,
+        })
+        if not created or not created.get("request_id"):
+            return
+        request_id = created["request_id"]
+        if await recorder.call(
+            "POST", "/inventory/semi_approve/{request_id}", f"/inventory/semi_approve/{request_id}"
+        ) is None:
+            return
+        if await recorder.call(
+            "POST", "/inventory/mediator_approved/{request_id}", f"/inventory/mediator_approved/{request_id}",
+            json={"employee_id": EMPLOYEE_ID}
+        ) is None:
+            return
+        await recorder.call(
+            "POST", "/central_stock/final_approve_request/{request_id}",
+            f"/central_stock/final_approve_request/{request_id}",
+            json=[{"item_name": l["item_name"], "qty": l["qty"], "Item_Type": "Consumable"} for l in lines]
+        )
+    return job
+
+
+def listing_job(recorder: Recorder, path: str, page_size: int):
+    async def job():
+        params = {"limit": page_size} if path != "/vc/counts" else None
+        await recorder.call("GET", path, path, params=params)
+    return job
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # Imported here so DB_NAME above is in place before database.py reads it
+    import httpx
+    from main import app, lifespan
+    from utils.catalogue import item_catalogue
+    from utils.inventory_cache import inventory_cache
+    from utils.mail_dispatcher import mail_dispatcher
+    from models.enums import ItemTypeEnum
+
+    mail_dispatcher._connect = stub_connect
+    random.seed(args.seed)
+
+    # ASGITransport does not send lifespan events, so run the app's own
+    # startup/shutdown around the benchmark
+    async with lifespan(app):
+        await clear_database()
+        await inventory_cache.warm()
+        catalogue = item_catalogue.names(ItemTypeEnum.CONSUMABLE)
+        await seed_history(args.history, catalogue)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            recorder = Recorder(client)
+
+            qty_per_item = math.ceil(args.requests * args.max_qty / max(args.stocks, 1)) + args.max_qty
+            await recorder.run_phase(
+                "stock",
+                [stock_job(recorder, n, catalogue, qty_per_item) for n in range(args.stocks)],
+                args.concurrency
+            )
+            await recorder.run_phase(
+                "lifecycle",
+                [lifecycle_job(recorder, catalogue, args.lines, args.max_qty) for _ in range(args.requests)],
+                args.concurrency
+            )
+            listings = ["/vc/all_requests", "/vc/all_pending", "/vc/all_approved", "/vc/counts"]
+            await recorder.run_phase(
+                "listing",
+                [listing_job(recorder, path, args.page_size) for path in listings for _ in range(args.list_iterations)],
+                args.concurrency
+            )
+
+        report = recorder.report()
+        if args.drop:
+            await clear_database()
+
+    report.update({
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "storage_mode": os.getenv("REQUEST_STORAGE_MODE", "linked"),
+        "stub_mails_sent": StubSMTP.sent,
+    })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-name", default="inventory_benchmark")
+    parser.add_argument("--history", type=int, default=1000, help="Past requests seeded directly before the run")
+    parser.add_argument("--stocks", type=int, default=10, help="create_stock calls")
+    parser.add_argument("--requests", type=int, default=200, help="Requests taken through the whole lifecycle")
+    parser.add_argument("--lines", type=int, default=3, help="Line items per request")
+    parser.add_argument("--max-qty", type=int, default=5, help="Largest quantity per line")
+    parser.add_argument("--list-iterations", type=int, default=50, help="Calls per /vc listing endpoint")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--drop", action="store_true", help="Empty the benchmark database afterwards")
+    parser.add_argument("--output", default="benchmark-report.json")
+    args = parser.parse_args()
+
+    os.environ["DB_NAME"] = args.db_name
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
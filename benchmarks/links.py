@@ -0,0 +1,169 @@
+"""
+Round trips and latency of resolving request links, before and after the
+single $lookup aggregation.
+
+For get_history (one campus) and all_issued_items (every approved request),
+times the old per-request path (`find` then `Request.get(fetch_links=True)`
+for each request) against `find_requests_with_links`, counting the commands
+sent to mongod through a command listener. Writes p50/p95 latency and round
+trips per call as JSON.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.links --history 2000 --campuses 1 --repeat 20
+
+Every collection in --db-name (default "inventory_benchmark") is emptied first;
+MONGO_URI is read from the environment as usual.
+"""
+from typing import Any, Awaitable, Callable, Dict, List
+from datetime import datetime, timezone
+from pymongo import monitoring
+from benchmarks.lifecycle import CAMPUSES, clear_database, git_commit, percentile, seed_history
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RoundTrips(monitoring.CommandListener):
+    """
+    Counts the commands the client sends.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event) -> None:
+        self.count += 1
+
+    def succeeded(self, event) -> None:
+        pass
+
+    def failed(self, event) -> None:
+        pass
+
+
+async def history_n_plus_one(campus_name: str) -> List[Dict[str, Any]]:
+    from models.inventory import Request
+    requests = await Request.find(Request.campus_name == campus_name).to_list()
+    result = []
+    for req in requests:
+        full = await Request.get(req.id, fetch_links=True)
+        result.append({
+            "request_id": str(full.id),
+            "items": [{"item_name": i.item_name, "qty": i.qty} for i in full.items or []],
+            "issued": [{"item_name": i.item_name, "qty": i.qty, "Item_Type": i.Item_Type} for i in full.issued or []],
+        })
+    return result
+
+
+async def history_aggregation(campus_name: str) -> List[Dict[str, Any]]:
+    from utils.queries import find_requests_with_links, request_issue_dict
+    requests = await find_requests_with_links({"campus_name": campus_name}, sort={"date_of_request": 1, "_id": 1})
+    return [request_issue_dict(req) for req in requests]
+
+
+async def issued_n_plus_one() -> List[Dict[str, Any]]:
+    from models.inventory import Request
+    requests = await Request.find(Request.status == "Approved").to_list()
+    result = []
+    for req in requests:
+        full = await Request.get(req.id, fetch_links=True)
+        result.append({
+            "request_id": str(full.id),
+            "issued": [{"item_name": i.item_name, "qty": i.qty, "Item_Type": i.Item_Type} for i in full.issued or []],
+        })
+    return result
+
+
+async def issued_aggregation() -> List[Dict[str, Any]]:
+    from utils.queries import find_requests_with_links, request_issue_dict
+    return [request_issue_dict(req) for req in await find_requests_with_links({"status": "Approved"})]
+
+
+async def measure(fn: Callable[[], Awaitable[List[Dict[str, Any]]]], counter: RoundTrips, repeat: int) -> Dict[str, Any]:
+    timings, round_trips, rows = [], [], 0
+    for _ in range(repeat):
+        before = counter.count
+        start = time.perf_counter()
+        rows = len(await fn())
+        timings.append(time.perf_counter() - start)
+        round_trips.append(counter.count - before)
+    ordered = sorted(timings)
+    return {
+        "rows": rows,
+        "round_trips_per_call": max(round_trips),
+        "latency_ms": {
+            "p50": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95": round(percentile(ordered, 0.95) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3),
+        },
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # Imported here so DB_NAME above is in place before database.py reads it
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from database import MONGO_URI, client_options, init_db, close_db
+    from utils.catalogue import DEFAULT_CONSUMABLE_ITEMS
+
+    counter = RoundTrips()
+    options = client_options()
+    options["event_listeners"] = options["event_listeners"] + [counter]
+    await init_db(AsyncIOMotorClient(MONGO_URI, **options))
+    try:
+        random.seed(args.seed)
+        campuses = CAMPUSES[:args.campuses]
+        await clear_database()
+        await seed_history(args.history, DEFAULT_CONSUMABLE_ITEMS, campuses=campuses)
+
+        paths = {
+            "get_history": (lambda: history_n_plus_one(campuses[0]), lambda: history_aggregation(campuses[0])),
+            "all_issued_items": (issued_n_plus_one, issued_aggregation),
+        }
+        results = {}
+        for endpoint, (before, after) in paths.items():
+            results[endpoint] = {
+                "n_plus_one": await measure(before, counter, args.repeat),
+                "aggregation": await measure(after, counter, args.repeat),
+            }
+            logger.info(f"{endpoint}: {json.dumps(results[endpoint])}")
+        if args.drop:
+            await clear_database()
+    finally:
+        await close_db()
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "storage_mode": os.getenv("REQUEST_STORAGE_MODE", "linked"),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-name", default="inventory_benchmark")
+    parser.add_argument("--history", type=int, default=2000, help="Requests seeded before the run")
+    parser.add_argument("--campuses", type=int, default=1, help="Campuses the history is spread over")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--drop", action="store_true", help="Empty the benchmark database afterwards")
+    parser.add_argument("--output", default="links-report.json")
+    args = parser.parse_args()
+
+    os.environ["DB_NAME"] = args.db_name
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark of serializing a listing of requests three ways:
+
+- response_model: build RequestIssueResponse objects, re-validate them as
+  FastAPI does for `response_model`, dump to JSON-able dicts and json.dumps
+  (the default path of the listing endpoints)
+- to_json: build the models once and serialize with pydantic-core's dump_json
+- orjson: send the trusted dicts straight through orjson (FAST_JSON_RESPONSES)
+
+    python -m benchmarks.serialization --count 10000 --repeat 5
+"""
+from typing import Any, Callable, Dict, List
+from datetime import date, timedelta
+from pydantic import TypeAdapter
+from models.inventory import RequestIssueResponse
+from utils.queries import request_issue_dict
+from utils.responses import shape
+from bson import ObjectId
+import argparse
+import json
+import random
+import statistics
+import time
+import orjson
+
+ITEMS = ["Brown Tape", "Stapler Small", "Paper Ream (A4 Size)", "Tissue Box", "Pen Uniball Black"]
+STATUSES = ["Pending", "Semi Approved", "Mediator Approved", "Approved", "Rejected"]
+
+
+def synthetic_docs(count: int) -> List[Dict[str, Any]]:
+    """
+    Documents shaped like the output of `request_links_pipeline`.
+    """
+    today = date.today()
+    docs = []
+    for _ in range(count):
+        status = random.choice(STATUSES)
+        lines = random.sample(ITEMS, k=3)
+        docs.append({
+            "_id": ObjectId(),
+            "campus_name": "Okhla-1",
+            "date_of_request": today - timedelta(days=random.randint(0, 365)),
+            "status": status,
+            "reason": "Monthly stationery",
+            "items": [{"item_name": name, "qty": random.randint(1, 5), "description": None} for name in lines],
+            "issued": [
+                {"item_name": name, "qty": random.randint(1, 5), "Item_Type": "Consumable"} for name in lines
+            ] if status == "Approved" else [],
+        })
+    return docs
+
+
+def response_model_path(rows: List[Dict[str, Any]]) -> bytes:
+    adapter = TypeAdapter(List[RequestIssueResponse])
+    models = [RequestIssueResponse(**row) for row in rows]
+    validated = adapter.validate_python(models, from_attributes=True)
+    return json.dumps(adapter.dump_python(validated, mode="json")).encode()
+
+
+def to_json_path(rows: List[Dict[str, Any]]) -> bytes:
+    models = [RequestIssueResponse(**row) for row in rows]
+    return TypeAdapter(List[RequestIssueResponse]).dump_json(models)
+
+
+def orjson_path(rows: List[Dict[str, Any]]) -> bytes:
+    return orjson.dumps([shape(row, RequestIssueResponse) for row in rows])
+
+
+def measure(fn: Callable[[List[Dict[str, Any]]], bytes], rows: List[Dict[str, Any]], repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        timings.append(time.perf_counter() - start)
+    return {
+        "best_ms": round(min(timings) * 1000, 2),
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    rows = [request_issue_dict(doc) for doc in synthetic_docs(args.count)]
+
+    paths = {"response_model": response_model_path, "to_json": to_json_path, "orjson": orjson_path}
+    # Every path must produce the same document, or the comparison is meaningless
+    expected = json.loads(response_model_path(rows))
+    for name, fn in paths.items():
+        if json.loads(fn(rows)) != expected:
+            raise SystemExit(f"{name} output differs from the response_model path")
+
+    results = {name: measure(fn, rows, args.repeat) for name, fn in paths.items()}
+    print(json.dumps({"count": args.count, "repeat": args.repeat, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Request reads with line items stored linked versus embedded, side by side.
+
+Seeds the same history (same --seed) once with RequestItem / ReqIssue rows in
+their own collections and once with them inline on each Request, and for each
+layout drives /inventory/get_request_with_items_status and /vc/all_requests
+through the ASGI app in-process. Writes throughput and p50/p95/p99 latency per
+route and layout as JSON.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.storage_modes --history 10000 --calls 500 --concurrency 10
+
+Reads understand both layouts whatever REQUEST_STORAGE_MODE is set to, so one
+process measures both. Every collection in --db-name (default
+"inventory_benchmark") is emptied first; MONGO_URI is read from the
+environment as usual.
+"""
+from typing import Any, Dict, List
+from datetime import datetime, timezone
+from benchmarks.lifecycle import (
+    CAMPUSES, Recorder, clear_database, git_commit, seed_history, stub_connect
+)
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LAYOUTS = {"linked": False, "embedded": True}
+
+
+def request_job(recorder: Recorder, request_id: str, campus_name: str):
+    async def job():
+        await recorder.call(
+            "GET", "/inventory/get_request_with_items_status/{request_id}/{campus_name}",
+            f"/inventory/get_request_with_items_status/{request_id}/{campus_name}"
+        )
+    return job
+
+
+def listing_job(recorder: Recorder, page_size: int):
+    async def job():
+        await recorder.call("GET", "/vc/all_requests", "/vc/all_requests", params={"limit": page_size})
+    return job
+
+
+async def seeded_requests() -> List[Dict[str, Any]]:
+    from models.inventory import Request
+    return await Request.get_motor_collection().find({}, {"campus_name": 1}).to_list(length=None)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # Imported here so DB_NAME above is in place before database.py reads it
+    import httpx
+    from main import app, lifespan
+    from utils.catalogue import item_catalogue
+    from utils.mail_dispatcher import mail_dispatcher
+    from models.enums import ItemTypeEnum
+
+    mail_dispatcher._connect = stub_connect
+    results = {}
+
+    # ASGITransport does not send lifespan events, so run the app's own
+    # startup/shutdown around the benchmark
+    async with lifespan(app):
+        catalogue = item_catalogue.names(ItemTypeEnum.CONSUMABLE)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for layout, embedded in LAYOUTS.items():
+                random.seed(args.seed)
+                await clear_database()
+                await seed_history(args.history, catalogue, campuses=CAMPUSES[:args.campuses], embedded=embedded)
+                requests = await seeded_requests()
+
+                recorder = Recorder(client)
+                await recorder.run_phase(
+                    "get_request_with_items",
+                    [
+                        request_job(recorder, str(doc["_id"]), doc["campus_name"])
+                        for doc in random.choices(requests, k=args.calls)
+                    ],
+                    args.concurrency
+                )
+                await recorder.run_phase(
+                    "all_requests",
+                    [listing_job(recorder, args.page_size) for _ in range(args.calls)],
+                    args.concurrency
+                )
+                results[layout] = recorder.report()
+                for route, summary in results[layout]["routes"].items():
+                    logger.info(f"{layout} {route}: {json.dumps(summary['latency_ms'])}")
+
+        if args.drop:
+            await clear_database()
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-name", default="inventory_benchmark")
+    parser.add_argument("--history", type=int, default=10000, help="Requests seeded for each layout")
+    parser.add_argument("--campuses", type=int, default=len(CAMPUSES), help="Campuses the history is spread over")
+    parser.add_argument("--calls", type=int, default=500, help="Calls per endpoint and layout")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--drop", action="store_true", help="Empty the benchmark database afterwards")
+    parser.add_argument("--output", default="storage-modes-report.json")
+    args = parser.parse_args()
+
+    os.environ["DB_NAME"] = args.db_name
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Micro-benchmark of rendering the notification mail bodies for requests with
+1, 50 and 500 line items three ways:
+
+- f_string: the inline f-string + "".join bodies the routers used to build
+  (unescaped)
+- jinja_precompiled: utils.templates, compiled once at import (autoescaped)
+- jinja_per_call: the same template source compiled on every render, i.e.
+  what a template loaded per request would cost
+
+    python -m benchmarks.templates --lines 1 50 500 --number 200
+"""
+from typing import Any, Callable, Dict, List
+from datetime import date
+from types import SimpleNamespace
+from bson import ObjectId
+from utils.templates import env, render_request_approved, render_request_created
+import argparse
+import json
+import timeit
+
+ITEMS = ["Brown Tape", "Stapler Small", "Paper Ream (A4 Size)", "Tissue Box", "Pen Uniball Black"]
+
+
+def f_string_created(request: Any, items: List[Any]) -> str:
+    return f"""
+        <html>
+        <body>
+            <h1>Request Created</h1>
+            <p><strong>Your Request ID:</strong> {request.id}</p>
+            <p><strong>Campus Name:</strong> {request.campus_name}</p>
+            <p><strong>Status:</strong> Pending</p>
+            <h2>Items</h2>
+            <ul>
+                {"".join([f"<li>{item.item_name}: {item.qty}</li>" for item in items])}
+            </ul>
+        </body>
+        </html>
+        """
+
+
+def f_string_approved(request: Any, issued: List[Any]) -> str:
+    return f"""
+        <html><body>
+        <h1>Request Issued</h1>
+        <p><strong>ID:</strong> {request.id}</p>
+        <p><strong>Campus:</strong> {request.campus_name}</p>
+        <p><strong>Status:</strong> Approved</p>
+        <p><strong>Date of Approval:</strong> {request.date_of_approval}</p>
+        <p><strong>Employee ID:</strong> {request.employee_id}</p>
+        <h2>Items</h2>
+        <ul>{''.join([f'<li>{i.item_name}: {i.qty} ({i.Item_Type})</li>' for i in issued])}</ul>
+        </body></html>
+        """
+
+
+def per_call(template_name: str, **context: Any) -> str:
+    source = env.loader.get_source(env, template_name)[0]
+    return env.from_string(source).render(**context)
+
+
+def sample(lines: int):
+    request = SimpleNamespace(
+        id=ObjectId(), campus_name="Okhla-1", date_of_approval=date.today(), employee_id="BENCH-001"
+    )
+    rows = [
+        SimpleNamespace(item_name=ITEMS[n % len(ITEMS)], qty=n % 5 + 1, Item_Type="Consumable")
+        for n in range(lines)
+    ]
+    return request, rows
+
+
+def measure(fn: Callable[[], str], number: int, repeat: int) -> Dict[str, float]:
+    timings = timeit.repeat(fn, number=number, repeat=repeat)
+    return {"best_us": round(min(timings) / number * 1e6, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--number", type=int, default=200, help="Renders per timing")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for lines in args.lines:
+        request, rows = sample(lines)
+        results[lines] = {
+            "request_created": {
+                "f_string": measure(lambda: f_string_created(request, rows), args.number, args.repeat),
+                "jinja_precompiled": measure(lambda: render_request_created(request, rows), args.number, args.repeat),
+                "jinja_per_call": measure(
+                    lambda: per_call("email/request_created.html", request=request, items=rows), args.number, args.repeat
+                ),
+            },
+            "request_approved": {
+                "f_string": measure(lambda: f_string_approved(request, rows), args.number, args.repeat),
+                "jinja_precompiled": measure(lambda: render_request_approved(request, rows), args.number, args.repeat),
+                "jinja_per_call": measure(
+                    lambda: per_call("email/request_approved.html", request=request, issued=rows), args.number, args.repeat
+                ),
+            },
+        }
+    print(json.dumps({"number": args.number, "repeat": args.repeat, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,120 @@
 from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+import asyncio
+import logging
 import os
 from dotenv import load_dotenv
 from models.inventory import Request, RequestItem, ReqIssue
 from models.indent import Indent
 from models.stock import Stock, Item, InventoryItemTotal
-from typing import List, Type
+from models.mail import MailOutbox
+from models.analytics import ConsumptionSummary
+from models.idempotency import IdempotencyRecord
+from models.catalogue import CatalogueItem
+from models.versions import CollectionVersion
+from typing import Any, Dict, List, Optional, Type
 from beanie import Document
+from utils.metrics import MongoCommandListener, MongoPoolListener
 
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
-MAX_CONNECTION_RETRIES = 3
-CONNECTION_TIMEOUT_MS = 5000
+MAX_CONNECTION_RETRIES = int(os.getenv("MONGO_MAX_CONNECTION_RETRIES", 3))
+RETRY_BACKOFF_SECONDS = float(os.getenv("MONGO_RETRY_BACKOFF_SECONDS", 1))
+CONNECTION_TIMEOUT_MS = int(os.getenv("MONGO_CONNECTION_TIMEOUT_MS", 5000))
 
+# Connection pool sizing; the driver defaults apply when unset
+MAX_POOL_SIZE = os.getenv("MONGO_MAX_POOL_SIZE")
+MIN_POOL_SIZE = os.getenv("MONGO_MIN_POOL_SIZE")
+MAX_IDLE_TIME_MS = os.getenv("MONGO_MAX_IDLE_TIME_MS")
+# Comma separated, e.g. "zstd,snappy,zlib"; zstd and snappy need their extra packages
+COMPRESSORS = os.getenv("MONGO_COMPRESSORS")
 
-async def init_db():
+DOCUMENT_MODELS: List[Type[Document]] = [
+    Request, RequestItem, ReqIssue,
+    Indent, Stock, Item, InventoryItemTotal,
+    MailOutbox, ConsumptionSummary, IdempotencyRecord, CatalogueItem, CollectionVersion
+]
+
+# The one client this process uses, owned by init_db / close_db
+_client: Optional[AsyncIOMotorClient] = None
+
+
+def client_options() -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "serverSelectionTimeoutMS": CONNECTION_TIMEOUT_MS,
+        "event_listeners": [MongoCommandListener(), MongoPoolListener()],
+    }
+    if MAX_POOL_SIZE:
+        options["maxPoolSize"] = int(MAX_POOL_SIZE)
+    if MIN_POOL_SIZE:
+        options["minPoolSize"] = int(MIN_POOL_SIZE)
+    if MAX_IDLE_TIME_MS:
+        options["maxIdleTimeMS"] = int(MAX_IDLE_TIME_MS)
+    if COMPRESSORS:
+        options["compressors"] = COMPRESSORS
+    return options
+
+
+def get_client() -> AsyncIOMotorClient:
+    if _client is None:
+        raise RuntimeError("Database has not been initialized; call init_db() first")
+    return _client
+
+
+def get_database() -> AsyncIOMotorDatabase:
+    return get_client()[DB_NAME]
+
+
+async def init_db(client: Optional[AsyncIOMotorClient] = None):
     """
     Initialize the MongoDB connection and Beanie document models.
-    Handles connection errors and retries automatically.
+    Retries the initial connection with exponential backoff, and keeps the
+    client so it can be shared and closed on shutdown. A ready-made `client`
+    can be passed in instead (e.g. a stand-in for benchmarks).
+    """
+    global _client
+    if _client is not None:
+        return
+
+    for attempt in range(1, MAX_CONNECTION_RETRIES + 1):
+        candidate = client or AsyncIOMotorClient(MONGO_URI, **client_options())
+        try:
+            await candidate.admin.command('ping')
+            db = candidate[DB_NAME]
+
+            # Also creates the indexes declared in each model's Settings
+            await init_beanie(
+                database=db,
+                document_models=DOCUMENT_MODELS
+            )
+            _client = candidate
+            print("✅ Database connection established successfully")
+            return
+        except Exception as e:
+            if client is None:
+                candidate.close()
+            if attempt == MAX_CONNECTION_RETRIES:
+                print(f"❌ Failed to connect to database: {e}")
+                raise
+            delay = RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+            logger.warning(
+                f"Database connection attempt {attempt}/{MAX_CONNECTION_RETRIES} failed: {e}; "
+                f"retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+
+async def close_db():
+    """
+    Close the shared client and its connection pool.
     """
-    client = AsyncIOMotorClient(
-        MONGO_URI,
-        serverSelectionTimeoutMS=CONNECTION_TIMEOUT_MS
-    )
-    try:
-        await client.admin.command('ping')
-        db = client[DB_NAME]
-        
-        document_models: List[Type[Document]] = [
-            Request, RequestItem, ReqIssue, 
-            Indent, Stock, Item, InventoryItemTotal
-        ]
-        
-        await init_beanie(
-            database=db,
-            document_models=document_models
-        )
-        print("✅ Database connection established successfully")
-
-
-        
-    except Exception as e:
-        print(f"❌ Failed to connect to database: {e}")
-        raise
\ No newline at end of file
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+        logger.info("Database connection closed")
@@ -1,8 +1,14 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from database import init_db
-from routers import stock, inventory, indent, vc
+from fastapi.responses import PlainTextResponse
+from database import init_db, close_db
+from utils.mail_dispatcher import mail_dispatcher
+from utils.inventory_cache import inventory_cache
+from utils.catalogue import item_catalogue
+from utils.metrics import MetricsMiddleware, registry
+from utils.idempotency import IdempotencyMiddleware
+from routers import stock, inventory, indent, vc, analytics, search, catalogue
 import logging
 import os
 
@@ -25,24 +31,40 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
+
+    await item_catalogue.start()
+    await mail_dispatcher.start()
+    await inventory_cache.start()
     
     yield
     
     # Shutdown logic
     logger.info("Shutting down application...")
-    # Add any cleanup code here
+    await inventory_cache.stop()
+    await mail_dispatcher.stop()
+    await item_catalogue.stop()
+    await close_db()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(stock.router)
 app.include_router(inventory.router)
 app.include_router(indent.router)
 app.include_router(vc.router)
+app.include_router(analytics.router)
+app.include_router(search.router)
+app.include_router(catalogue.router)
 
 @app.get("/")
 def main():
     return {"message": "Welcome to inventory management system"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     import os
@@ -0,0 +1,42 @@
+from beanie import Document
+from pydantic import BaseModel, Field, ConfigDict
+from pymongo import ASCENDING, IndexModel
+from datetime import datetime, timezone
+from typing import List, Optional
+from models.enums import PeriodEnum
+
+
+class ConsumptionRow(BaseModel):
+    campus_name: str
+    item_name: str
+    item_type: Optional[str] = None
+    period: str
+    total_qty: int
+    request_count: int
+
+class ConsumptionSummary(Document):
+    """
+    Materialized consumption rows for one closed period. Approvals are always
+    dated today and approved requests cannot be rejected, so a period's totals
+    can no longer change once it has ended;
+    after correcting past data, rebuild them with
+    `python -m scripts.rebuild_consumption_summaries`.
+    """
+    granularity: PeriodEnum
+    period: str
+    rows: List[ConsumptionRow] = Field(default_factory=list)
+    computed_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    model_config = ConfigDict(
+        name="consumption_summaries",
+        arbitrary_types_allowed=True
+    )
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                [("granularity", ASCENDING), ("period", ASCENDING)],
+                name="granularity_period",
+                unique=True
+            ),
+        ]
@@ -0,0 +1,47 @@
+from beanie import Document
+from pydantic import BaseModel, Field, ConfigDict
+from pymongo import ASCENDING, IndexModel
+from datetime import datetime, timezone
+from typing import List, Optional
+from models.enums import ItemTypeEnum
+
+
+class CatalogueItem(Document):
+    """
+    One entry of the item master. `normalized_name` is the case- and
+    whitespace-folded name used for matching; `item_name` is the spelling
+    stored on stock, requests and indents.
+    """
+    item_name: str
+    normalized_name: str
+    item_type: ItemTypeEnum
+    active: bool = True
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    model_config = ConfigDict(
+        name="catalogue_items",
+        arbitrary_types_allowed=True
+    )
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                [("item_type", ASCENDING), ("normalized_name", ASCENDING)],
+                name="item_type_normalized_name",
+                unique=True
+            ),
+        ]
+
+class CatalogueItemCreate(BaseModel):
+    item_name: str = Field(min_length=1, max_length=100)
+    item_type: ItemTypeEnum
+
+class CatalogueItemResponse(BaseModel):
+    item_name: str
+    item_type: ItemTypeEnum
+    active: bool
+
+class CatalogueStatus(BaseModel):
+    size: int
+    item_types: List[ItemTypeEnum]
+    loaded_at: Optional[datetime] = None
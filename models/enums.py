@@ -11,8 +11,26 @@ class ItemTypeEnum(str, Enum):
     CONSUMABLE = "Consumable"
     NON_CONSUMABLE = "Non Consumable"
 
-class StatusEnum(str, Enum):
+class ExportFormatEnum(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class MailStatusEnum(str, Enum):
     Pending = "Pending"
-    Approved = "Approved"
-    Rejected = "Rejected"
+    Sending = "Sending"
+    Sent = "Sent"
+    Failed = "Failed"
+
+class BarcodeFormatEnum(str, Enum):
+    PNG = "png"
+    SVG = "svg"
+
+class PeriodEnum(str, Enum):
+    Month = "month"
+    Year = "year"
 
+class SearchScopeEnum(str, Enum):
+    Items = "items"
+    RequestItems = "request_items"
+    Requests = "requests"
+    Indents = "indents"
@@ -0,0 +1,47 @@
+from beanie import Document
+from pydantic import Field, ConfigDict
+from pymongo import ASCENDING, IndexModel
+from datetime import datetime, timezone
+from typing import Optional
+from dotenv import load_dotenv
+import os
+
+
+load_dotenv()
+
+# How long a stored response can be replayed for the same Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400))
+
+
+class IdempotencyRecord(Document):
+    key: str
+    method: str
+    path: str
+    fingerprint: str
+    completed: bool = False
+    status_code: Optional[int] = None
+    content_type: Optional[str] = None
+    body: Optional[bytes] = None
+    # Claim of the request currently running the handler
+    owner: Optional[str] = None
+    heartbeat_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    model_config = ConfigDict(
+        name="idempotency_keys",
+        arbitrary_types_allowed=True
+    )
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                [("key", ASCENDING), ("method", ASCENDING), ("path", ASCENDING)],
+                name="key_method_path",
+                unique=True
+            ),
+            IndexModel(
+                [("created_at", ASCENDING)],
+                name="created_at_ttl",
+                expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS
+            ),
+        ]
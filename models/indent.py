@@ -1,7 +1,10 @@
 from beanie import Document
+from pymongo import ASCENDING, TEXT, IndexModel
 from pydantic import BaseModel, Field ,ConfigDict
 from datetime import date
+from typing import List
 from models.stock import ItemTypeEnum
+from models.search import Searchable
 
 
 class IndentBase(BaseModel):
@@ -10,13 +13,24 @@ class IndentBase(BaseModel):
     Department: str
     Item_Type: str
 
-class Indent(Document, IndentBase):
+class Indent(Document, IndentBase, Searchable):
     date_of_indent: date = Field(default_factory=date.today)
     
     model_config = ConfigDict(
         name="indents",
         arbitrary_types_allowed=True
     )
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                [("item_name", TEXT), ("Department", TEXT)],
+                name="search_text",
+                weights={"item_name": 3},
+                default_language="none"
+            ),
+            IndexModel([("search_key", ASCENDING)], name="search_key"),
+        ]
     
 class IndentCreate(BaseModel):
     item_name: str
@@ -31,4 +45,8 @@ class IndentResponse(BaseModel):
     item_name: str
     Quantity: int
     Department: str
-    Item_Type: ItemTypeEnum
\ No newline at end of file
+    Item_Type: ItemTypeEnum
+
+class IndentLabelSheetRequest(BaseModel):
+    indent_ids: List[str] = Field(min_length=1, max_length=100)
+    columns: int = Field(default=3, ge=1, le=10)
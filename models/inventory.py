@@ -1,9 +1,10 @@
-from beanie import Document, Link 
+from beanie import Document, Link
+from pymongo import ASCENDING, TEXT, IndexModel
 from pydantic import BaseModel, Field, EmailStr, ConfigDict,model_validator
-from datetime import date
-from typing import List, Optional
-from models.stock import ItemTypeEnum
-from models.enums import StatusEnum
+from datetime import date, datetime, timezone
+from typing import ClassVar, List, Optional
+from models.enums import ItemTypeEnum, StatusEnum
+from models.search import Searchable
 
 
 # ----------- Base Models -----------
@@ -12,7 +13,25 @@ class RequestBase(BaseModel):
     campus_name: str
     reason: Optional[str]
 
-class Request(RequestBase, Document):
+class RequestItemBase(BaseModel):
+    item_name: str
+    qty: int = Field(gt=0, description="Quantity must be greater than 0")
+    description: Optional[str] = Field(
+        default=None,
+        description="Description of the item",
+        max_length=100
+    )
+
+class ReqIssueBase(BaseModel):
+    item_name: str
+    qty: int
+    Item_Type: str
+
+class EmbeddedReqIssue(ReqIssueBase):
+    employee_id: Optional[str] = None
+
+class Request(RequestBase, Searchable, Document):
+    search_title: ClassVar[str] = "campus_name"
     date_of_request: date = Field(default_factory=date.today)
     status: StatusEnum = Field(default=StatusEnum.Pending)
     date_of_approval: Optional[date] = None
@@ -21,35 +40,96 @@ class Request(RequestBase, Document):
     employee_id: Optional[str] = None
     items: List[Link["RequestItem"]] = Field(default_factory=list)
     issued: List[Link["ReqIssue"]] = Field(default_factory=list)
+    # Inline copies of the line items / issued rows used by the embedded
+    # storage mode; None means the request still uses the linked collections
+    embedded_items: Optional[List[RequestItemBase]] = None
+    embedded_issued: Optional[List[EmbeddedReqIssue]] = None
+    # Bumped on every write; the request's ETag and Last-Modified
+    revision: int = 0
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     model_config = ConfigDict(
         name="requests",
         arbitrary_types_allowed=True
     )
+
+    class Settings:
+        indexes = [
+            # get_history and the keyset-paginated listings
+            IndexModel(
+                [("campus_name", ASCENDING), ("date_of_request", ASCENDING), ("_id", ASCENDING)],
+                name="campus_name_date_of_request"
+            ),
+            IndexModel(
+                [("status", ASCENDING), ("date_of_request", ASCENDING), ("_id", ASCENDING)],
+                name="status_date_of_request"
+            ),
+            IndexModel(
+                [("date_of_request", ASCENDING), ("_id", ASCENDING)],
+                name="date_of_request"
+            ),
+            # consumption analytics by approval period
+            IndexModel(
+                [("status", ASCENDING), ("date_of_approval", ASCENDING)],
+                name="status_date_of_approval"
+            ),
+            # /search prefix matches
+            IndexModel([("search_key", ASCENDING)], name="search_key"),
+            # /search; a collection can have only one text index
+            IndexModel(
+                [("campus_name", TEXT), ("reason", TEXT),
+                 ("embedded_items.item_name", TEXT), ("embedded_items.description", TEXT)],
+                name="search_text",
+                weights={"campus_name": 5, "embedded_items.item_name": 3},
+                default_language="none"
+            ),
+        ]
 class MediatorApproval(BaseModel):
     employee_id: str
-    
-class RequestItemBase(BaseModel):
-    item_name: str
-    qty: int = Field(gt=0, description="Quantity must be greater than 0")
-    description: Optional[str] = Field(
-        default=None,
-        description="Description of the item",
-        max_length=100
-    )
 
-class RequestItem(RequestItemBase, Document):
+class RequestSelection(BaseModel):
+    """
+    Requests to act on: explicit ids, or every request matching the filters.
+    """
+    request_ids: Optional[List[str]] = Field(default=None, min_length=1, max_length=1000)
+    campus_name: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if not self.request_ids and not (self.campus_name or self.start_date or self.end_date):
+            raise ValueError("Give request_ids or at least one of campus_name, start_date, end_date")
+        if self.start_date and self.end_date and self.start_date > self.end_date:
+            raise ValueError("start_date must not be after end_date")
+        return self
+
+class BulkMediatorApproval(RequestSelection):
+    employee_id: str
+
+class TransitionResult(BaseModel):
+    selected: int
+    transitioned: int
+    skipped: int
+    
+class RequestItem(RequestItemBase, Searchable, Document):
     request: Optional[Link["Request"]] = None
     model_config = ConfigDict(
         name="request_items",
         arbitrary_types_allowed=True
     )
 
+    class Settings:
+        indexes = [
+            IndexModel(
+                [("item_name", TEXT), ("description", TEXT)],
+                name="search_text",
+                weights={"item_name": 3},
+                default_language="none"
+            ),
+            IndexModel([("search_key", ASCENDING)], name="search_key"),
+        ]
 
-class ReqIssueBase(BaseModel):
-    item_name: str
-    qty: int
-    Item_Type: str
 
 class ReqIssue(ReqIssueBase, Document):
     request: Optional[Link["Request"]] = None
@@ -60,6 +140,7 @@ class ReqIssue(ReqIssueBase, Document):
     )
 
 class RequestResponse(BaseModel):
+    request_id: Optional[str] = None
     campus_name: str
     date_of_request: date
     status: StatusEnum
@@ -68,7 +149,22 @@ class RequestResponse(BaseModel):
 class ReqIssueResponse(BaseModel):
     item_name: str
     qty: int
-    item_Type: ItemTypeEnum
+    Item_Type: ItemTypeEnum
+
+class ReqIssueCreate(BaseModel):
+    item_name: str
+    qty: int = Field(gt=0)
+    Item_Type: ItemTypeEnum
+
+class BatchApprovalItem(BaseModel):
+    request_id: str
+    issue: List[ReqIssueCreate] = Field(min_length=1)
+
+class BatchApprovalResult(BaseModel):
+    request_id: str
+    approved: bool
+    detail: Optional[str] = None
+    issued: List[ReqIssueResponse] = Field(default_factory=list)
     
     
 class RequestIssueResponse(BaseModel):
@@ -80,6 +176,10 @@ class RequestIssueResponse(BaseModel):
     items: List[RequestItemBase]
     issued: List[ReqIssueResponse]
     
+class RequestIssuePage(BaseModel):
+    requests: List[RequestIssueResponse]
+    next_cursor: Optional[str] = None
+
 class RequestIssueResponse2(BaseModel):
     campus_name: str
     date_of_request: date
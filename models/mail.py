@@ -0,0 +1,36 @@
+from beanie import Document
+from pydantic import Field, ConfigDict
+from pymongo import ASCENDING, IndexModel
+from datetime import datetime, timezone
+from typing import List, Optional
+from models.enums import MailStatusEnum
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class MailOutbox(Document):
+    subject: str
+    recipients: List[str]
+    body: str
+    status: MailStatusEnum = MailStatusEnum.Pending
+    attempts: int = 0
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=utcnow)
+    next_attempt_at: datetime = Field(default_factory=utcnow)
+    claimed_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+
+    model_config = ConfigDict(
+        name="mail_outbox",
+        arbitrary_types_allowed=True
+    )
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                [("status", ASCENDING), ("next_attempt_at", ASCENDING)],
+                name="status_next_attempt_at"
+            ),
+        ]
@@ -0,0 +1,35 @@
+from pydantic import BaseModel, model_validator
+from typing import ClassVar, Dict, List, Optional
+from models.enums import SearchScopeEnum
+from utils.catalogue import normalize_name
+
+
+class Searchable(BaseModel):
+    """
+    Keeps `search_key`, the case-folded, whitespace-collapsed form of the
+    field named by `search_title`. /search matches prefixes against it with a
+    case-sensitive anchored regex, which the index can bound tightly.
+    """
+    search_title: ClassVar[str] = "item_name"
+    search_key: Optional[str] = None
+
+    @model_validator(mode="after")
+    def set_search_key(self):
+        value = getattr(self, self.search_title, None)
+        self.search_key = normalize_name(value) if isinstance(value, str) else None
+        return self
+
+
+class SearchHit(BaseModel):
+    scope: SearchScopeEnum
+    id: str
+    # The request a line item belongs to, for request_items hits
+    request_id: Optional[str] = None
+    title: str
+    fields: Dict[str, Optional[str]]
+    score: float
+
+class SearchPage(BaseModel):
+    query: str
+    hits: List[SearchHit]
+    next_offset: Optional[int] = None
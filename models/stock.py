@@ -1,9 +1,11 @@
 from beanie import Document, Link
+from pymongo import ASCENDING, TEXT, IndexModel
 from pydantic import BaseModel, Field, ConfigDict, model_validator
 from datetime import date
 from typing import List, Optional
-from models.enums import ItemTypeEnum, StatusEnum
+from models.enums import ItemTypeEnum
 from models.validators import validate_consumable_items
+from models.search import Searchable
 
 class StockBase(BaseModel):
     vendor_name: str
@@ -19,13 +21,18 @@ class Stock(StockBase, Document):
         arbitrary_types_allowed=True
     )
 
+    class Settings:
+        indexes = [
+            IndexModel([("vendor_name", ASCENDING)], name="vendor_name"),
+        ]
+
 class ItemBase(BaseModel):
     item_name: str
     item_type: str
     item_quantity: int
     item_price: float
 
-class Item(ItemBase, Document):
+class Item(ItemBase, Searchable, Document):
     stock: Optional[Link["Stock"]] = None
 
     model_config = ConfigDict(
@@ -33,6 +40,12 @@ class Item(ItemBase, Document):
         arbitrary_types_allowed=True
     )
 
+    class Settings:
+        indexes = [
+            IndexModel([("item_name", TEXT)], name="search_text", default_language="none"),
+            IndexModel([("search_key", ASCENDING)], name="search_key"),
+        ]
+
     
 class ItemCreate(BaseModel):
     item_name: str
@@ -58,42 +71,54 @@ class StockResponse(StockBase):
     date_of_adding: date
     items: List[ItemResponse]
 
-# Request Models    
-class RequestItemResponse(BaseModel):
-    item_name: str
-    qty: int
-    
-class RequestResponse(BaseModel):
-    campus_name: str
-    date_of_request: date
-    status: StatusEnum
-    items: List[RequestItemResponse]
-    
-class ReqIssueResponse(BaseModel):
-    item_name: str
-    qty: int
-    Item_Type: ItemTypeEnum
-    
-class RequestIssueResponse(BaseModel):
-    request_id: str
-    campus_name: str
-    date_of_request: date
-    status: StatusEnum
-    reason: Optional[str]
-    items: List[RequestItemResponse]
-    issued: List[ReqIssueResponse]
-    
-class ReqIssueBase(BaseModel):
-    item_name: str
-    qty: int = Field(gt=0)
-    Item_Type: ItemTypeEnum
-    
 class CountsResponse(BaseModel):
-    Approved: int
-    Rejected: int
-    Pending: int
+    Approved: int = 0
+    Rejected: int = 0
+    Pending: int = 0
+    SemiApproved: int = 0
+    MediatorApproved: int = 0
 
 class InventoryItemTotal(Document):
     item_name: str
     total_quantity: int = 0
     item_type: ItemTypeEnum
+    # Maintained incrementally by utils.stock_totals on every receipt and issue
+    total_value: float = 0
+    average_cost: float = 0
+    reorder_level: Optional[int] = None
+    low_stock: bool = False
+
+    class Settings:
+        indexes = [
+            # Databases holding duplicate rows from before this index need
+            # `python -m scripts.dedupe_inventory_totals` first, or startup fails
+            IndexModel(
+                [("item_name", ASCENDING), ("item_type", ASCENDING)],
+                name="item_name_item_type",
+                unique=True
+            ),
+            # Only items at or below their reorder level are indexed
+            IndexModel(
+                [("low_stock", ASCENDING), ("item_name", ASCENDING)],
+                name="low_stock",
+                partialFilterExpression={"low_stock": True}
+            ),
+        ]
+
+class ReorderLevelUpdate(BaseModel):
+    item_name: str
+    item_type: ItemTypeEnum
+    reorder_level: Optional[int] = Field(default=None, ge=0)
+
+class InventoryValuationItem(BaseModel):
+    item_name: str
+    item_type: ItemTypeEnum
+    total_quantity: int
+    average_cost: float
+    total_value: float
+    reorder_level: Optional[int] = None
+    low_stock: bool = False
+
+class InventoryValuationResponse(BaseModel):
+    total_value: float
+    items: List[InventoryValuationItem]
@@ -1,20 +1,15 @@
-from models.enums import ItemTypeEnum
-
-ALLOWED_CONSUMABLE_ITEMS = [
-    "Brown Tape", "Transparent Tap Medium Size", "Clip Binder small", "Clip M Size (Boxes)", 
-    "Diary Register", "Fevicol (Gum) 100 Gram Bottle", "File Board", 
-    "File Cover with DSEU print", "File Tag Small (Bunch)", "Multi Color Flag/ Post it (pkt)",
-    "Nothing Sheet Legal- Ream","Paper Ream (A4 Size)","Pen Uniball Black" , "Punching Machine Double", "Stapler Heavy Duty",
-    "Stapler Small" , "Tissue Box","Extension Cord (Multiple Switches)"
-]
+from utils.catalogue import item_catalogue
 
 
 def validate_consumable_items (data):
+    """
+    Check the item against the catalogue and store its canonical spelling,
+    so "stapler  small" is saved (and totalled) as "Stapler Small".
+    """
+    if not isinstance(data, dict):
+        return data
     item_type = data.get("item_type")
     item_name = data.get("item_name")
-    if item_type == ItemTypeEnum.CONSUMABLE:
-        if item_name not in ALLOWED_CONSUMABLE_ITEMS:
-            raise ValueError(
-                    f"Invalid item for Consumable: '{item_name}'. Must be one of: {', '.join(ALLOWED_CONSUMABLE_ITEMS)}"
-                )
-    return data
\ No newline at end of file
+    if isinstance(item_name, str) and item_type is not None:
+        data = {**data, "item_name": item_catalogue.validate(item_name, item_type)}
+    return data
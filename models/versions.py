@@ -0,0 +1,25 @@
+from beanie import Document
+from pydantic import Field, ConfigDict
+from pymongo import ASCENDING, IndexModel
+from datetime import datetime, timezone
+
+
+class CollectionVersion(Document):
+    """
+    Change stamp for a whole collection: `version` goes up on every write the
+    API makes to it, so list endpoints can answer conditional requests
+    without reading the collection.
+    """
+    name: str
+    version: int = 0
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    model_config = ConfigDict(
+        name="collection_versions",
+        arbitrary_types_allowed=True
+    )
+
+    class Settings:
+        indexes = [
+            IndexModel([("name", ASCENDING)], name="name", unique=True),
+        ]
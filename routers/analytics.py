@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException, status
+from models.analytics import ConsumptionRow
+from models.enums import PeriodEnum
+from datetime import date
+from typing import List, Optional
+from utils.analytics import consumption_report
+import logging
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@router.get("/consumption", response_model=List[ConsumptionRow])
+async def get_consumption(
+    start: date,
+    end: Optional[date] = None,
+    granularity: PeriodEnum = PeriodEnum.Month,
+    campus_name: Optional[str] = None,
+    item_name: Optional[str] = None
+):
+    """
+    How much of each item each campus was issued per period, for every
+    whole period overlapping [start, end].
+    """
+    end = end or date.today()
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must not be after end")
+    try:
+        return await consumption_report(start, end, granularity, campus_name, item_name)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException, status
+from models.catalogue import CatalogueItem, CatalogueItemCreate, CatalogueItemResponse, CatalogueStatus
+from models.enums import ItemTypeEnum
+from typing import List, Optional
+from utils.catalogue import item_catalogue, seed_catalogue
+import logging
+
+router = APIRouter(prefix="/catalogue", tags=["Catalogue"])
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@router.get("/items", response_model=List[CatalogueItemResponse])
+async def get_catalogue_items(item_type: Optional[ItemTypeEnum] = None):
+    query = {"item_type": item_type.value} if item_type else {}
+    return await CatalogueItem.find(query).sort("item_type", "item_name").to_list()
+
+
+@router.post("/items", response_model=CatalogueStatus)
+async def add_catalogue_items(items: List[CatalogueItemCreate]):
+    """
+    Add items to the master (names already present are left as they are)
+    and reload this worker's catalogue.
+    """
+    if not items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No items given")
+    try:
+        await seed_catalogue((item.item_name, item.item_type.value) for item in items)
+        await item_catalogue.load()
+    except Exception as e:
+        logger.error(f"Failed to add catalogue items: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to add catalogue items")
+    return item_catalogue.status()
+
+
+@router.post("/reload", response_model=CatalogueStatus)
+async def reload_catalogue():
+    """
+    Reload the catalogue from the database now. Other workers reload on
+    their own every CATALOGUE_RELOAD_SECONDS.
+    """
+    try:
+        await item_catalogue.load()
+    except Exception as e:
+        logger.error(f"Failed to reload catalogue: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to reload catalogue")
+    return item_catalogue.status()
+
+
+@router.get("/status", response_model=CatalogueStatus)
+async def get_catalogue_status():
+    return item_catalogue.status()
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException, status
-from models.indent import Indent, IndentCreate, IndentResponse
-from fastapi.responses import StreamingResponse
-import barcode
-from barcode.writer import ImageWriter
-from io import BytesIO
+from models.indent import Indent, IndentCreate, IndentResponse, IndentLabelSheetRequest
+from beanie import PydanticObjectId
+from beanie.operators import In
+from fastapi.responses import Response
+from models.enums import BarcodeFormatEnum
+from utils.barcodes import get_indent_barcode, get_label_sheet, parse_scanned_code, MEDIA_TYPES as BARCODE_MEDIA_TYPES
+from utils.catalogue import item_catalogue, UnknownItemError
+from models.enums import ItemTypeEnum
 import logging
 
 router = APIRouter()
@@ -13,36 +16,31 @@ router = APIRouter()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def catalogue_item_name(item_name: str, item_type: ItemTypeEnum) -> str:
+    try:
+        return item_catalogue.validate(item_name, item_type)
+    except UnknownItemError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 @router.post("/create_indent_for_Non_Consumable", tags=["Indent"])
-async def create_indent_non_consumable(indent: IndentCreate):
+async def create_indent_non_consumable(
+    indent: IndentCreate,
+    format: BarcodeFormatEnum = BarcodeFormatEnum.PNG,
+    compact: bool = False
+):
+    item_name = catalogue_item_name(indent.item_name, ItemTypeEnum.NON_CONSUMABLE)
     try:
         indent_model = Indent(
-            item_name=indent.item_name,
+            item_name=item_name,
             Quantity=indent.Quantity,
             Department=indent.Department,
             Item_Type="Non Consumable"
         )
         await indent_model.insert()
-        
-
-        # Generate Barcode
-        barcode_data = (
-            f"Indent ID: {str(indent_model.id)}, "
-            f"Date of Indent: {indent_model.date_of_indent}, "
-            f"Item Name: {indent_model.item_name}, "
-            f"Quantity: {indent_model.Quantity}, "
-            f"Department: {indent_model.Department}, "
-            f"Item Type: {indent_model.Item_Type}"
-        )
-        barcode_class = barcode.get_barcode_class('code128')
-        barcode_instance = barcode_class(barcode_data, writer=ImageWriter())
 
-        # Save the barcode image to a BytesIO object
-        img_io = BytesIO()
-        barcode_instance.write(img_io)
-        img_io.seek(0)
-
-        return StreamingResponse(img_io, media_type="image/png")
+        # Generate Barcode on the worker pool
+        content = await get_indent_barcode(indent_model, format, compact)
+        return Response(content=content, media_type=BARCODE_MEDIA_TYPES[format])
     
     except Exception as e:
         logger.error(f"Error occurred: {e}")
@@ -57,9 +55,10 @@ async def create_indent_consumable(indent: IndentCreate):
     """
     Create a Consumable indent and return its data.
     """
+    item_name = catalogue_item_name(indent.item_name, ItemTypeEnum.CONSUMABLE)
     try:
         indent_model = Indent(
-            item_name=indent.item_name,
+            item_name=item_name,
             Quantity=indent.Quantity,
             Department=indent.Department,
             Item_Type="Consumable"
@@ -82,4 +81,57 @@ async def get_indent(indent_id: str):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="Indent not found")
-    return indent
\ No newline at end of file
+    return indent
+
+## get the barcode of an indent, rendered once and then served from cache
+
+@router.get("/get_indent/{indent_id}/barcode", tags=["Indent"])
+async def get_indent_barcode_image(
+    indent_id: str,
+    format: BarcodeFormatEnum = BarcodeFormatEnum.PNG,
+    compact: bool = False
+):
+    indent = await Indent.get(indent_id)
+    if not indent:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Indent not found")
+    content = await get_indent_barcode(indent, format, compact)
+    return Response(content=content, media_type=BARCODE_MEDIA_TYPES[format])
+
+## resolve a scanned barcode (compact or full payload) to its indent
+
+@router.get("/scan_indent/{code:path}", response_model=IndentResponse, tags=["Indent"])
+async def scan_indent(code: str):
+    indent_id = parse_scanned_code(code)
+    if not PydanticObjectId.is_valid(indent_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Barcode does not contain a valid indent ID")
+    indent = await Indent.get(indent_id)
+    if not indent:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Indent not found")
+    return indent
+
+## printable sheet of compact barcodes for many indents
+
+@router.post("/indent_labels", tags=["Indent"])
+async def get_indent_labels(labels: IndentLabelSheetRequest):
+    invalid = [i for i in labels.indent_ids if not PydanticObjectId.is_valid(i)]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid indent IDs: {', '.join(invalid)}")
+
+    ids = [PydanticObjectId(i) for i in labels.indent_ids]
+    found = {indent.id: indent for indent in await Indent.find(In(Indent.id, ids)).to_list()}
+    missing = [str(i) for i in ids if i not in found]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Indents not found: {', '.join(missing)}")
+
+    content = await get_label_sheet([found[i] for i in ids], labels.columns)
+    return Response(content=content, media_type=BARCODE_MEDIA_TYPES[BarcodeFormatEnum.PNG])
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, HTTPException, status
-from models.inventory import Request, RequestItem, MediatorApproval, RequestCreate, RequestResponse, RequestIssueResponse
+from fastapi import APIRouter, HTTPException, Response, status
+from fastapi import Request as HTTPRequest
+from models.inventory import Request, RequestItem, RequestItemBase, MediatorApproval, RequestCreate, RequestResponse, RequestIssueResponse
+from models.inventory import RequestSelection, BulkMediatorApproval, TransitionResult
+from models.enums import StatusEnum
 from fastapi.responses import JSONResponse
-from fastapi_mail import FastMail, MessageSchema, MessageType
 from typing import List
-from utils.mail import conf
+from utils.mail_dispatcher import enqueue_mail
+from utils.templates import render_request_created
+from utils.queries import find_requests_with_links, find_request_with_links, request_issue_dict, EMBEDDED_STORAGE
+from utils.http_cache import requests_changed, make_etag, is_not_modified, not_modified_response, with_cache_headers
+from utils.responses import trusted_list
+from utils.transitions import semi_approve, mediator_approve, semi_approve_many, mediator_approve_many, current_status, InvalidSelectionError
 import logging
 from fastapi import Body
+from beanie import PydanticObjectId
+from bson import ObjectId
 
 router = APIRouter(prefix="/inventory", tags=["Clg_Stock"])
 
@@ -18,59 +27,51 @@ logger = logging.getLogger(__name__)
 async def create_request(request: RequestCreate):
     try:
         request_model = Request(
+            id=PydanticObjectId(),
             your_mail_id=request.your_mail_id,
             campus_name=request.campus_name,
             reason=request.reason
         )
-        await request_model.insert()
-
-        item_models = []
-        for item in request.items:
-            item_model = RequestItem(
-                item_name=item.item_name,
-                qty=item.qty,
-                description=item.description,
-                request=request_model
-            )
-            await item_model.insert()
-            
-            item_models.append(item_model)
-        
-        request_model.items = item_models
-        await request_model.save()
-
-        # Email HTML template  
-        html = f"""
-        <html>
-        <body>
-            <h1>Request Created</h1>
-            <p><strong>Your Request ID:</strong> {request_model.id}</p>
-            <p><strong>Campus Name:</strong> {request_model.campus_name}</p>
-            <p><strong>Status:</strong> Pending</p>
-            <h2>Items</h2>
-            <ul>
-                {"".join([f"<li>{item.item_name}: {item.qty}</li>" for item in item_models])}
-            </ul>
-        </body>
-        </html>
-        """
-        
-        message = MessageSchema(
+
+        if EMBEDDED_STORAGE:
+            item_models = [
+                RequestItemBase(item_name=item.item_name, qty=item.qty, description=item.description)
+                for item in request.items
+            ]
+            request_model.embedded_items = item_models
+            await request_model.insert()
+        else:
+            item_models = [
+                RequestItem(
+                    id=PydanticObjectId(),
+                    item_name=item.item_name,
+                    qty=item.qty,
+                    description=item.description,
+                    request=request_model
+                )
+                for item in request.items
+            ]
+            request_model.items = item_models
+            await request_model.insert()
+            if item_models:
+                await RequestItem.insert_many(item_models)
+        await requests_changed()
+
+        html = render_request_created(request_model, item_models)
+
+        await enqueue_mail(
             subject="Your request has been created",
             recipients=[request.your_mail_id],
-            body=html,
-            subtype=MessageType.html)
-
-        fm = FastMail(conf)
-        await fm.send_message(message)
-        logger.info("Email sent successfully")
+            body=html
+        )
+        logger.info("Email queued successfully")
         
     except Exception as e:
-        logger.error(f"Failed to send email: {e}")
-        return JSONResponse(status_code=500, content={"message": "Failed to create request and send email"})
+        logger.error(f"Failed to create request: {e}")
+        return JSONResponse(status_code=500, content={"message": "Failed to create request"})
 
     return RequestResponse(
-        id=request_model.id,
+        request_id=str(request_model.id),
         campus_name=request_model.campus_name,
         date_of_request=request_model.date_of_request,
         status=request_model.status,
@@ -85,84 +86,99 @@ async def create_request(request: RequestCreate):
 # Fetch Request with Items status
 
 @router.get("/get_request_with_items_status/{request_id}/{campus_name}", response_model=RequestIssueResponse, tags=["Clg_Stock"])
-async def get_request_with_items(request_id: str, campus_name: str):
-    request = await Request.get(request_id, fetch_links=True)
-    if not request or request.campus_name != campus_name:
+async def get_request_with_items(request_id: str, campus_name: str, http_request: HTTPRequest, response: Response):
+    if not PydanticObjectId.is_valid(request_id):
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    # Revalidation reads only the revision by _id; links are joined only when the client's copy is stale
+    stamp = await Request.get_motor_collection().find_one(
+        {"_id": PydanticObjectId(request_id), "campus_name": campus_name},
+        {"revision": 1, "updated_at": 1}
+    )
+    if not stamp:
+        raise HTTPException(status_code=404, detail="Request not found")
+    etag = make_etag(request_id, stamp.get("revision", 0))
+    if is_not_modified(http_request, etag, stamp.get("updated_at")):
+        return not_modified_response(etag, stamp.get("updated_at"))
+
+    request = await find_request_with_links(PydanticObjectId(request_id))
+    if not request or request["campus_name"] != campus_name:
         raise HTTPException(status_code=404, detail="Request not found")
-    return RequestIssueResponse(
-        request_id=str(request.id),
-        campus_name=request.campus_name,
-        date_of_request=request.date_of_request,
-        status=request.status,
-        reason=request.reason,
-        items=[{"item_name": item.item_name, "qty": item.qty} for item in request.items or []],
-        issued=[{"item_name": issue.item_name, "qty": issue.qty, "Item_Type": issue.Item_Type}
-                for issue in request.issued or []]
+    return with_cache_headers(
+        RequestIssueResponse(**request_issue_dict(request)),
+        response, make_etag(request_id, request.get("revision", 0)), request.get("updated_at")
     )
 
 @router.get("/get_history/{campus_name}", response_model=List[RequestIssueResponse])
 async def get_history(campus_name: str):
     try:        
-        requests = await Request.find(Request.campus_name == campus_name).to_list()
-        result = []
-
-        for req in requests:
-            req_with_links = await Request.get(req.id, fetch_links=True)
-            result.append(RequestIssueResponse(
-                request_id=str(req_with_links.id),
-                campus_name=req_with_links.campus_name,
-                date_of_request=req_with_links.date_of_request,
-                status=req_with_links.status,
-                reason=req_with_links.reason,
-                items=[{"item_name": item.item_name, "qty": item.qty} for item in req_with_links.items or []],
-                issued=[{"item_name": issue.item_name, "qty": issue.qty, "Item_Type": issue.Item_Type}
-                        for issue in req_with_links.issued or []]
-            ))
-
-        return result
+        requests = await find_requests_with_links(
+            {"campus_name": campus_name},
+            sort={"date_of_request": 1, "_id": 1}
+        )
+        return trusted_list([request_issue_dict(req) for req in requests], RequestIssueResponse)
     except Exception as e:
         logger.error(f"Failed to get history: {e}")
         return JSONResponse(status_code=500, content={"message": "Failed to get history"})
 
 @router.post("/semi_approve/{request_id}" , tags=['Clg_Stock'])    
 async def semi_approve_request(request_id : str, ):
-    request = await Request.get(request_id,fetch_links=True)
-    if not request:
+    if not ObjectId.is_valid(request_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND , detail = "Request ID is invalid")
-    
-    if request.status != "Pending":
-        raise HTTPException(status_code = status.HTTP_404_NOT_FOUND , detail = "Request has already been '{request.status.value}' and cannot be approved again.")
-    
-    request.semi_approved =True
-    request.status = "Semi Approved"
-    await request.save()
-    return {"message" : "Request semi-approved", "request_id": str(request.id)}
+
+    # Only flips a request that is still Pending; no read-modify-write, no link fetch
+    if await semi_approve(ObjectId(request_id)) is None:
+        current = await current_status(ObjectId(request_id))
+        if current is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND , detail = "Request ID is invalid")
+        raise HTTPException(status_code = status.HTTP_404_NOT_FOUND , detail = f"Request has already been '{current}' and cannot be approved again.")
+
+    return {"message" : "Request semi-approved", "request_id": request_id}
+
+
+@router.post("/semi_approve", response_model=TransitionResult, tags=['Clg_Stock'])
+async def semi_approve_requests(selection: RequestSelection):
+    """
+    Semi-approve every selected request that is still Pending, in one update.
+    """
+    try:
+        return await semi_approve_many(selection)
+    except InvalidSelectionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.post("/mediator_approved/{request_id}", tags = ['Clg_Stock'])
 async def approved_by_mediator(request_id : str , data: MediatorApproval = Body(...)):
-    # request = await Request.get(request_id, fetch_links=True)
-    request = await Request.get(request_id)
-    if not request:
+    if not ObjectId.is_valid(request_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND , detail="Request ID is invalid")
-    
-    if not request.semi_approved:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST , detail= "Request must be semi approved")
-    
-    request.mediator_approved = True
-    request.employee_id= data.employee_id
-    request.status = "Mediator Approved"
 
-    await request.save()
+    if await mediator_approve(ObjectId(request_id), data.employee_id) is None:
+        current = await current_status(ObjectId(request_id))
+        if current is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND , detail="Request ID is invalid")
+        if current == StatusEnum.Pending.value:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST , detail= "Request must be semi approved")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST , detail=f"Request has already been '{current}'")
 
     return {
         "message": "Approved by the Mediator",
-        "request_id" :str(request.id),
-        "employee_id" : request.employee_id,
+        "request_id" : request_id,
+        "employee_id" : data.employee_id,
         "note" : "You must use this employee_id in the final isse stage"
     }
 
 
+@router.post("/mediator_approved", response_model=TransitionResult, tags=['Clg_Stock'])
+async def approved_by_mediator_bulk(data: BulkMediatorApproval):
+    """
+    Mediator-approve every selected request that is currently Semi Approved, in one update.
+    """
+    try:
+        return await mediator_approve_many(data, data.employee_id)
+    except InvalidSelectionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 
 
     
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from models.enums import SearchScopeEnum
+from models.search import SearchPage
+from typing import List, Optional
+from utils.search import search
+import logging
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+@router.get("", response_model=SearchPage)
+async def search_all(
+    q: str = Query(..., min_length=1, max_length=100),
+    scope: Optional[List[SearchScopeEnum]] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Typeahead search over stock items, request lines, requests and indents.
+    Pass `scope` (repeatable) to search only some of them.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="q must not be blank")
+    try:
+        return await search(q, scope, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -1,13 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from models.stock import Stock, Item, StockCreate, StockResponse, RequestIssueResponse, ReqIssueBase, InventoryItemTotal
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import Request as HTTPRequest
+from models.stock import Stock, Item, StockCreate, StockResponse, InventoryItemTotal
+from models.stock import ReorderLevelUpdate, InventoryValuationItem, InventoryValuationResponse
 from typing import List
-from models.inventory import Request, ReqIssue, RequestIssueResponse2
-from datetime import date
+from models.inventory import Request, ReqIssue, EmbeddedReqIssue, RequestIssueResponse, RequestIssueResponse2
+from models.inventory import ReqIssueCreate, BatchApprovalItem, BatchApprovalResult
+from datetime import date, datetime, time
 import logging
-from fastapi.responses import JSONResponse
-from fastapi_mail import FastMail, MessageSchema, MessageType
-from utils.mail import *
+from fastapi.responses import JSONResponse, ORJSONResponse
+from utils.mail_dispatcher import enqueue_mail
+from utils.templates import render_request_approved, render_request_rejected
 from bson import ObjectId
+from beanie import PydanticObjectId
+from utils.queries import find_requests_with_links, request_issue_dict, request_items, EMBEDDED_STORAGE
+from utils.export import stream_requests, MEDIA_TYPES
+from utils.approvals import approve_batch, MAX_BATCH_SIZE
+from utils.transitions import claim_final_approval, release_final_approval, complete_final_approval, reject, current_status
+from utils.http_cache import requests_changed, collection_version, make_etag, is_not_modified
+from utils.http_cache import not_modified_response, with_cache_headers, INVENTORY_TOTALS_VERSION
+from utils.responses import trusted_list, FAST_JSON_RESPONSES
+from utils.inventory_cache import inventory_cache
+from utils.catalogue import item_catalogue, UnknownItemError
+from utils.stock_totals import merge_lines, merge_receipts, add_items, set_reorder_level, reserve_items, release_items, InventoryNotFoundError, InsufficientStockError
+from models.enums import ExportFormatEnum, StatusEnum
+from fastapi.responses import StreamingResponse
 
 router = APIRouter(prefix="/central_stock", tags=["Central_Stock"])
 
@@ -24,44 +40,36 @@ async def create_stock(stock: StockCreate):
             status_code=400,
             detail=f"Stock from {stock.vendor_name} already exists."
             )
-    # Create a new stock entry
+    # Create a new stock entry; ids are assigned up front so the stock and its
+    # items can reference each other before anything is written
     stock_model = Stock(
+        id=PydanticObjectId(),
         vendor_name=stock.vendor_name,
         date_of_order=stock.date_of_order,
         date_of_purchase=stock.date_of_purchase
     )
-    await stock_model.insert()
 
-    item_docs = []
-    for item in stock.items:
-        item_doc = Item(
+    item_docs = [
+        Item(
+            id=PydanticObjectId(),
             item_name=item.item_name,
             item_type=item.item_type,
             item_quantity=item.item_quantity,
             item_price=item.item_price,
             stock=stock_model
         )
-        await item_doc.insert()
-        item_docs.append(item_doc)
-
-        # Update central inventory
-        existing = await InventoryItemTotal.find_one({
-            "item_name": item.item_name,
-            "item_type":item.item_type
-        })
-
-        if existing:
-            existing.total_quantity = existing.total_quantity + item.item_quantity
-            await existing.save()
-        else:
-            inventory_create = InventoryItemTotal(
-                item_name=item.item_name,
-                item_type=item.item_type,
-                total_quantity=item.item_quantity,
-            )
-            await inventory_create.insert()
+        for item in stock.items
+    ]
     stock_model.items = item_docs
-    await stock_model.save()
+    await stock_model.insert()
+    if item_docs:
+        await Item.insert_many(item_docs)
+
+    # Update central inventory with one upsert per distinct item
+    await add_items(merge_receipts(
+        (item.item_name, item.item_type, item.item_quantity, item.item_price) for item in stock.items
+    ))
+
     return StockResponse(
         vendor_name=stock_model.vendor_name,
         date_of_order=stock_model.date_of_order,
@@ -100,12 +108,27 @@ async def get_stock_with_items(stock_id: str):
     )
 
 
+async def return_issue(lines, issued_items) -> None:
+    """
+    Give back the stock taken for an approval that did not complete and delete its issue rows.
+    """
+    await release_items(lines)
+    if not EMBEDDED_STORAGE and issued_items:
+        await ReqIssue.get_motor_collection().delete_many({"_id": {"$in": [i.id for i in issued_items]}})
+
 # issue to the request
 @router.post("/final_approve_request/{request_id}", response_model=RequestIssueResponse, tags=["Central_Stock"], response_model_exclude={"reason"})
-async def final_approve_request(request_id: str, issue: List[ReqIssueBase]):
+async def final_approve_request(request_id: str, issue: List[ReqIssueCreate]):
     try:
         if not ObjectId.is_valid(request_id):
             raise HTTPException(status_code=400, detail="Invalid request ID")
+
+        # Issue lines must name catalogue items; store their canonical spelling
+        try:
+            for item in issue:
+                item.item_name = item_catalogue.validate(item.item_name, item.Item_Type)
+        except UnknownItemError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         
         request = await Request.get(ObjectId(request_id), fetch_links=True)
         if not request:
@@ -114,68 +137,91 @@ async def final_approve_request(request_id: str, issue: List[ReqIssueBase]):
         if not request.semi_approved or not request.mediator_approved:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Request must be semi and mediator approved first")
 
+        if request.status == StatusEnum.Approved:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request has already been approved")
+
+        # Claim the request first: of concurrent approvals only the one that
+        # moves it to Approved goes on to take stock
+        previous_status = getattr(request.status, "value", request.status)
+        claimed = await claim_final_approval(request.id)
+        if claimed is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request has already been approved")
+
+        # Decrement stock atomically; nothing is taken unless every line fits
+        lines = merge_lines((item.item_name, item.Item_Type, item.qty) for item in issue)
+        try:
+            await reserve_items(lines)
+        except InventoryNotFoundError as e:
+            await release_final_approval(request.id, previous_status)
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+        except InsufficientStockError as e:
+            await release_final_approval(request.id, previous_status)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        except Exception:
+            await release_final_approval(request.id, previous_status)
+            raise
+
+        # Only the issued rows and approval date are written, with a guard on
+        # the claimed status, so nothing written since the fetch is overwritten
         issued_items = []
-        for item in issue:
-            inventory_item = await InventoryItemTotal.find_one({
-                "item_name": item.item_name,
-                "item_type": item.Item_Type
-            })
-
-            if not inventory_item:
-                raise HTTPException(status_code=404, detail=f"No inventory found for item: {item.item_name}")
-
-            if item.qty>inventory_item.total_quantity:
-                raise HTTPException(detail=f"Insufficient quantity for item: {item.item_name}")
-            
-            inventory_item.total_quantity = inventory_item.total_quantity - item.qty
-
-            await inventory_item.save()
-
-            issue_doc = ReqIssue(
-                item_name=item.item_name,
-                qty=item.qty,
-                Item_Type=item.Item_Type,
-                employee_id=request.employee_id,
-                request=request
-                
+        approved_on = datetime.combine(date.today(), time())
+        try:
+            if EMBEDDED_STORAGE:
+                issued_items = [
+                    EmbeddedReqIssue(
+                        item_name=item.item_name,
+                        qty=item.qty,
+                        Item_Type=item.Item_Type,
+                        employee_id=request.employee_id
+                    )
+                    for item in issue
+                ]
+            else:
+                issued_items = [
+                    ReqIssue(
+                        id=PydanticObjectId(),
+                        item_name=item.item_name,
+                        qty=item.qty,
+                        Item_Type=item.Item_Type,
+                        employee_id=request.employee_id,
+                        request=request
+                    )
+                    for item in issue
+                ]
+                await ReqIssue.insert_many(issued_items)
+            completed = await complete_final_approval(
+                request.id,
+                [
+                    {"item_name": i.item_name, "qty": i.qty, "Item_Type": i.Item_Type, "employee_id": i.employee_id}
+                    for i in issued_items
+                ],
+                [] if EMBEDDED_STORAGE else [i.id for i in issued_items],
+                approved_on
             )
-            await issue_doc.insert()
-            issued_items.append(issue_doc)
-        
-        
-
-        request.status = "Approved"
-        request.date_of_approval = date.today()
-        request.issued = issued_items
-        await request.save()
+        except Exception:
+            await return_issue(lines, issued_items)
+            await release_final_approval(request.id, previous_status)
+            raise
+        if not completed:
+            # Moved out of Approved by another writer since the claim; the
+            # status is theirs now, so only the stock and issue rows go back
+            await return_issue(lines, issued_items)
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Request changed while it was being approved")
+        request.status = StatusEnum.Approved
+        request.date_of_approval = approved_on.date()
+        await requests_changed()
     
-        # Create an HTML template
-        html = f"""
-        <html><body>
-        <h1>Request Issued</h1>
-        <p><strong>ID:</strong> {request.id}</p>
-        <p><strong>Campus:</strong> {request.campus_name}</p>
-        <p><strong>Status:</strong> Approved</p>
-        <p><strong>Date of Approval:</strong> {request.date_of_approval}</p>
-        <p><strong>Employee ID:</strong> {request.employee_id}</p>
-        <h2>Items</h2>
-        <ul>{''.join([f'<li>{i.item_name}: {i.qty} ({i.Item_Type})</li>' for i in issued_items])}</ul>
-        </body></html>
-        """
-        
+        html = render_request_approved(request, issued_items)
+
         try:
-            message = MessageSchema(
+            await enqueue_mail(
                 subject="Your Request has been Approved",
                 recipients=[request.your_mail_id],
-                body=html,
-                subtype=MessageType.html
+                body=html
             )
-
-            fm = FastMail(conf)
-            await fm.send_message(message)
-            logger.info("Email sent successfully")
+            logger.info("Email queued successfully")
         except Exception as email_error:
-            logger.error(f"Failed to send email: {email_error}")
+            logger.error(f"Failed to queue email: {email_error}")
     
     except HTTPException:
         raise
@@ -189,83 +235,141 @@ async def final_approve_request(request_id: str, issue: List[ReqIssueBase]):
         date_of_request=request.date_of_request,
         status=request.status,
         reason=request.reason,
-        items=[{"item_name": i.item_name, "qty": i.qty} for i in request.items],
+        items=[{"item_name": i.item_name, "qty": i.qty} for i in request_items(request)],
         issued=[{"item_name": i.item_name, "qty": i.qty, "Item_Type": i.Item_Type} for i in issued_items]
     )
 
+@router.post("/final_approve_batch", response_model=List[BatchApprovalResult], tags=["Central_Stock"])
+async def final_approve_batch(batch: List[BatchApprovalItem]):
+    """
+    Final-approve several requests in one call. Each entry is approved or
+    rejected on its own; the response reports the outcome per request.
+    """
+    if not batch:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No requests to approve")
+    if len(batch) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_SIZE} requests can be approved at once"
+        )
+    try:
+        return await approve_batch(batch)
+    except Exception as e:
+        logger.error(f"Error processing batch approval: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error processing batch approval: {str(e)}")
+
 @router.post("/reject_request/{request_id}/{reason}", response_model=RequestIssueResponse, tags=["Central_Stock"],response_model_exclude={"issued"})
 async def reject_request(request_id: str, reason: str):
     try:
-        request = await Request.get(request_id, fetch_links=True)
-        if not request:
+        if not ObjectId.is_valid(request_id):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Request not found")
 
-        request.status = "Rejected"
-        request.reason = reason
-        await request.save()
+        # Guarded on the status, so an approved request keeps its stock and issue rows
+        if await reject(ObjectId(request_id), reason) is None:
+            current = await current_status(ObjectId(request_id))
+            if current is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Request not found")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Request has already been '{current}' and cannot be rejected")
+
+        request = await Request.get(ObjectId(request_id), fetch_links=True)
         
-        html = f"""
-        <html>
-        <body>
-            <h1>Request Rejected</h1>
-            <p>Request ID: {request.id}</p>
-            <p>Campus Name: {request.campus_name}</p>
-            <p>Date of Request: {request.date_of_request}</p>
-            <p>Status: {"Rejected"}</p>
-            <p>Reason: {reason}</p>
-        </body>
-        </html>
-        """
-
-        message = MessageSchema(
+        html = render_request_rejected(request, reason)
+
+        await enqueue_mail(
             subject="Your Request has been Rejected",
             recipients=[request.your_mail_id],
-            body=html,
-            subtype=MessageType.html
+            body=html
         )
 
-        fm = FastMail(conf)
-        await fm.send_message(message)
-
         return RequestIssueResponse(
             request_id=str(request.id),
             campus_name=request.campus_name,
             date_of_request=request.date_of_request,
             status=request.status,
             reason=request.reason,
-            items=[{"item_name": i.item_name, "qty": i.qty} for i in request.items or []],
+            items=[{"item_name": i.item_name, "qty": i.qty} for i in request_items(request)],
             issued=[]
     )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An error occurred: {str(e)}")
 
 @router.get("/all_issued_items", response_model=List[RequestIssueResponse2], tags=["Central_Stock"])
 async def get_issued_items():
-    requests = await Request.find(Request.status == "Approved").to_list()
-    result = []
-    for req in requests:
-        full_req = await Request.get(req.id, fetch_links=True)
-        result.append(RequestIssueResponse2(
-            request_id=str(full_req.id),
-            campus_name=full_req.campus_name,
-            date_of_request=full_req.date_of_request,
-            date_of_approval=full_req.date_of_approval,
-            issued=[{"item_name": i.item_name, "qty": i.qty, "Item_Type": i.Item_Type} for i in full_req.issued or []]
-        ))
-    return result
+    requests = await find_requests_with_links({"status": "Approved"})
+    return trusted_list([request_issue_dict(req) for req in requests], RequestIssueResponse2)
 
+@router.get("/export_issued_items", tags=["Central_Stock"])
+async def export_issued_items(format: ExportFormatEnum = ExportFormatEnum.NDJSON):
+    """
+    Stream all approved requests with their issued rows as NDJSON or CSV.
+    """
+    return StreamingResponse(
+        stream_requests(format, {"status": "Approved"}),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=issued_items.{format.value}"}
+    )
 
 
 #for the total inventory items
 @router.get("/all_inventory_items", response_model=List[dict])
-async def get_all_inventory_items():
-    items = await InventoryItemTotal.find_all().to_list()
-    return [
+async def get_all_inventory_items(http_request: HTTPRequest, response: Response):
+    version, last_modified = await collection_version(INVENTORY_TOTALS_VERSION)
+    etag = make_etag("inventory", version)
+    if is_not_modified(http_request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    items = await inventory_cache.all_at_version(version)
+    rows = [
         {
-            "item_name": item.item_name,
-            "item_type": item.item_type,
-            "total_quantity": item.total_quantity
+            "item_name": item["item_name"],
+            "item_type": item["item_type"],
+            "total_quantity": item["total_quantity"]
         }
         for item in items
-    ]
\ No newline at end of file
+    ]
+    return with_cache_headers(
+        ORJSONResponse(rows) if FAST_JSON_RESPONSES else rows, response, etag, last_modified
+    )
+
+def valuation_item(item: dict) -> dict:
+    return {
+        "item_name": item["item_name"],
+        "item_type": item["item_type"],
+        "total_quantity": item["total_quantity"],
+        "average_cost": item.get("average_cost", 0),
+        "total_value": item.get("total_value", 0),
+        "reorder_level": item.get("reorder_level"),
+        "low_stock": item.get("low_stock", False)
+    }
+
+@router.get("/valuation", response_model=InventoryValuationResponse)
+async def get_inventory_valuation():
+    items = [valuation_item(item) for item in await inventory_cache.all()]
+    return InventoryValuationResponse(
+        total_value=round(sum(item["total_value"] for item in items), 2),
+        items=items
+    )
+
+@router.put("/reorder_level", response_model=InventoryValuationItem)
+async def update_reorder_level(update: ReorderLevelUpdate):
+    doc = await set_reorder_level(update.item_name, update.item_type, update.reorder_level)
+    if doc is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No inventory found for item: {update.item_name}")
+    return valuation_item(doc)
+
+@router.get("/low_stock", response_model=List[InventoryValuationItem])
+async def get_low_stock_items():
+    """
+    Items at or below their reorder level, read from the partial low_stock index.
+    """
+    docs = await InventoryItemTotal.get_motor_collection().find(
+        {"low_stock": True}
+    ).sort("item_name", 1).to_list(length=None)
+    return [valuation_item(doc) for doc in docs]
+
+@router.get("/inventory_cache_stats", response_model=dict)
+async def get_inventory_cache_stats():
+    return inventory_cache.stats()
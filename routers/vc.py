@@ -1,62 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from models.inventory import RequestIssueResponse, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi import Request as HTTPRequest
+from models.inventory import RequestIssueResponse, RequestIssuePage, Request
 from models.stock import CountsResponse
-from typing import List
+from models.enums import ExportFormatEnum, StatusEnum
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, Optional
+from utils.queries import find_requests_page, request_issue_dict, InvalidCursorError
+from utils.export import stream_requests, MEDIA_TYPES
+from utils.cache import counts_cache
+from utils.responses import trusted_page
+from utils.http_cache import collection_version, make_etag, is_not_modified, not_modified_response, with_cache_headers, REQUESTS_VERSION
 
 router = APIRouter(prefix="/vc", tags=["VC"])
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
-def build_request_response(request: Request) -> RequestIssueResponse:
-    return RequestIssueResponse(
-        request_id=str(request.id),
-        campus_name=request.campus_name,
-        date_of_request=request.date_of_request,
-        status=request.status,
-        reason=request.reason,
-        items=[{"item_name": item.item_name, "qty": item.qty} for item in request.items or []],
-        issued=[
-            {"item_name": issue.item_name, "qty": issue.qty, "Item_Type": issue.Item_Type}
-            for issue in request.issued or []
-        ]
+
+async def build_request_page(match: Optional[Dict[str, Any]], cursor: Optional[str], limit: int, not_found: str) -> RequestIssuePage:
+    try:
+        requests, next_cursor = await find_requests_page(match, cursor=cursor, limit=limit)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not requests and not cursor:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    return trusted_page(
+        [request_issue_dict(r) for r in requests], RequestIssueResponse, RequestIssuePage,
+        next_cursor=next_cursor
     )
 
-@router.get("/all_requests", response_model=List[RequestIssueResponse])
-async def get_all_requests():
-    requests = await Request.find_all(fetch_links=True).sort("date_of_request").to_list()
-    if not requests:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No requests found")
-    return [build_request_response(r) for r in requests]
-
-
-@router.get("/all_approved", response_model=List[RequestIssueResponse])
-async def get_all_approved():
-    requests = await Request.find(Request.status == "Approved", fetch_links=True).to_list()
-    if not requests:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No approved requests found")
-    return [build_request_response(r) for r in requests]
-
-@router.get("/all_rejected", response_model=List[RequestIssueResponse])
-async def get_all_rejected():
-    requests = await Request.find(Request.status == "Rejected", fetch_links=True).to_list()
-    if not requests:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No rejected requests found")
-    return [build_request_response(r) for r in requests]
-
-@router.get("/all_pending", response_model=List[RequestIssueResponse])
-async def get_all_pending():
-    requests = await Request.find(Request.status == "Pending", fetch_links=True).to_list()
-    if not requests:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No pending requests found")
-    return [build_request_response(r) for r in requests]
+@router.get("/all_requests", response_model=RequestIssuePage)
+async def get_all_requests(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    return await build_request_page(None, cursor, limit, "No requests found")
+
+
+@router.get("/all_approved", response_model=RequestIssuePage)
+async def get_all_approved(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    return await build_request_page({"status": "Approved"}, cursor, limit, "No approved requests found")
+
+@router.get("/all_rejected", response_model=RequestIssuePage)
+async def get_all_rejected(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    return await build_request_page({"status": "Rejected"}, cursor, limit, "No rejected requests found")
+
+@router.get("/all_pending", response_model=RequestIssuePage)
+async def get_all_pending(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    return await build_request_page({"status": "Pending"}, cursor, limit, "No pending requests found")
+
+@router.get("/export_requests")
+async def export_requests(
+    format: ExportFormatEnum = ExportFormatEnum.NDJSON,
+    status_filter: Optional[StatusEnum] = Query(None, alias="status")
+):
+    """
+    Stream every request (optionally filtered by status) with its items and
+    issued rows as NDJSON or CSV, without loading the result set into memory.
+    """
+    match = {"status": status_filter.value} if status_filter else None
+    return StreamingResponse(
+        stream_requests(format, match),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=requests.{format.value}"}
+    )
 
 @router.get("/counts", response_model=CountsResponse)
-async def get_counts():
-    approved_count = await Request.find(Request.status == "Approved").count()
-    rejected_count = await Request.find(Request.status == "Rejected").count()
-    pending_count = await Request.find(Request.status == "Pending").count()
-
-    return CountsResponse(
-        Approved=approved_count,
-        Rejected=rejected_count,
-        Pending=pending_count
-    )
\ No newline at end of file
+async def get_counts(http_request: HTTPRequest, response: Response):
+    # The stamp is read before the counts, so they are never older than the ETag
+    version, last_modified = await collection_version(REQUESTS_VERSION)
+    etag = make_etag("counts", version)
+    if is_not_modified(http_request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    # Keyed by version, so counts cached by this worker expire on writes made by any worker
+    cache_key = f"counts:{version}"
+    cached = counts_cache.get(cache_key)
+    if cached is not None:
+        return with_cache_headers(cached, response, etag, last_modified)
+
+    grouped = await Request.aggregate([
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]).to_list()
+    by_status = {row["_id"]: row["count"] for row in grouped}
+
+    counts = CountsResponse(**{
+        member.name: by_status.get(member.value, 0) for member in StatusEnum
+    })
+    counts_cache.set(cache_key, counts)
+    return with_cache_headers(counts, response, etag, last_modified)
@@ -0,0 +1,65 @@
+"""
+One-shot backfill of `search_key` (the normalized title /search matches
+prefixes against) on items, request line items, requests and indents written
+before the field existed. Documents written since carry it already.
+
+    python -m scripts.backfill_search_keys --batch-size 1000
+
+The old `item_name` indexes on the items, request-items and indents
+collections are no longer used by /search and can be dropped afterwards.
+"""
+from typing import Any, Dict, List
+from pymongo import UpdateOne
+from database import init_db, close_db
+from models.indent import Indent
+from models.inventory import Request, RequestItem
+from models.stock import Item
+from utils.catalogue import normalize_name
+import argparse
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEARCHABLE_MODELS = [Item, RequestItem, Request, Indent]
+
+
+async def backfill(model, batch_size: int) -> int:
+    collection = model.get_motor_collection()
+    title = model.search_title
+    updated = 0
+    while True:
+        docs: List[Dict[str, Any]] = await collection.find(
+            {"search_key": None}, {title: 1}
+        ).limit(batch_size).to_list(length=None)
+        if not docs:
+            break
+        result = await collection.bulk_write([
+            UpdateOne(
+                {"_id": doc["_id"]},
+                # "" for documents without a title, so they are not picked up again
+                {"$set": {"search_key": normalize_name(doc[title]) if isinstance(doc.get(title), str) else ""}}
+            )
+            for doc in docs
+        ], ordered=False)
+        updated += result.modified_count
+        logger.info(f"{collection.name}: {updated} documents backfilled")
+    return updated
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    await init_db()
+    try:
+        for model in SEARCHABLE_MODELS:
+            await backfill(model, args.batch_size)
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Merge duplicate InventoryItemTotal rows, one per (item_name, item_type), so
+the unique `item_name_item_type` index can be built.
+
+Databases written before that index existed can hold several rows for the
+same item (concurrent first receipts each inserted one). init_beanie then
+fails at startup with a duplicate key error, so run this first, with the
+API stopped:
+
+    python -m scripts.dedupe_inventory_totals [--dry-run]
+
+Quantities and values of the duplicates are added onto the oldest row, which
+keeps its reorder level (or takes the first one set); the others are deleted.
+"""
+from typing import Any, Dict, List
+from motor.motor_asyncio import AsyncIOMotorClient
+from database import MONGO_URI, DB_NAME, client_options
+from models.stock import InventoryItemTotal
+from utils.stock_totals import VALUATION_STAGE
+import argparse
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DUPLICATES_PIPELINE: List[Dict[str, Any]] = [
+    {"$sort": {"_id": 1}},
+    {
+        "$group": {
+            "_id": {"item_name": "$item_name", "item_type": "$item_type"},
+            "ids": {"$push": "$_id"},
+            "total_quantity": {"$sum": "$total_quantity"},
+            "total_value": {"$sum": {"$ifNull": ["$total_value", 0]}},
+            "reorder_levels": {"$push": "$reorder_level"},
+        }
+    },
+    {"$match": {"ids.1": {"$exists": True}}},
+]
+
+
+async def dedupe(collection, dry_run: bool) -> int:
+    removed = 0
+    async for group in collection.aggregate(DUPLICATES_PIPELINE, allowDiskUse=True):
+        keep, *duplicates = group["ids"]
+        reorder_level = next((level for level in group["reorder_levels"] if level is not None), None)
+        logger.info(
+            f"{group['_id']['item_name']} ({group['_id']['item_type']}): merging {len(duplicates)} "
+            f"duplicates into {keep}, total quantity {group['total_quantity']}"
+        )
+        if dry_run:
+            removed += len(duplicates)
+            continue
+        await collection.update_one({"_id": keep}, [
+            {"$set": {
+                "total_quantity": group["total_quantity"],
+                "total_value": group["total_value"],
+                "reorder_level": reorder_level,
+            }},
+            VALUATION_STAGE,
+        ])
+        result = await collection.delete_many({"_id": {"$in": duplicates}})
+        removed += result.deleted_count
+    return removed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only report the duplicates")
+    args = parser.parse_args()
+
+    # Not init_db: init_beanie would try to build the unique index this script makes possible
+    client = AsyncIOMotorClient(MONGO_URI, **client_options())
+    try:
+        collection = client[DB_NAME][InventoryItemTotal.__name__]
+        removed = await dedupe(collection, args.dry_run)
+        logger.info(f"Done: {removed} duplicate rows {'found' if args.dry_run else 'removed'}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+One-shot migration copying each Request's linked `RequestItem` and `ReqIssue`
+rows inline into `embedded_items` / `embedded_issued`, in batches.
+
+Routers read both layouts and, once a request exists, only change it with
+targeted `$set` updates that never touch `items` or `embedded_items`, so this
+can run while the API is serving traffic. The issued rows of an approved
+request never change again, and requests approved during the run keep their
+`issued` links.
+Switch writes over with REQUEST_STORAGE_MODE=embedded once it completes.
+
+    python -m scripts.migrate_embed_request_lines --batch-size 500 [--drop-links]
+"""
+from typing import Any, Dict, List
+from pymongo import UpdateOne
+from database import init_db, close_db
+from models.inventory import Request
+from utils.queries import request_links_pipeline
+import argparse
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def embedded_update(doc: Dict[str, Any], drop_links: bool) -> UpdateOne:
+    update: Dict[str, Any] = {
+        "embedded_items": [
+            {"item_name": i["item_name"], "qty": i["qty"], "description": i.get("description")}
+            for i in doc.get("items") or []
+        ],
+    }
+    # Left unset for requests not issued yet: until writes switch to embedded
+    # mode, an approval in linked mode only writes the `issued` links
+    if doc.get("issued"):
+        update["embedded_issued"] = [
+            {"item_name": i["item_name"], "qty": i["qty"], "Item_Type": i["Item_Type"],
+             "employee_id": i.get("employee_id")}
+            for i in doc["issued"]
+        ]
+        if drop_links:
+            update["issued"] = []
+    if drop_links:
+        update["items"] = []
+    # Only touch requests that have not been converted in the meantime
+    return UpdateOne({"_id": doc["_id"], "embedded_items": None}, {"$set": update})
+
+
+async def migrate(batch_size: int, drop_links: bool) -> int:
+    collection = Request.get_motor_collection()
+    migrated = 0
+    last_id = None
+    while True:
+        match: Dict[str, Any] = {"embedded_items": None}
+        if last_id is not None:
+            match["_id"] = {"$gt": last_id}
+        pipeline = request_links_pipeline(match, sort={"_id": 1}, limit=batch_size)
+        docs: List[Dict[str, Any]] = await Request.aggregate(pipeline).to_list()
+        if not docs:
+            break
+
+        result = await collection.bulk_write(
+            [embedded_update(doc, drop_links) for doc in docs], ordered=False
+        )
+        migrated += result.modified_count
+        last_id = docs[-1]["_id"]
+        logger.info(f"Migrated {migrated} requests (up to {last_id})")
+    return migrated
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--drop-links", action="store_true",
+        help="Clear the items/issued link arrays after copying (the linked collections are left untouched)"
+    )
+    args = parser.parse_args()
+
+    await init_db()
+    try:
+        migrated = await migrate(args.batch_size, args.drop_links)
+        logger.info(f"Done: {migrated} requests now store their lines inline")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
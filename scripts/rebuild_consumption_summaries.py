@@ -0,0 +1,37 @@
+"""
+Rebuild the stored consumption summaries of closed periods from the request
+history. Summaries are materialized once and then only read, so run this
+after correcting source data (e.g. re-issued or repaired requests) for the
+periods it touched.
+
+    python -m scripts.rebuild_consumption_summaries --start 2024-01-01 [--end 2024-12-31] [--granularity month]
+"""
+from datetime import date
+from database import init_db, close_db
+from models.enums import PeriodEnum
+from utils.analytics import rebuild_summaries
+import argparse
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--granularity", type=PeriodEnum, choices=list(PeriodEnum), default=PeriodEnum.Month)
+    args = parser.parse_args()
+
+    await init_db()
+    try:
+        rebuilt = await rebuild_summaries(args.start, args.end, args.granularity)
+        logger.info(f"Done: rebuilt {rebuilt} {args.granularity.value} summaries")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+from typing import Any, Dict, List
+from datetime import date
+
+CAMPUS = "Okhla-1"
+MAIL_ID = "tests@example.com"
+EMPLOYEE_ID = "TEST-001"
+
+
+def api_client():
+    """
+    httpx client talking to the ASGI app in-process. Lifespan events are not
+    sent; the `mongo` fixture has already initialized the database.
+    """
+    import httpx
+    from main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def create_stock(client, items: Dict[str, int], vendor_name: str = "Test Vendor") -> None:
+    today = date.today().isoformat()
+    response = await client.post("/central_stock/create_stock", json={
+        "vendor_name": vendor_name,
+        "date_of_order": today,
+        "date_of_purchase": today,
+        "items": [
+            {"item_name": name, "item_type": "Consumable", "item_quantity": qty, "item_price": 10.0}
+            for name, qty in items.items()
+        ],
+    })
+    assert response.status_code == 200, response.text
+
+
+async def create_request(client, lines: Dict[str, int]) -> str:
+    response = await client.post("/inventory/create_request", json={
+        "your_mail_id": MAIL_ID,
+        "campus_name": CAMPUS,
+        "reason": "Tests",
+        "items": [{"item_name": name, "qty": qty, "description": None} for name, qty in lines.items()],
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["request_id"]
+
+
+async def mediator_approved_request(client, lines: Dict[str, int]) -> str:
+    """
+    A request taken through semi and mediator approval, ready for final approval.
+    """
+    request_id = await create_request(client, lines)
+    response = await client.post(f"/inventory/semi_approve/{request_id}")
+    assert response.status_code == 200, response.text
+    response = await client.post(f"/inventory/mediator_approved/{request_id}", json={"employee_id": EMPLOYEE_ID})
+    assert response.status_code == 200, response.text
+    return request_id
+
+
+def issue(lines: Dict[str, int]) -> List[Dict[str, Any]]:
+    return [{"item_name": name, "qty": qty, "Item_Type": "Consumable"} for name, qty in lines.items()]
@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+
+def test_rebuild_picks_up_corrected_history(mongo):
+    from beanie import PydanticObjectId
+    from models.enums import PeriodEnum, StatusEnum
+    from models.inventory import Request, EmbeddedReqIssue, RequestItemBase
+    from utils.analytics import consumption_report, rebuild_summaries
+
+    last_month = (date.today().replace(day=1) - timedelta(days=1)).replace(day=1)
+
+    async def approved(qty: int) -> None:
+        await Request(
+            id=PydanticObjectId(),
+            your_mail_id="tests@example.com",
+            campus_name="Okhla-1",
+            reason="Tests",
+            date_of_request=last_month,
+            date_of_approval=last_month,
+            status=StatusEnum.Approved,
+            embedded_items=[RequestItemBase(item_name="Brown Tape", qty=qty)],
+            embedded_issued=[EmbeddedReqIssue(item_name="Brown Tape", qty=qty, Item_Type="Consumable")],
+        ).insert()
+
+    def issued(rows):
+        return [(row.period, row.item_name, row.total_qty, row.request_count) for row in rows]
+
+    async def body():
+        label = last_month.strftime("%Y-%m")
+        await approved(3)
+        first = await consumption_report(last_month, last_month, PeriodEnum.Month)
+        assert issued(first) == [(label, "Brown Tape", 3, 1)]
+
+        # A request repaired after its period closed stays out of the stored summary...
+        await approved(4)
+        assert issued(await consumption_report(last_month, last_month, PeriodEnum.Month)) == issued(first)
+
+        # ...until the summary is rebuilt
+        assert await rebuild_summaries(last_month, last_month, PeriodEnum.Month) == 1
+        assert issued(await consumption_report(last_month, last_month, PeriodEnum.Month)) == [(label, "Brown Tape", 7, 2)]
+
+    mongo(body)
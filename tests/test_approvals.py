@@ -0,0 +1,32 @@
+import asyncio
+from tests.helpers import api_client, create_stock, issue, mediator_approved_request
+
+LINES = {"Brown Tape": 2, "Tissue Box": 1}
+
+
+def test_concurrent_batches_issue_each_request_once(mongo):
+    from models.inventory import BatchApprovalItem, ReqIssue
+    from models.stock import InventoryItemTotal
+    from utils.approvals import approve_batch
+
+    async def body():
+        async with api_client() as client:
+            await create_stock(client, {"Brown Tape": 100, "Tissue Box": 100})
+            request_ids = [await mediator_approved_request(client, LINES) for _ in range(10)]
+
+        batch = [BatchApprovalItem(request_id=request_id, issue=issue(LINES)) for request_id in request_ids]
+        runs = await asyncio.gather(*(approve_batch([item.model_copy(deep=True) for item in batch]) for _ in range(4)))
+
+        for position, request_id in enumerate(request_ids):
+            outcomes = [run[position] for run in runs]
+            assert sum(result.approved for result in outcomes) == 1, request_id
+            assert all(result.detail == "Request has already been approved" for result in outcomes if not result.approved)
+
+        totals = {
+            doc["item_name"]: doc["total_quantity"]
+            async for doc in InventoryItemTotal.get_motor_collection().find({})
+        }
+        assert totals == {"Brown Tape": 100 - 2 * 10, "Tissue Box": 100 - 10}
+        assert await ReqIssue.get_motor_collection().count_documents({}) == len(LINES) * 10
+
+    mongo(body)
@@ -0,0 +1,21 @@
+import os
+import pytest
+
+pytest.importorskip("barcode")
+pytest.importorskip("beanie")
+
+
+def test_disk_cache_survives_a_restart_and_leaves_other_files_alone(tmp_path):
+    from utils.barcodes import BarcodeCache, BARCODE_CACHE_LAYOUT
+
+    (tmp_path / "README").write_text("not ours")
+    (tmp_path / "0123456789abcdef01234567.png").write_bytes(b"not ours either")
+
+    cache = BarcodeCache(cache_dir=str(tmp_path))
+    key = ("0123456789abcdef01234567", "png", "full")
+    cache.put(key, b"image")
+    assert sorted(os.listdir(tmp_path)) == ["0123456789abcdef01234567.png", "README", BARCODE_CACHE_LAYOUT]
+    assert os.listdir(tmp_path / BARCODE_CACHE_LAYOUT) == ["0123456789abcdef01234567.full.png"]
+
+    # A fresh cache over the same directory finds the entry on disk
+    assert BarcodeCache(cache_dir=str(tmp_path)).get(key) == b"image"
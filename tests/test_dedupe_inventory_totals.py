@@ -0,0 +1,27 @@
+def test_duplicates_are_merged_into_the_oldest_row(mongo):
+    from database import get_database
+    from scripts.dedupe_inventory_totals import dedupe
+
+    async def body():
+        # A collection without the unique index, as in a database that predates it
+        collection = get_database()["dedupe_inventory_totals_test"]
+        await collection.drop()
+        await collection.insert_many([
+            {"item_name": "Brown Tape", "item_type": "Consumable", "total_quantity": 4, "total_value": 40.0},
+            {"item_name": "Brown Tape", "item_type": "Consumable", "total_quantity": 6, "total_value": 90.0,
+             "reorder_level": 12},
+            {"item_name": "Tissue Box", "item_type": "Consumable", "total_quantity": 3, "total_value": 30.0},
+        ])
+        try:
+            assert await dedupe(collection, dry_run=False) == 1
+            rows = {doc["item_name"]: doc async for doc in collection.find({})}
+        finally:
+            await collection.drop()
+
+        assert len(rows) == 2
+        tape = rows["Brown Tape"]
+        assert (tape["total_quantity"], tape["total_value"], tape["reorder_level"]) == (10, 130.0, 12)
+        assert tape["average_cost"] == 13.0
+        assert tape["low_stock"] is True
+
+    mongo(body)
@@ -0,0 +1,35 @@
+import os
+import tracemalloc
+
+EXPORT_REQUESTS = int(os.getenv("TEST_EXPORT_REQUESTS", 100_000))
+# Peak measured once the first batches have gone through
+WARMUP_RECORDS = 10_000
+
+
+def test_export_memory_stays_flat(mongo):
+    from benchmarks.lifecycle import seed_history
+    from models.enums import ExportFormatEnum
+    from utils.catalogue import DEFAULT_CONSUMABLE_ITEMS
+    from utils.export import stream_requests
+
+    async def body():
+        await seed_history(EXPORT_REQUESTS, DEFAULT_CONSUMABLE_ITEMS)
+
+        for export_format in (ExportFormatEnum.NDJSON, ExportFormatEnum.CSV):
+            tracemalloc.start()
+            try:
+                records, warm_peak = 0, None
+                async for chunk in stream_requests(export_format):
+                    records += chunk.count("\n") if export_format == ExportFormatEnum.NDJSON else 1
+                    if warm_peak is None and records >= WARMUP_RECORDS:
+                        warm_peak = tracemalloc.get_traced_memory()[1]
+                final_peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+            if export_format == ExportFormatEnum.NDJSON:
+                assert records == EXPORT_REQUESTS
+            # Ten times the rows must not need noticeably more memory
+            assert final_peak <= warm_peak * 1.25 + 1024 * 1024, (export_format, warm_peak, final_peak)
+
+    mongo(body)
@@ -0,0 +1,84 @@
+import asyncio
+from collections import Counter
+from tests.helpers import api_client, create_stock, issue, mediator_approved_request
+
+REQUESTS = 20
+CALLS_PER_REQUEST = 10
+QTY = 5
+STOCK = 50  # enough for half the requests
+
+
+def test_concurrent_final_approvals_never_double_issue(mongo):
+    from bson import ObjectId
+    from models.inventory import Request, ReqIssue
+    from models.stock import InventoryItemTotal
+
+    async def body():
+        async with api_client() as client:
+            await create_stock(client, {"Brown Tape": STOCK})
+            request_ids = [await mediator_approved_request(client, {"Brown Tape": QTY}) for _ in range(REQUESTS)]
+
+            async def approve(request_id):
+                response = await client.post(
+                    f"/central_stock/final_approve_request/{request_id}", json=issue({"Brown Tape": QTY})
+                )
+                return request_id, response.status_code
+
+            calls = [request_id for request_id in request_ids for _ in range(CALLS_PER_REQUEST)]
+            outcomes = await asyncio.gather(*(approve(request_id) for request_id in calls))
+
+        approvals = Counter(request_id for request_id, code in outcomes if code == 200)
+        assert all(count == 1 for count in approvals.values())
+        assert {code for _, code in outcomes} <= {200, 400}
+        assert len(approvals) == STOCK // QTY
+
+        total = await InventoryItemTotal.get_motor_collection().find_one({"item_name": "Brown Tape"})
+        assert total["total_quantity"] == STOCK - QTY * len(approvals)
+        assert await ReqIssue.get_motor_collection().count_documents({}) == len(approvals)
+
+        statuses = {
+            str(doc["_id"]): doc["status"]
+            async for doc in Request.get_motor_collection().find(
+                {"_id": {"$in": [ObjectId(i) for i in request_ids]}}, {"status": 1}
+            )
+        }
+        # Requests that could not be covered went back to waiting for final approval
+        assert {i for i, s in statuses.items() if s == "Approved"} == set(approvals)
+        assert {s for i, s in statuses.items() if i not in approvals} == {"Mediator Approved"}
+
+    mongo(body)
+
+
+def test_write_after_the_claim_is_not_overwritten(mongo, monkeypatch):
+    from bson import ObjectId
+    from models.inventory import Request, ReqIssue
+    from models.stock import InventoryItemTotal
+    from routers import stock as stock_router
+
+    async def body():
+        async with api_client() as client:
+            await create_stock(client, {"Brown Tape": STOCK})
+            request_id = await mediator_approved_request(client, {"Brown Tape": QTY})
+            reserve_items = stock_router.reserve_items
+
+            async def reserve_then_reject(lines):
+                await reserve_items(lines)
+                # Another writer moves the request on while its stock is being taken
+                await Request.get_motor_collection().update_one(
+                    {"_id": ObjectId(request_id)}, {"$set": {"status": "Rejected", "reason": "Elsewhere"}}
+                )
+            monkeypatch.setattr(stock_router, "reserve_items", reserve_then_reject)
+
+            response = await client.post(
+                f"/central_stock/final_approve_request/{request_id}", json=issue({"Brown Tape": QTY})
+            )
+        assert response.status_code == 409, response.text
+
+        doc = await Request.get_motor_collection().find_one({"_id": ObjectId(request_id)})
+        assert (doc["status"], doc["reason"]) == ("Rejected", "Elsewhere")
+        assert not doc.get("issued") and not doc.get("embedded_issued")
+        total = await InventoryItemTotal.get_motor_collection().find_one({"item_name": "Brown Tape"})
+        assert total["total_quantity"] == STOCK
+        assert await ReqIssue.get_motor_collection().count_documents({}) == 0
+
+    mongo(body)
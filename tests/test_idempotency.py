@@ -0,0 +1,159 @@
+import asyncio
+import pytest
+
+KEY = {"Idempotency-Key": "key-1"}
+
+
+class Handlers:
+    """
+    A small app behind IdempotencyMiddleware counting how often each handler
+    runs. `/slow` waits until `release` is set.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    def app(self):
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse
+        from starlette.routing import Route
+        from utils.idempotency import IdempotencyMiddleware
+
+        def counted(name, handler):
+            async def endpoint(request):
+                self.calls[name] = self.calls.get(name, 0) + 1
+                return await handler(request)
+            return Route(f"/{name}", endpoint, methods=["POST"])
+
+        async def ok(request):
+            return JSONResponse({"call": self.calls["ok"], "body": (await request.body()).decode()})
+
+        async def fail(request):
+            return JSONResponse({"detail": "failed"}, status_code=500)
+
+        async def boom(request):
+            raise RuntimeError("boom")
+
+        async def slow(request):
+            self.started.set()
+            await self.release.wait()
+            return JSONResponse({"call": self.calls["slow"]})
+
+        return IdempotencyMiddleware(Starlette(routes=[
+            counted("ok", ok), counted("fail", fail), counted("boom", boom), counted("slow", slow),
+        ]))
+
+    def client(self):
+        import httpx
+        transport = httpx.ASGITransport(app=self.app(), raise_app_exceptions=False)
+        return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+def test_completed_response_is_replayed(mongo):
+    async def body():
+        handlers = Handlers()
+        async with handlers.client() as client:
+            first = await client.post("/ok", content=b"payload", headers=KEY)
+            second = await client.post("/ok", content=b"payload", headers=KEY)
+            other_key = await client.post("/ok", content=b"payload", headers={"Idempotency-Key": "key-2"})
+        assert handlers.calls["ok"] == 2
+        assert first.json() == second.json() == {"call": 1, "body": "payload"}
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert second.headers["content-type"] == first.headers["content-type"]
+        assert other_key.json()["call"] == 2
+
+    mongo(body)
+
+
+def test_retry_while_in_progress_gets_409(mongo):
+    async def body():
+        handlers = Handlers()
+        async with handlers.client() as client:
+            original = asyncio.create_task(client.post("/slow", headers=KEY))
+            await asyncio.wait_for(handlers.started.wait(), timeout=5)
+            retry = await client.post("/slow", headers=KEY)
+            handlers.release.set()
+            original = await original
+        assert retry.status_code == 409
+        assert original.status_code == 200
+        assert handlers.calls["slow"] == 1
+
+    mongo(body)
+
+
+def test_different_body_gets_422(mongo):
+    async def body():
+        handlers = Handlers()
+        async with handlers.client() as client:
+            await client.post("/ok", content=b"one", headers=KEY)
+            response = await client.post("/ok", content=b"two", headers=KEY)
+        assert response.status_code == 422
+        assert handlers.calls["ok"] == 1
+
+    mongo(body)
+
+
+@pytest.mark.parametrize("path", ["/fail", "/boom"])
+def test_failed_request_releases_the_key(mongo, path):
+    from models.idempotency import IdempotencyRecord
+
+    async def body():
+        handlers = Handlers()
+        async with handlers.client() as client:
+            first = await client.post(path, headers=KEY)
+            assert await IdempotencyRecord.get_motor_collection().count_documents({}) == 0
+            second = await client.post(path, headers=KEY)
+        assert first.status_code == second.status_code == 500
+        assert handlers.calls[path.lstrip("/")] == 2
+
+    mongo(body)
+
+
+def test_claim_of_a_crashed_worker_is_taken_over(mongo):
+    from datetime import datetime, timedelta, timezone
+    import hashlib
+    from models.idempotency import IdempotencyRecord
+    from utils.idempotency import IDEMPOTENCY_PENDING_TIMEOUT_SECONDS
+
+    async def body():
+        long_ago = datetime.now(timezone.utc) - timedelta(seconds=IDEMPOTENCY_PENDING_TIMEOUT_SECONDS + 1)
+        await IdempotencyRecord.get_motor_collection().insert_one({
+            "key": "key-1", "method": "POST", "path": "/ok", "fingerprint": hashlib.sha256(b"").hexdigest(),
+            "completed": False, "owner": "crashed", "heartbeat_at": long_ago, "created_at": long_ago,
+        })
+        handlers = Handlers()
+        async with handlers.client() as client:
+            response = await client.post("/ok", headers=KEY)
+            replayed = await client.post("/ok", headers=KEY)
+        assert response.status_code == 200
+        assert replayed.headers["Idempotent-Replayed"] == "true"
+        assert handlers.calls["ok"] == 1
+
+    mongo(body)
+
+
+def test_slow_original_keeps_its_claim(mongo, monkeypatch):
+    from utils import idempotency
+
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_PENDING_TIMEOUT_SECONDS", 0.3)
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_HEARTBEAT_SECONDS", 0.05)
+
+    async def body():
+        handlers = Handlers()
+        async with handlers.client() as client:
+            original = asyncio.create_task(client.post("/slow", headers=KEY))
+            await asyncio.wait_for(handlers.started.wait(), timeout=5)
+            # Well past the timeout, but the original is still refreshing its claim
+            await asyncio.sleep(1)
+            retry = await client.post("/slow", headers=KEY)
+            handlers.release.set()
+            original = await original
+            replayed = await client.post("/slow", headers=KEY)
+        assert retry.status_code == 409
+        assert original.status_code == 200
+        assert replayed.json() == {"call": 1}
+        assert handlers.calls["slow"] == 1
+
+    mongo(body)
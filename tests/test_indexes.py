@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+import pytest
+
+CAMPUS = "Okhla-1"
+KEYSET = [("date_of_request", 1), ("_id", 1)]
+
+
+def _stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _stages(value)
+
+
+def hot_queries():
+    """
+    (name, model name, filter, sort) for the queries the routers run on every call.
+    """
+    from bson import ObjectId
+    since = datetime(2024, 1, 1)
+    return [
+        ("inventory total by item", "InventoryItemTotal", {"item_name": "Brown Tape", "item_type": "Consumable"}, None),
+        ("low stock", "InventoryItemTotal", {"low_stock": True}, [("item_name", 1)]),
+        ("history by campus", "Request", {"campus_name": CAMPUS}, KEYSET),
+        ("listing by status", "Request", {"status": "Pending"}, KEYSET),
+        ("listing by status after cursor", "Request", {
+            "status": "Approved",
+            "$or": [{"date_of_request": {"$gt": since}},
+                    {"date_of_request": since, "_id": {"$gt": ObjectId()}}],
+        }, KEYSET),
+        ("all requests", "Request", {}, KEYSET),
+        ("consumption by approval period", "Request", {
+            "status": "Approved", "date_of_approval": {"$gte": since, "$lt": since + timedelta(days=365)}
+        }, None),
+        ("stock by vendor", "Stock", {"vendor_name": "Test Vendor"}, None),
+    ]
+
+
+QUERY_NAMES = [
+    "inventory total by item", "low stock", "history by campus", "listing by status",
+    "listing by status after cursor", "all requests", "consumption by approval period", "stock by vendor",
+]
+
+
+@pytest.mark.parametrize("name", QUERY_NAMES)
+def test_hot_query_uses_an_index(mongo, name):
+    import database
+
+    async def body():
+        model = next(m for m in database.DOCUMENT_MODELS if m.__name__ == model_name)
+        cursor = model.get_motor_collection().find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.limit(50).explain()
+        stages = set(_stages(explain["queryPlanner"]["winningPlan"]))
+        assert "COLLSCAN" not in stages, (name, stages)
+        assert "IXSCAN" in stages, (name, stages)
+
+    _, model_name, query, sort = next(q for q in hot_queries() if q[0] == name)
+    mongo(body)
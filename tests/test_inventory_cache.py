@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+
+pytest.importorskip("beanie")
+
+
+class FailingCollection:
+    """
+    Stands in for the totals collection: `watch` raises the given errors in
+    turn, then blocks like an idle change stream.
+    """
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.opened = 0
+        self.idle = asyncio.Event()
+
+    def watch(self, **kwargs):
+        self.opened += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self.idle.set()
+        await asyncio.Event().wait()
+
+
+def _watch_with(monkeypatch, errors):
+    from models.stock import InventoryItemTotal
+    from utils import inventory_cache as module
+
+    collection = FailingCollection(errors)
+    cache = module.InventoryTotalsCache()
+    monkeypatch.setattr(InventoryItemTotal, "get_motor_collection", classmethod(lambda cls: collection))
+    monkeypatch.setattr(module, "INVENTORY_CACHE_RETRY_SECONDS", 0)
+    monkeypatch.setattr(module, "INVENTORY_CACHE_POLL_SECONDS", 3600)
+
+    async def warm():
+        cache.warmed = True
+    monkeypatch.setattr(cache, "warm", warm)
+    return cache, collection
+
+
+def test_transient_failures_reopen_the_change_stream(monkeypatch):
+    from pymongo.errors import OperationFailure, NotPrimaryError
+    cache, collection = _watch_with(monkeypatch, [
+        OperationFailure("not authorized", code=13),
+        OperationFailure("resume token not found", code=280),
+        NotPrimaryError("stepdown"),
+    ])
+
+    async def body():
+        task = asyncio.create_task(cache._watch())
+        await asyncio.wait_for(collection.idle.wait(), timeout=5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(body())
+    assert collection.opened == 4
+    assert cache.mode == "change_stream"
+
+
+def test_standalone_server_falls_back_to_polling(monkeypatch):
+    from pymongo.errors import OperationFailure
+    from utils.inventory_cache import CHANGE_STREAMS_UNSUPPORTED
+    cache, collection = _watch_with(monkeypatch, [
+        OperationFailure("The $changeStream stage is only supported on replica sets", code=CHANGE_STREAMS_UNSUPPORTED),
+    ])
+
+    async def body():
+        task = asyncio.create_task(cache._watch())
+        for _ in range(100):
+            if cache.mode == "polling":
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(body())
+    assert collection.opened == 1
+    assert cache.mode == "polling"
+
+
+def test_new_version_reloads_even_with_a_live_change_stream(monkeypatch):
+    from utils.inventory_cache import InventoryTotalsCache
+    cache = InventoryTotalsCache()
+    reloads = []
+
+    async def warm():
+        reloads.append(cache.mode)
+        cache.warmed = True
+    monkeypatch.setattr(cache, "warm", warm)
+
+    async def body():
+        cache.mode = "change_stream"
+        await cache.all_at_version(1)
+        await cache.all_at_version(1)
+        await cache.all_at_version(2)
+        cache.mode = "polling"
+        await cache.all_at_version(3)
+
+    asyncio.run(body())
+    # Every stamp change reloads, whatever keeps the rows current in between
+    assert reloads == ["change_stream", "change_stream", "polling"]
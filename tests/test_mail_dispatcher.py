@@ -0,0 +1,101 @@
+from datetime import timedelta
+import asyncio
+import socket
+import pytest
+
+
+class Sink:
+    """
+    aiosmtpd handler keeping every message it accepts.
+    """
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    pytest.importorskip("fastapi_mail")
+    from utils.mail import conf
+
+    sink = Sink()
+    controller = controller_module.Controller(sink, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    for name, value in {
+        "MAIL_SERVER": "127.0.0.1", "MAIL_PORT": controller.port, "MAIL_STARTTLS": False,
+        "MAIL_SSL_TLS": False, "USE_CREDENTIALS": False,
+    }.items():
+        monkeypatch.setattr(conf, name, value)
+    try:
+        yield sink
+    finally:
+        controller.stop()
+
+
+async def _wait_until_sent(count: int) -> None:
+    from models.enums import MailStatusEnum
+    from models.mail import MailOutbox
+    collection = MailOutbox.get_motor_collection()
+    for _ in range(200):
+        if await collection.count_documents({"status": MailStatusEnum.Sent.value}) >= count:
+            return
+        await asyncio.sleep(0.05)
+    raise AssertionError("mail was not delivered in time")
+
+
+def test_outbox_is_delivered_over_smtp(mongo, smtp_server):
+    from utils.mail_dispatcher import MailDispatcher, enqueue_mail
+
+    async def body():
+        dispatcher = MailDispatcher(workers=2, batch_size=3)
+        await dispatcher.start()
+        try:
+            for n in range(7):
+                await enqueue_mail(f"Message {n}", [f"user{n}@example.com"], f"<p>{n}</p>")
+            dispatcher.notify()
+            await _wait_until_sent(7)
+        finally:
+            await dispatcher.stop()
+
+    mongo(body)
+    assert sorted(message.rcpt_tos[0] for message in smtp_server.messages) == sorted(
+        f"user{n}@example.com" for n in range(7)
+    )
+    assert all(b"Subject: Message" in message.original_content for message in smtp_server.messages)
+
+
+def test_stale_claims_are_requeued_while_running(mongo, smtp_server, monkeypatch):
+    from models.enums import MailStatusEnum
+    from models.mail import MailOutbox, utcnow
+    from utils import mail_dispatcher as module
+
+    monkeypatch.setattr(module, "MAIL_CLAIM_TIMEOUT_SECONDS", 1)
+    monkeypatch.setattr(module, "MAIL_REQUEUE_INTERVAL_SECONDS", 0.1)
+    monkeypatch.setattr(module, "MAIL_POLL_INTERVAL_SECONDS", 0.1)
+
+    async def body():
+        dispatcher = module.MailDispatcher(workers=1)
+        await dispatcher.start()
+        try:
+            # Claimed by a worker that died after the dispatcher started
+            await MailOutbox(
+                subject="Orphaned", recipients=["orphan@example.com"], body="<p>orphan</p>",
+                status=MailStatusEnum.Sending, claimed_at=utcnow() - timedelta(seconds=5)
+            ).insert()
+            await _wait_until_sent(1)
+        finally:
+            await dispatcher.stop()
+
+    mongo(body)
+    assert [message.rcpt_tos for message in smtp_server.messages] == [["orphan@example.com"]]
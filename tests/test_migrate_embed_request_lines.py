@@ -0,0 +1,39 @@
+from tests.helpers import CAMPUS, api_client, create_stock, issue, mediator_approved_request
+
+LINES = {"Brown Tape": 2, "Stapler Small": 1}
+
+
+async def _approve_and_read(client, request_id: str):
+    from bson import ObjectId
+    from utils.queries import find_request_with_links
+    response = await client.post(f"/central_stock/final_approve_request/{request_id}", json=issue(LINES))
+    assert response.status_code == 200, response.text
+    doc = await find_request_with_links(ObjectId(request_id))
+    listed = await client.get(f"/inventory/get_request_with_items_status/{request_id}/{CAMPUS}")
+    return doc, listed.json()
+
+
+def test_request_migrated_before_approval_keeps_issued_rows(mongo):
+    from bson import ObjectId
+    from models.inventory import Request
+    from scripts.migrate_embed_request_lines import migrate
+
+    async def body():
+        async with api_client() as client:
+            await create_stock(client, {name: 10 for name in LINES})
+            request_id = await mediator_approved_request(client, LINES)
+
+            assert await migrate(batch_size=10, drop_links=False) == 1
+            raw = await Request.get_motor_collection().find_one({"_id": ObjectId(request_id)})
+            assert len(raw["embedded_items"]) == 2
+            assert "embedded_issued" not in raw
+
+            doc, listed = await _approve_and_read(client, request_id)
+            raw = await Request.get_motor_collection().find_one({"_id": ObjectId(request_id)})
+        # The approval left the migrated line items in place
+        assert len(raw["embedded_items"]) == 2
+        assert {(row["item_name"], row["qty"]) for row in doc["issued"]} == set(LINES.items())
+        assert {(row["item_name"], row["qty"]) for row in listed["issued"]} == set(LINES.items())
+
+    mongo(body)
+
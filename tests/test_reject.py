@@ -0,0 +1,58 @@
+from tests.helpers import CAMPUS, api_client, create_stock, issue, mediator_approved_request
+
+LINES = {"Brown Tape": 2}
+
+
+def test_approved_request_cannot_be_rejected(mongo):
+    from models.inventory import ReqIssue
+    from models.stock import InventoryItemTotal
+
+    async def body():
+        async with api_client() as client:
+            await create_stock(client, {"Brown Tape": 10})
+            request_id = await mediator_approved_request(client, LINES)
+            response = await client.post(f"/central_stock/final_approve_request/{request_id}", json=issue(LINES))
+            assert response.status_code == 200, response.text
+
+            response = await client.post(f"/central_stock/reject_request/{request_id}/Too late")
+            assert response.status_code == 400, response.text
+            assert response.json()["detail"] == "Request has already been 'Approved' and cannot be rejected"
+
+            listed = await client.get(f"/inventory/get_request_with_items_status/{request_id}/{CAMPUS}")
+        assert listed.json()["status"] == "Approved"
+        total = await InventoryItemTotal.get_motor_collection().find_one({"item_name": "Brown Tape"})
+        assert total["total_quantity"] == 8
+        assert await ReqIssue.get_motor_collection().count_documents({}) == 1
+
+    mongo(body)
+
+
+def test_reject_reports_missing_requests_as_not_found(mongo):
+    async def body():
+        async with api_client() as client:
+            assert (await client.post("/central_stock/reject_request/not-an-id/Reason")).status_code == 404
+            response = await client.post("/central_stock/reject_request/0123456789abcdef01234567/Reason")
+        assert response.status_code == 404, response.text
+
+    mongo(body)
+
+
+def test_reject_bumps_the_revision_and_keeps_the_lines(mongo):
+    from bson import ObjectId
+    from models.inventory import Request
+
+    async def body():
+        async with api_client() as client:
+            request_id = await mediator_approved_request(client, LINES)
+            before = await Request.get_motor_collection().find_one({"_id": ObjectId(request_id)})
+            response = await client.post(f"/central_stock/reject_request/{request_id}/Out of budget")
+        assert response.status_code == 200, response.text
+        assert response.json()["status"] == "Rejected"
+        assert [(i["item_name"], i["qty"]) for i in response.json()["items"]] == [("Brown Tape", 2)]
+
+        after = await Request.get_motor_collection().find_one({"_id": ObjectId(request_id)})
+        assert (after["status"], after["reason"]) == ("Rejected", "Out of budget")
+        assert after["revision"] == before["revision"] + 1
+        assert after["items"] == before["items"]
+
+    mongo(body)
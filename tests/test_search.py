@@ -0,0 +1,27 @@
+from tests.helpers import api_client, create_stock
+
+
+def test_prefix_search_is_case_insensitive_and_index_bounded(mongo):
+    from database import get_database
+    from models.stock import Item
+    from models.enums import SearchScopeEnum
+    from utils.search import search
+
+    async def body():
+        async with api_client() as client:
+            await create_stock(client, {"Brown Tape": 5, "Stapler Small": 5, "Stapler Heavy Duty": 5})
+        # The partial word comes from the prefix match, whatever its case or spacing,
+        # and ranks that item above the text match on "stapler" alone
+        page = await search("  STAPLER   s", scopes=[SearchScopeEnum.Items])
+        assert [hit.title for hit in page.hits] == ["Stapler Small", "Stapler Heavy Duty"]
+
+        explain = await get_database().command({
+            "explain": {"find": Item.get_motor_collection().name, "filter": {"search_key": {"$regex": "^stapler s"}}},
+            "verbosity": "executionStats",
+        })
+        stats = explain["executionStats"]
+        assert stats["nReturned"] == 1
+        # A bounded scan reads the matching key (plus the one ending the range), not the whole index
+        assert stats["totalKeysExamined"] <= 2
+
+    mongo(body)
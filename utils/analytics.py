@@ -0,0 +1,203 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, timezone
+from pymongo import UpdateOne
+from models.analytics import ConsumptionRow, ConsumptionSummary
+from models.enums import PeriodEnum, StatusEnum
+from models.inventory import Request, ReqIssue
+from utils.queries import inline_or_linked
+
+PERIOD_FORMATS = {
+    PeriodEnum.Month: "%Y-%m",
+    PeriodEnum.Year: "%Y",
+}
+
+MAX_REPORT_PERIODS = 240
+
+Period = Tuple[str, datetime, datetime]
+
+
+def _period_start(day: date, granularity: PeriodEnum) -> date:
+    if granularity == PeriodEnum.Year:
+        return date(day.year, 1, 1)
+    return date(day.year, day.month, 1)
+
+
+def _next_period(start: date, granularity: PeriodEnum) -> date:
+    if granularity == PeriodEnum.Year:
+        return date(start.year + 1, 1, 1)
+    if start.month == 12:
+        return date(start.year + 1, 1, 1)
+    return date(start.year, start.month + 1, 1)
+
+
+def _as_datetime(day: date) -> datetime:
+    # Beanie stores `date` fields as midnight datetimes
+    return datetime(day.year, day.month, day.day)
+
+
+def periods_between(start: date, end: date, granularity: PeriodEnum) -> List[Period]:
+    """
+    Whole periods covering [start, end], as (label, start, end-exclusive).
+    """
+    periods = []
+    current = _period_start(start, granularity)
+    while current <= end:
+        following = _next_period(current, granularity)
+        periods.append((
+            current.strftime(PERIOD_FORMATS[granularity]),
+            _as_datetime(current),
+            _as_datetime(following),
+        ))
+        current = following
+    return periods
+
+
+def consumption_pipeline(
+    periods: List[Period],
+    granularity: PeriodEnum,
+    campus_name: Optional[str] = None,
+    item_name: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    # Periods are contiguous and ordered, so one range covers them all
+    match: Dict[str, Any] = {
+        "status": StatusEnum.Approved.value,
+        "date_of_approval": {"$gte": periods[0][1], "$lt": periods[-1][2]},
+    }
+    if campus_name:
+        match["campus_name"] = campus_name
+
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": match},
+        {"$project": {"campus_name": 1, "date_of_approval": 1, "issued": 1, "embedded_issued": 1}},
+        {
+            "$lookup": {
+                "from": ReqIssue.get_motor_collection().name,
+                "localField": "issued.$id",
+                "foreignField": "_id",
+                "as": "issued",
+            }
+        },
+        {"$addFields": {"issued": inline_or_linked("embedded_issued", "issued")}},
+        {"$unwind": "$issued"},
+    ]
+    if item_name:
+        pipeline.append({"$match": {"issued.item_name": item_name}})
+    pipeline.extend([
+        {
+            "$group": {
+                "_id": {
+                    "campus_name": "$campus_name",
+                    "item_name": "$issued.item_name",
+                    "item_type": "$issued.Item_Type",
+                    "period": {"$dateToString": {"format": PERIOD_FORMATS[granularity], "date": "$date_of_approval"}},
+                },
+                "total_qty": {"$sum": "$issued.qty"},
+                "requests": {"$addToSet": "$_id"},
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "campus_name": "$_id.campus_name",
+                "item_name": "$_id.item_name",
+                "item_type": "$_id.item_type",
+                "period": "$_id.period",
+                "total_qty": 1,
+                "request_count": {"$size": "$requests"},
+            }
+        },
+    ])
+    return pipeline
+
+
+async def _aggregate(periods: List[Period], granularity: PeriodEnum, **filters: Optional[str]) -> List[ConsumptionRow]:
+    if not periods:
+        return []
+    docs = await Request.aggregate(consumption_pipeline(periods, granularity, **filters)).to_list()
+    return [ConsumptionRow(**doc) for doc in docs]
+
+
+async def _closed_period_rows(periods: List[Period], granularity: PeriodEnum, rebuild: bool = False) -> List[ConsumptionRow]:
+    """
+    Rows for closed periods, read from the summary collection. Periods not
+    materialized yet are aggregated once (unfiltered) and stored; with
+    `rebuild`, every period is aggregated again and its summary replaced.
+    """
+    labels = [label for label, _, _ in periods]
+    summaries = [] if rebuild else await ConsumptionSummary.find(
+        {"granularity": granularity.value, "period": {"$in": labels}}
+    ).to_list()
+    rows = [row for summary in summaries for row in summary.rows]
+
+    stored = {summary.period for summary in summaries}
+    missing = [p for p in periods if p[0] not in stored]
+    if missing:
+        by_period: Dict[str, List[ConsumptionRow]] = {label: [] for label, _, _ in missing}
+        # One range from the first to the last missing period; rows of stored
+        # periods in between are dropped rather than counted twice
+        for row in await _aggregate(missing, granularity):
+            if row.period in by_period:
+                by_period[row.period].append(row)
+        # Upsert so concurrent reports materializing the same period don't
+        # collide; only a rebuild overwrites a summary that already exists
+        write = "$set" if rebuild else "$setOnInsert"
+        await ConsumptionSummary.get_motor_collection().bulk_write([
+            UpdateOne(
+                {"granularity": granularity.value, "period": label},
+                {write: {
+                    "rows": [row.model_dump() for row in period_rows],
+                    "computed_at": datetime.now(timezone.utc),
+                }},
+                upsert=True
+            )
+            for label, period_rows in by_period.items()
+        ], ordered=False)
+        rows.extend(row for period_rows in by_period.values() for row in period_rows)
+    return rows
+
+
+def _split_periods(start: date, end: date, granularity: PeriodEnum) -> Tuple[List[Period], List[Period]]:
+    """
+    Periods overlapping [start, end], split into closed ones and the current one.
+    """
+    periods = periods_between(start, end, granularity)
+    if len(periods) > MAX_REPORT_PERIODS:
+        raise ValueError(f"Report range spans more than {MAX_REPORT_PERIODS} periods")
+    current_start = _as_datetime(_period_start(date.today(), granularity))
+    return [p for p in periods if p[2] <= current_start], [p for p in periods if p[2] > current_start]
+
+
+async def rebuild_summaries(start: date, end: date, granularity: PeriodEnum = PeriodEnum.Month) -> int:
+    """
+    Re-aggregate the stored summaries of the closed periods overlapping
+    [start, end] from the request history, e.g. after correcting source data.
+    Returns the number of periods rebuilt.
+    """
+    closed, _ = _split_periods(start, end, granularity)
+    await _closed_period_rows(closed, granularity, rebuild=True)
+    return len(closed)
+
+
+async def consumption_report(
+    start: date,
+    end: date,
+    granularity: PeriodEnum = PeriodEnum.Month,
+    campus_name: Optional[str] = None,
+    item_name: Optional[str] = None,
+) -> List[ConsumptionRow]:
+    """
+    Issued quantity per campus, item and period for every period overlapping
+    [start, end]. Closed periods come from `ConsumptionSummary`; only the
+    current period is aggregated from the request history on each call.
+    """
+    closed, open_periods = _split_periods(start, end, granularity)
+
+    rows = await _closed_period_rows(closed, granularity)
+    if campus_name:
+        rows = [row for row in rows if row.campus_name == campus_name]
+    if item_name:
+        rows = [row for row in rows if row.item_name == item_name]
+    rows.extend(await _aggregate(open_periods, granularity, campus_name=campus_name, item_name=item_name))
+
+    rows.sort(key=lambda row: (row.period, row.campus_name, row.item_name))
+    return rows
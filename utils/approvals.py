@@ -0,0 +1,283 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, time
+from bson import DBRef, ObjectId
+from models.enums import StatusEnum
+from models.inventory import Request, ReqIssue, BatchApprovalItem, BatchApprovalResult
+from models.stock import InventoryItemTotal
+from utils.http_cache import requests_changed, with_revision
+from utils.catalogue import item_catalogue, UnknownItemError
+from utils.mail_dispatcher import enqueue_many
+from utils.queries import EMBEDDED_STORAGE
+from utils.stock_totals import StockError, StockLines, merge_lines, release_items, reserve_items
+from utils.templates import render_request_approved
+from utils.transitions import FINAL_APPROVE_FROM, issued_fields
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 200
+
+REQUEST_FIELDS = {
+    "status": 1, "semi_approved": 1, "mediator_approved": 1, "employee_id": 1,
+    "your_mail_id": 1, "campus_name": 1,
+}
+
+
+def _ineligible_reason(doc: Optional[Dict[str, Any]]) -> Optional[str]:
+    if doc is None:
+        return "Request not found"
+    if not doc.get("semi_approved") or not doc.get("mediator_approved"):
+        return "Request must be semi and mediator approved first"
+    if doc.get("status") == StatusEnum.Approved.value:
+        return "Request has already been approved"
+    return None
+
+
+def _allocate(
+    candidates: List[Tuple[ObjectId, StockLines]],
+    available: Dict[Tuple[str, str], int],
+    failures: Dict[ObjectId, str],
+) -> List[Tuple[ObjectId, StockLines]]:
+    """
+    Decide, in submission order, which requests the prefetched totals can
+    satisfy; requests that would overdraw an item fail without touching stock.
+    """
+    accepted = []
+    for request_id, lines in candidates:
+        missing = next((name for (name, item_type) in lines if (name, item_type) not in available), None)
+        if missing:
+            failures[request_id] = f"No inventory found for item: {missing}"
+            continue
+        short = next((name for (name, item_type), qty in lines.items() if available[(name, item_type)] < qty), None)
+        if short:
+            failures[request_id] = f"Insufficient quantity for item: {short}"
+            continue
+        for key, qty in lines.items():
+            available[key] -= qty
+        accepted.append((request_id, lines))
+    return accepted
+
+
+async def _reserve_totals(
+    accepted: List[Tuple[ObjectId, StockLines]],
+    failures: Dict[ObjectId, str],
+) -> List[Tuple[ObjectId, StockLines]]:
+    """
+    Take the combined quantity of every item in one conditional update per
+    item, all in flight at once. If stock moved since the prefetch and an item
+    can no longer be covered, the requests needing it fail and whatever was
+    taken for them on other items is returned in one bulk write.
+    """
+    needed: StockLines = {}
+    for _, lines in accepted:
+        for key, qty in lines.items():
+            needed[key] = needed.get(key, 0) + qty
+
+    keys = list(needed)
+    outcomes = await asyncio.gather(
+        *(reserve_items({key: needed[key]}) for key in keys), return_exceptions=True
+    )
+    failed_items = {}
+    for key, outcome in zip(keys, outcomes):
+        if isinstance(outcome, StockError):
+            failed_items[key] = str(outcome)
+        elif isinstance(outcome, Exception):
+            failed_items[key] = f"Error reserving stock for item: {key[0]}"
+            logger.error(f"Failed to reserve {key}: {outcome}")
+
+    if not failed_items:
+        return accepted
+
+    reserved = []
+    to_release: StockLines = {}
+    for request_id, lines in accepted:
+        failed_key = next((key for key in lines if key in failed_items), None)
+        if failed_key is None:
+            reserved.append((request_id, lines))
+            continue
+        failures[request_id] = failed_items[failed_key]
+        for key, qty in lines.items():
+            if key not in failed_items:
+                to_release[key] = to_release.get(key, 0) + qty
+    await release_items(to_release)
+    return reserved
+
+
+async def _mark_approved(
+    request_id: ObjectId,
+    rows: List[Dict[str, Any]],
+    issue_docs: Optional[List[ReqIssue]],
+    approved_on: datetime,
+) -> bool:
+    """
+    Approve one request if it is still eligible; False if a concurrent call got there first.
+    """
+    result = await Request.get_motor_collection().update_one(
+        {"_id": request_id, **FINAL_APPROVE_FROM},
+        with_revision({"$set": {"status": StatusEnum.Approved.value, "date_of_approval": approved_on,
+                                **issued_fields(rows, [doc.id for doc in issue_docs or []])}})
+    )
+    return result.matched_count == 1
+
+
+async def _undo(
+    requests: List[Tuple[ObjectId, StockLines]],
+    issue_docs: Dict[ObjectId, List[ReqIssue]],
+) -> None:
+    """
+    Return the stock taken for requests that did not get approved and delete their issue rows.
+    """
+    await release_items(merge_lines(
+        key + (qty,) for _, lines in requests for key, qty in lines.items()
+    ))
+    issue_ids = [doc.id for request_id, _ in requests for doc in issue_docs.get(request_id, [])]
+    if issue_ids:
+        await ReqIssue.get_motor_collection().delete_many({"_id": {"$in": issue_ids}})
+
+
+async def approve_batch(batch: List[BatchApprovalItem]) -> List[BatchApprovalResult]:
+    """
+    Final-approve many requests at once: prefetch the requests and inventory
+    totals in one query each, decrement stock per item, insert all issue rows
+    with one insert_many, mark each request approved with a conditional
+    update (all in flight at once) and queue all notifications with one
+    insert. Each request succeeds or fails on its own; one approved
+    concurrently elsewhere fails here and its stock and issue rows are returned.
+    """
+    failures: Dict[ObjectId, str] = {}
+    results_order: List[Tuple[str, Optional[ObjectId]]] = []
+    issues_by_id: Dict[ObjectId, BatchApprovalItem] = {}
+    invalid: Dict[str, str] = {}
+
+    for entry in batch:
+        if not ObjectId.is_valid(entry.request_id):
+            invalid[entry.request_id] = "Invalid request ID"
+            results_order.append((entry.request_id, None))
+            continue
+        request_id = ObjectId(entry.request_id)
+        if request_id in issues_by_id:
+            invalid[entry.request_id] = "Request listed more than once in the batch"
+            results_order.append((entry.request_id, None))
+            continue
+        issues_by_id[request_id] = entry
+        results_order.append((entry.request_id, request_id))
+
+    # Prefetch requests and inventory totals
+    docs = await Request.get_motor_collection().find(
+        {"_id": {"$in": list(issues_by_id)}}, REQUEST_FIELDS
+    ).to_list(length=None)
+    requests = {doc["_id"]: doc for doc in docs}
+
+    candidates = []
+    for request_id, entry in issues_by_id.items():
+        reason = _ineligible_reason(requests.get(request_id))
+        if reason:
+            failures[request_id] = reason
+            continue
+        try:
+            for item in entry.issue:
+                item.item_name = item_catalogue.validate(item.item_name, item.Item_Type)
+        except UnknownItemError as e:
+            failures[request_id] = str(e)
+            continue
+        candidates.append((
+            request_id,
+            merge_lines((item.item_name, item.Item_Type, item.qty) for item in entry.issue)
+        ))
+
+    keys = {key for _, lines in candidates for key in lines}
+    totals = await InventoryItemTotal.get_motor_collection().find(
+        {"$or": [{"item_name": name, "item_type": item_type} for name, item_type in keys]},
+        {"item_name": 1, "item_type": 1, "total_quantity": 1}
+    ).to_list(length=None) if keys else []
+    available = {(t["item_name"], t["item_type"]): t["total_quantity"] for t in totals}
+
+    accepted = _allocate(candidates, available, failures)
+    accepted = await _reserve_totals(accepted, failures)
+
+    # Write issue rows and approve the requests
+    approved_on = datetime.combine(date.today(), time())
+    issued_by_request: Dict[ObjectId, List[Dict[str, Any]]] = {}
+    issue_docs: Dict[ObjectId, List[ReqIssue]] = {}
+    for request_id, _ in accepted:
+        request = requests[request_id]
+        rows = [
+            {"item_name": item.item_name, "qty": item.qty, "Item_Type": item.Item_Type.value,
+             "employee_id": request.get("employee_id")}
+            for item in issues_by_id[request_id].issue
+        ]
+        issued_by_request[request_id] = rows
+        if not EMBEDDED_STORAGE:
+            issue_docs[request_id] = [
+                ReqIssue(id=ObjectId(), request=DBRef(Request.get_motor_collection().name, request_id), **row)
+                for row in rows
+            ]
+
+    approved_ids = []
+    # Bumped even if the batch fails part way, since some requests may already be approved
+    try:
+        try:
+            if issue_docs:
+                await ReqIssue.insert_many([doc for docs in issue_docs.values() for doc in docs])
+        except Exception:
+            await _undo(accepted, issue_docs)
+            raise
+
+        outcomes = await asyncio.gather(
+            *(_mark_approved(request_id, issued_by_request[request_id], issue_docs.get(request_id), approved_on)
+              for request_id, _ in accepted),
+            return_exceptions=True
+        )
+        lost = []
+        for (request_id, lines), outcome in zip(accepted, outcomes):
+            if outcome is True:
+                approved_ids.append(request_id)
+                continue
+            if isinstance(outcome, Exception):
+                logger.error(f"Failed to approve request {request_id}: {outcome}")
+                failures[request_id] = "Error approving request"
+            else:
+                # Approved by a concurrent call since the prefetch
+                failures[request_id] = "Request has already been approved"
+            issued_by_request.pop(request_id)
+            lost.append((request_id, lines))
+        if lost:
+            await _undo(lost, issue_docs)
+    finally:
+        await requests_changed()
+
+    # Notifications
+    try:
+        await enqueue_many([
+            {
+                "subject": "Your Request has been Approved",
+                "recipients": [requests[request_id]["your_mail_id"]],
+                "body": render_request_approved(
+                    {
+                        "id": request_id,
+                        "campus_name": requests[request_id]["campus_name"],
+                        "date_of_approval": approved_on.date(),
+                        "employee_id": requests[request_id].get("employee_id"),
+                    },
+                    issued_by_request[request_id]
+                ),
+            }
+            for request_id in approved_ids
+        ])
+    except Exception as e:
+        logger.error(f"Failed to queue approval emails: {e}")
+
+    results = []
+    for raw_id, request_id in results_order:
+        if request_id is None:
+            results.append(BatchApprovalResult(request_id=raw_id, approved=False, detail=invalid[raw_id]))
+        elif request_id in issued_by_request:
+            results.append(BatchApprovalResult(
+                request_id=raw_id,
+                approved=True,
+                issued=[{k: row[k] for k in ("item_name", "qty", "Item_Type")} for row in issued_by_request[request_id]]
+            ))
+        else:
+            results.append(BatchApprovalResult(request_id=raw_id, approved=False, detail=failures[request_id]))
+    return results
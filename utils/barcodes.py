@@ -0,0 +1,205 @@
+from typing import List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from dotenv import load_dotenv
+from models.enums import BarcodeFormatEnum
+from models.indent import Indent
+from utils.metrics import barcode_renders_total
+import asyncio
+import barcode
+import os
+import threading
+
+
+load_dotenv()
+
+BARCODE_WORKERS = int(os.getenv("BARCODE_WORKERS", 4))
+BARCODE_CACHE_SIZE = int(os.getenv("BARCODE_CACHE_SIZE", 256))
+# Optional directory for rendered barcodes that survives restarts
+BARCODE_CACHE_DIR = os.getenv("BARCODE_CACHE_DIR")
+# Entries live in a subdirectory named after the layout of their file names
+# (`<indent_id>.<full|compact>.<format>`); bump it when the cache key changes
+BARCODE_CACHE_LAYOUT = "v1"
+
+MEDIA_TYPES = {
+    BarcodeFormatEnum.PNG: "image/png",
+    BarcodeFormatEnum.SVG: "image/svg+xml",
+}
+
+# Rendering is CPU bound (Pillow for PNG); keep it off the event loop
+_executor = ThreadPoolExecutor(max_workers=BARCODE_WORKERS, thread_name_prefix="barcode")
+
+LABEL_SHEET_COLUMNS = 3
+FULL_PAYLOAD_PREFIX = "Indent ID: "
+
+CacheKey = Tuple[str, str, str]
+
+
+def barcode_payload(indent: Indent, compact: bool = False) -> str:
+    """
+    Text encoded in an indent's barcode. The compact form is just the indent id,
+    which keeps the symbol narrow; scanners resolve it through the scan endpoint.
+    """
+    if compact:
+        return str(indent.id)
+    return (
+        f"Indent ID: {str(indent.id)}, "
+        f"Date of Indent: {indent.date_of_indent}, "
+        f"Item Name: {indent.item_name}, "
+        f"Quantity: {indent.Quantity}, "
+        f"Department: {indent.Department}, "
+        f"Item Type: {indent.Item_Type}"
+    )
+
+
+def render_barcode(data: str, fmt: BarcodeFormatEnum = BarcodeFormatEnum.PNG) -> bytes:
+    """
+    Render `data` as a Code128 barcode. SVG output uses python-barcode's
+    SVGWriter and never touches Pillow.
+    """
+    if fmt == BarcodeFormatEnum.SVG:
+        from barcode.writer import SVGWriter
+        writer = SVGWriter()
+    else:
+        from barcode.writer import ImageWriter
+        writer = ImageWriter()
+    barcode_renders_total.inc(format=fmt.value)
+    barcode_class = barcode.get_barcode_class('code128')
+    img_io = BytesIO()
+    barcode_class(data, writer=writer).write(img_io)
+    return img_io.getvalue()
+
+
+class BarcodeCache:
+    """
+    LRU cache of rendered barcodes in memory, backed by an optional on-disk
+    directory. Indents are never edited, so entries never go stale.
+    """
+
+    def __init__(self, max_entries: int = BARCODE_CACHE_SIZE, cache_dir: Optional[str] = BARCODE_CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = os.path.join(cache_dir, BARCODE_CACHE_LAYOUT) if cache_dir else None
+        self._entries: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key: CacheKey) -> str:
+        indent_id, fmt, mode = key
+        return os.path.join(self.cache_dir, f"{indent_id}.{mode}.{fmt}")
+
+    def peek(self, key: CacheKey) -> Optional[bytes]:
+        """
+        Look the key up in memory only, without touching the disk.
+        """
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+            return content
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        content = self.peek(key)
+        if content is not None:
+            return content
+        if self.cache_dir and os.path.exists(self._path(key)):
+            with open(self._path(key), "rb") as f:
+                content = f.read()
+            self._remember(key, content)
+            return content
+        return None
+
+    def put(self, key: CacheKey, content: bytes) -> None:
+        self._remember(key, content)
+        if self.cache_dir:
+            # Write then rename so a concurrent reader never sees a partial file
+            tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, self._path(key))
+
+    def _remember(self, key: CacheKey, content: bytes) -> None:
+        with self._lock:
+            self._entries[key] = content
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+barcode_cache = BarcodeCache()
+
+
+def _cached_render(key: CacheKey, data: str, fmt: BarcodeFormatEnum) -> bytes:
+    content = barcode_cache.get(key)
+    if content is None:
+        content = render_barcode(data, fmt)
+        barcode_cache.put(key, content)
+    return content
+
+
+def _cache_key(indent: Indent, fmt: BarcodeFormatEnum, compact: bool) -> CacheKey:
+    return (str(indent.id), fmt.value, "compact" if compact else "full")
+
+
+async def get_indent_barcode(
+    indent: Indent,
+    fmt: BarcodeFormatEnum = BarcodeFormatEnum.PNG,
+    compact: bool = False
+) -> bytes:
+    """
+    Return the barcode image for an indent, rendering it on the worker pool
+    on a cache miss.
+    """
+    key = _cache_key(indent, fmt, compact)
+    content = barcode_cache.peek(key)
+    if content is not None:
+        return content
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _cached_render, key, barcode_payload(indent, compact), fmt)
+
+
+def parse_scanned_code(code: str) -> str:
+    """
+    Extract the indent id from a scanned barcode, accepting both the compact
+    form and the older full payload (`Indent ID: <id>, Date of Indent: ...`).
+    """
+    code = code.strip()
+    if code.startswith(FULL_PAYLOAD_PREFIX):
+        code = code[len(FULL_PAYLOAD_PREFIX):].split(",", 1)[0].strip()
+    return code
+
+
+def _render_label_sheet(labels: List[Tuple[CacheKey, str]], columns: int) -> bytes:
+    from PIL import Image
+
+    images = [
+        Image.open(BytesIO(_cached_render(key, data, BarcodeFormatEnum.PNG)))
+        for key, data in labels
+    ]
+    cell_width = max(image.width for image in images)
+    cell_height = max(image.height for image in images)
+    columns = min(columns, len(images))
+    rows = -(-len(images) // columns)
+
+    sheet = Image.new("RGB", (cell_width * columns, cell_height * rows), "white")
+    for index, image in enumerate(images):
+        row, column = divmod(index, columns)
+        sheet.paste(image, (column * cell_width, row * cell_height))
+
+    img_io = BytesIO()
+    sheet.save(img_io, format="PNG")
+    return img_io.getvalue()
+
+
+async def get_label_sheet(indents: List[Indent], columns: int = LABEL_SHEET_COLUMNS) -> bytes:
+    """
+    Render compact barcodes for many indents onto one printable PNG sheet,
+    laid out in a grid in the order given.
+    """
+    labels = [
+        (_cache_key(indent, BarcodeFormatEnum.PNG, True), barcode_payload(indent, compact=True))
+        for indent in indents
+    ]
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _render_label_sheet, labels, columns)
@@ -0,0 +1,43 @@
+from typing import Any, Dict, Hashable, Optional, Tuple
+from dotenv import load_dotenv
+import os
+import time
+
+
+load_dotenv()
+
+COUNTS_CACHE_TTL_SECONDS = float(os.getenv("COUNTS_CACHE_TTL_SECONDS", 5))
+
+
+class TTLCache:
+    """
+    Minimal in-process cache whose entries expire after `ttl` seconds.
+    Writers call `invalidate()` so readers never wait out the TTL after a change.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+# Dashboard request counts by status, cleared whenever a request changes status
+counts_cache = TTLCache(ttl=COUNTS_CACHE_TTL_SECONDS)
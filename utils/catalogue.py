@@ -0,0 +1,163 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from datetime import datetime, timezone
+from difflib import get_close_matches
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from models.catalogue import CatalogueItem, CatalogueStatus
+from models.enums import ItemTypeEnum
+import asyncio
+import logging
+import os
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Other workers pick up catalogue edits on their next reload
+CATALOGUE_RELOAD_SECONDS = float(os.getenv("CATALOGUE_RELOAD_SECONDS", 60))
+MAX_SUGGESTIONS = 3
+
+# Written to an empty catalogue on first start; edits go through /catalogue afterwards
+DEFAULT_CONSUMABLE_ITEMS = [
+    "Brown Tape", "Transparent Tap Medium Size", "Clip Binder small", "Clip M Size (Boxes)",
+    "Diary Register", "Fevicol (Gum) 100 Gram Bottle", "File Board",
+    "File Cover with DSEU print", "File Tag Small (Bunch)", "Multi Color Flag/ Post it (pkt)",
+    "Nothing Sheet Legal- Ream", "Paper Ream (A4 Size)", "Pen Uniball Black", "Punching Machine Double", "Stapler Heavy Duty",
+    "Stapler Small", "Tissue Box", "Extension Cord (Multiple Switches)"
+]
+
+
+def normalize_name(name: str) -> str:
+    """
+    Fold case and collapse runs of whitespace, so "stapler  small" matches "Stapler Small".
+    """
+    return " ".join(name.split()).casefold()
+
+
+class UnknownItemError(ValueError):
+    def __init__(self, item_name: str, item_type: str, suggestions: List[str]):
+        self.item_name = item_name
+        self.suggestions = suggestions
+        message = f"Invalid item for {item_type}: '{item_name}'."
+        if suggestions:
+            message += f" Did you mean: {', '.join(suggestions)}?"
+        super().__init__(message)
+
+
+class ItemCatalogue:
+    """
+    In-memory copy of the `CatalogueItem` master: per item type, a frozenset of
+    normalized names for membership checks and a dict back to the canonical
+    spelling. Only item types that have catalogue entries are enforced, so
+    non-consumables stay free-form until the master lists some.
+    """
+
+    def __init__(self, seed: Iterable[Tuple[str, str]] = ()):
+        self._names: Dict[str, Dict[str, str]] = {}
+        self._sets: Dict[str, FrozenSet[str]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.loaded_at: Optional[datetime] = None
+        self._replace(seed)
+
+    def _replace(self, items: Iterable[Tuple[str, str]]) -> None:
+        names: Dict[str, Dict[str, str]] = {}
+        for item_name, item_type in items:
+            names.setdefault(getattr(item_type, "value", item_type), {})[normalize_name(item_name)] = item_name
+        # Swapped in whole, so concurrent lookups see either the old or the new catalogue
+        self._names = names
+        self._sets = {item_type: frozenset(by_name) for item_type, by_name in names.items()}
+
+    def enforces(self, item_type: str) -> bool:
+        return getattr(item_type, "value", item_type) in self._sets
+
+    def match(self, item_name: str, item_type: str) -> Optional[str]:
+        """
+        Canonical spelling of `item_name`, or None if it is not in the catalogue.
+        """
+        item_type = getattr(item_type, "value", item_type)
+        normalized = normalize_name(item_name)
+        if normalized not in self._sets.get(item_type, frozenset()):
+            return None
+        return self._names[item_type][normalized]
+
+    def names(self, item_type: str) -> List[str]:
+        return sorted(self._names.get(getattr(item_type, "value", item_type), {}).values())
+
+    def suggest(self, item_name: str, item_type: str, limit: int = MAX_SUGGESTIONS) -> List[str]:
+        by_name = self._names.get(getattr(item_type, "value", item_type), {})
+        close = get_close_matches(normalize_name(item_name), list(by_name), n=limit, cutoff=0.6)
+        return [by_name[name] for name in close]
+
+    def validate(self, item_name: str, item_type: str) -> str:
+        """
+        Return the canonical name for a catalogued item type, or the name as
+        given for a type the catalogue does not cover. Raises UnknownItemError
+        (with near-miss suggestions) for names not in the catalogue.
+        """
+        item_type = getattr(item_type, "value", item_type)
+        if not self.enforces(item_type):
+            return item_name
+        canonical = self.match(item_name, item_type)
+        if canonical is None:
+            raise UnknownItemError(item_name, item_type, self.suggest(item_name, item_type))
+        return canonical
+
+    async def load(self) -> None:
+        collection = CatalogueItem.get_motor_collection()
+        if await collection.estimated_document_count() == 0:
+            await seed_catalogue((name, ItemTypeEnum.CONSUMABLE.value) for name in DEFAULT_CONSUMABLE_ITEMS)
+        docs = await collection.find(
+            {"active": True}, {"item_name": 1, "item_type": 1}
+        ).to_list(length=None)
+        self._replace((doc["item_name"], doc["item_type"]) for doc in docs)
+        self.loaded_at = datetime.now(timezone.utc)
+
+    def status(self) -> CatalogueStatus:
+        return CatalogueStatus(
+            size=sum(len(names) for names in self._sets.values()),
+            item_types=sorted(self._sets),
+            loaded_at=self.loaded_at
+        )
+
+    async def start(self) -> None:
+        await self.load()
+        self._task = asyncio.create_task(self._reload_periodically())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _reload_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(CATALOGUE_RELOAD_SECONDS)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"Catalogue reload failed: {e}")
+
+
+async def seed_catalogue(items: Iterable[Tuple[str, str]]) -> None:
+    """
+    Upsert catalogue entries, keeping existing ones (and their spelling) as they are.
+    """
+    operations = [
+        UpdateOne(
+            {"item_type": item_type, "normalized_name": normalize_name(item_name)},
+            {"$setOnInsert": {
+                "item_name": " ".join(item_name.split()),
+                "active": True,
+                "created_at": datetime.now(timezone.utc),
+            }},
+            upsert=True
+        )
+        for item_name, item_type in items
+    ]
+    if operations:
+        await CatalogueItem.get_motor_collection().bulk_write(operations, ordered=False)
+
+
+# Starts from the built-in list so validation works before the database is loaded
+item_catalogue = ItemCatalogue((name, ItemTypeEnum.CONSUMABLE.value) for name in DEFAULT_CONSUMABLE_ITEMS)
@@ -0,0 +1,114 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+from datetime import date, datetime
+from bson import ObjectId
+from models.enums import ExportFormatEnum
+from models.inventory import Request
+from utils.queries import request_links_pipeline, KEYSET_SORT
+import csv
+import io
+import json
+
+EXPORT_BATCH_SIZE = 500
+
+CSV_COLUMNS = [
+    "request_id", "campus_name", "date_of_request", "date_of_approval", "status",
+    "reason", "row_type", "item_name", "qty", "item_type", "description", "employee_id"
+]
+
+MEDIA_TYPES = {
+    ExportFormatEnum.NDJSON: "application/x-ndjson",
+    ExportFormatEnum.CSV: "text/csv",
+}
+
+
+def _json_default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value: Any):
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _export_record(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "request_id": str(doc["_id"]),
+        "campus_name": doc.get("campus_name"),
+        "date_of_request": doc.get("date_of_request"),
+        "date_of_approval": doc.get("date_of_approval"),
+        "status": doc.get("status"),
+        "reason": doc.get("reason"),
+        "employee_id": doc.get("employee_id"),
+        "items": [
+            {"item_name": i.get("item_name"), "qty": i.get("qty"), "description": i.get("description")}
+            for i in doc.get("items") or []
+        ],
+        "issued": [
+            {"item_name": i.get("item_name"), "qty": i.get("qty"), "Item_Type": i.get("Item_Type"),
+             "employee_id": i.get("employee_id")}
+            for i in doc.get("issued") or []
+        ],
+    }
+
+
+def _csv_rows(record: Dict[str, Any]) -> List[List[Any]]:
+    """
+    Flatten one request into CSV rows: one per line item and one per issued row.
+    Requests without any lines still produce a single row.
+    """
+    base = [
+        record["request_id"], record["campus_name"], record["date_of_request"],
+        record["date_of_approval"], record["status"], record["reason"]
+    ]
+    rows = [
+        base + ["item", item["item_name"], item["qty"], None, item["description"], record["employee_id"]]
+        for item in record["items"]
+    ]
+    rows += [
+        base + ["issued", issue["item_name"], issue["qty"], issue["Item_Type"], None, issue["employee_id"]]
+        for issue in record["issued"]
+    ]
+    return rows or [base + ["request", None, None, None, None, record["employee_id"]]]
+
+
+async def iter_request_records(match: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Iterate requests with their resolved items and issued rows straight off the
+    Motor cursor, one batch at a time, without materializing the result set.
+    """
+    pipeline = request_links_pipeline(match, sort=KEYSET_SORT)
+    # The sort may spill to disk on large collections when no index covers the match
+    async for doc in Request.aggregate(pipeline, batchSize=EXPORT_BATCH_SIZE, allowDiskUse=True):
+        yield _export_record(doc)
+
+
+async def stream_ndjson(match: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+    async for record in iter_request_records(match):
+        yield json.dumps(record, default=_json_default) + "\n"
+
+
+async def stream_csv(match: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    async for record in iter_request_records(match):
+        for row in _csv_rows(record):
+            writer.writerow([_csv_value(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_requests(export_format: ExportFormatEnum, match: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+    if export_format == ExportFormatEnum.CSV:
+        return stream_csv(match)
+    return stream_ndjson(match)
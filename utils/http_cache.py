@@ -0,0 +1,107 @@
+from typing import Any, Dict, Optional, Tuple
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request as HTTPRequest, Response
+from models.versions import CollectionVersion
+from utils.cache import counts_cache
+
+# Collection stamps
+REQUESTS_VERSION = "requests"
+INVENTORY_TOTALS_VERSION = "inventory_totals"
+
+# Clients may keep a copy but must revalidate it on every use
+CACHE_CONTROL = "no-cache"
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def with_revision(update: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add the revision bump to a raw Request update, so the request's ETag changes.
+    """
+    return {
+        **update,
+        "$set": {**update.get("$set", {}), "updated_at": utcnow()},
+        "$inc": {**update.get("$inc", {}), "revision": 1},
+    }
+
+
+async def bump_version(name: str) -> None:
+    await CollectionVersion.get_motor_collection().update_one(
+        {"name": name},
+        {"$inc": {"version": 1}, "$set": {"updated_at": utcnow()}},
+        upsert=True
+    )
+
+
+async def requests_changed() -> None:
+    """
+    Call after any write to Requests: drops the cached counts and moves the
+    collection stamp the listings are validated against.
+    """
+    counts_cache.invalidate()
+    await bump_version(REQUESTS_VERSION)
+
+
+async def collection_version(name: str) -> Tuple[int, Optional[datetime]]:
+    doc = await CollectionVersion.get_motor_collection().find_one(
+        {"name": name}, {"version": 1, "updated_at": 1}
+    )
+    if doc is None:
+        return 0, None
+    return doc["version"], doc.get("updated_at")
+
+
+def make_etag(*parts: Any) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Motor returns naive UTC datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def is_not_modified(request: HTTPRequest, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evaluate If-None-Match (or, without it, If-Modified-Since) against the
+    current validators, as RFC 9110 prescribes for GET.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # If-None-Match uses the weak comparison
+        return any(tag.removeprefix("W/") == etag for tag in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
+
+
+def with_cache_headers(result: Any, response: Response, etag: str, last_modified: Optional[datetime] = None) -> Any:
+    """
+    Attach the validators to the endpoint's result: on `result` itself when the
+    endpoint built its own Response, otherwise on the injected `response`.
+    """
+    target = result if isinstance(result, Response) else response
+    target.headers.update(cache_headers(etag, last_modified))
+    return result
@@ -0,0 +1,211 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+from starlette.responses import JSONResponse, Response
+from dotenv import load_dotenv
+from models.idempotency import IdempotencyRecord
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+# A key whose owner has not refreshed its claim for this long belongs to a
+# crashed worker and can be taken over
+IDEMPOTENCY_PENDING_TIMEOUT_SECONDS = float(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT_SECONDS", 60))
+# How often a running request refreshes its claim; well inside the timeout
+IDEMPOTENCY_HEARTBEAT_SECONDS = float(
+    os.getenv("IDEMPOTENCY_HEARTBEAT_SECONDS", IDEMPOTENCY_PENDING_TIMEOUT_SECONDS / 3)
+)
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware honouring an `Idempotency-Key` header on mutating requests.
+
+    The first request with a key claims it with a unique insert, runs, and
+    stores its successful response; retries with the same key, method and path
+    get that response replayed after one indexed lookup instead of re-running
+    the handler. A retry that arrives while the original is still running gets
+    409, and reusing a key with a different body gets 422. Failed requests
+    release the key so they can be retried.
+
+    The owner refreshes its claim while the handler runs, so only a claim
+    left behind by a crashed worker is ever taken over, however slow the
+    handler is. Completion and release only apply to the caller's own claim.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        key = self._header(scope, IDEMPOTENCY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await JSONResponse(
+                status_code=400,
+                content={"detail": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"}
+            )(scope, receive, send)
+            return
+
+        body, receive = await self._buffer_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        path = scope["path"] + ("?" + scope["query_string"].decode() if scope.get("query_string") else "")
+        identity = {"key": key, "method": scope["method"], "path": path}
+
+        owner = uuid.uuid4().hex
+        early = await self._claim(identity, fingerprint, owner)
+        if early is not None:
+            await early(scope, receive, send)
+            return
+        claim = {**identity, "owner": owner}
+
+        status_code = 500
+        headers: List = []
+        chunks: List[bytes] = []
+
+        async def send_wrapper(message):
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        heartbeat = asyncio.create_task(self._heartbeat(claim))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            await self._release(claim)
+            raise
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+        if 200 <= status_code < 300:
+            content_type = next(
+                (value.decode() for name, value in headers if name.lower() == b"content-type"), None
+            )
+            await IdempotencyRecord.get_motor_collection().update_one(claim, {"$set": {
+                "completed": True,
+                "status_code": status_code,
+                "content_type": content_type,
+                "body": b"".join(chunks),
+            }})
+        else:
+            await self._release(claim)
+
+    @staticmethod
+    def _header(scope, name: str) -> Optional[str]:
+        target = name.encode()
+        for header_name, value in scope.get("headers", []):
+            if header_name.lower() == target:
+                return value.decode().strip()
+        return None
+
+    @staticmethod
+    async def _buffer_body(receive):
+        """
+        Read the whole request body (needed for the fingerprint) and return a
+        `receive` callable that replays it to the application.
+        """
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        sent = False
+
+        async def replay():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return body, replay
+
+    async def _claim(self, identity: Dict[str, Any], fingerprint: str, owner: str) -> Optional[Response]:
+        """
+        Claim the key for this request. Returns None when the caller should run
+        the handler, or the response to send instead.
+        """
+        collection = IdempotencyRecord.get_motor_collection()
+        now = datetime.now(timezone.utc)
+        try:
+            await collection.insert_one({
+                **identity, "fingerprint": fingerprint, "completed": False,
+                "owner": owner, "heartbeat_at": now, "created_at": now,
+            })
+            return None
+        except DuplicateKeyError:
+            pass
+
+        record = await collection.find_one(identity)
+        if record is None:
+            # Expired or released between the insert and the lookup
+            return await self._claim(identity, fingerprint, owner)
+        if record["fingerprint"] != fingerprint:
+            return JSONResponse(
+                status_code=422,
+                content={"detail": "Idempotency-Key was already used with a different request body"}
+            )
+        if record.get("completed"):
+            response = Response(
+                content=record.get("body") or b"",
+                status_code=record["status_code"],
+                media_type=record.get("content_type")
+            )
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+
+        # Still in progress: take it over only if its owner stopped refreshing it
+        stale_before = now - timedelta(seconds=IDEMPOTENCY_PENDING_TIMEOUT_SECONDS)
+        taken = await collection.find_one_and_update(
+            {**identity, "completed": False, "heartbeat_at": {"$lt": stale_before}},
+            {"$set": {"owner": owner, "heartbeat_at": now}}
+        )
+        if taken is not None:
+            return None
+        return JSONResponse(
+            status_code=409,
+            content={"detail": "A request with this Idempotency-Key is still being processed"}
+        )
+
+    @staticmethod
+    async def _heartbeat(claim: Dict[str, Any]) -> None:
+        collection = IdempotencyRecord.get_motor_collection()
+        while True:
+            await asyncio.sleep(IDEMPOTENCY_HEARTBEAT_SECONDS)
+            try:
+                await collection.update_one(
+                    {**claim, "completed": False},
+                    {"$set": {"heartbeat_at": datetime.now(timezone.utc)}}
+                )
+            except Exception as e:
+                logger.error(f"Failed to refresh idempotency key {claim['key']}: {e}")
+
+    async def _release(self, claim: Dict[str, Any]) -> None:
+        try:
+            await IdempotencyRecord.get_motor_collection().delete_one({**claim, "completed": False})
+        except Exception as e:
+            logger.error(f"Failed to release idempotency key {claim['key']}: {e}")
@@ -0,0 +1,194 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+from dotenv import load_dotenv
+from models.stock import InventoryItemTotal
+import asyncio
+import logging
+import os
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Full reload interval when change streams are unavailable (standalone mongod)
+INVENTORY_CACHE_POLL_SECONDS = float(os.getenv("INVENTORY_CACHE_POLL_SECONDS", 30))
+# Back-off before reopening a change stream that failed
+INVENTORY_CACHE_RETRY_SECONDS = 5
+# "The $changeStream stage is only supported on replica sets": a standalone mongod
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+TotalKey = Tuple[str, str]
+
+
+def _key(doc: Dict[str, Any]) -> TotalKey:
+    return doc["item_name"], doc["item_type"]
+
+
+def _row(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in doc.items() if k not in ("_id", "revision_id")}
+
+
+class InventoryTotalsCache:
+    """
+    Process-local read-through cache of `InventoryItemTotal` keyed by
+    (item_name, item_type).
+
+    Writes made by this process are applied immediately by the stock helpers;
+    writes made by other workers arrive through a MongoDB change stream, or
+    through a periodic full reload when the server is a standalone mongod
+    without change streams.
+    """
+
+    def __init__(self):
+        self._rows: Dict[TotalKey, Dict[str, Any]] = {}
+        self._keys_by_id: Dict[ObjectId, TotalKey] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.warmed = False
+        # Collection stamp the rows were last reloaded for (see all_at_version)
+        self.version: Optional[int] = None
+        self.mode: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, doc: Dict[str, Any]) -> None:
+        key = _key(doc)
+        self._rows[key] = _row(doc)
+        self._keys_by_id[doc["_id"]] = key
+
+    def _drop_id(self, doc_id: ObjectId) -> None:
+        key = self._keys_by_id.pop(doc_id, None)
+        if key is not None:
+            self._rows.pop(key, None)
+
+    async def warm(self) -> None:
+        docs = await InventoryItemTotal.get_motor_collection().find({}).to_list(length=None)
+        self._rows = {}
+        self._keys_by_id = {}
+        for doc in docs:
+            self.put(doc)
+        self.warmed = True
+
+    async def get(self, item_name: str, item_type: str) -> Optional[Dict[str, Any]]:
+        key = (item_name, getattr(item_type, "value", item_type))
+        row = self._rows.get(key)
+        if row is not None:
+            self.hits += 1
+            return row
+        self.misses += 1
+        doc = await InventoryItemTotal.get_motor_collection().find_one(
+            {"item_name": key[0], "item_type": key[1]}
+        )
+        if doc is None:
+            return None
+        self.put(doc)
+        return self._rows[key]
+
+    async def all(self) -> List[Dict[str, Any]]:
+        if self.warmed:
+            self.hits += 1
+        else:
+            self.misses += 1
+            await self.warm()
+        return list(self._rows.values())
+
+    async def all_at_version(self, version: int) -> List[Dict[str, Any]]:
+        """
+        All totals, reloaded first if the `inventory_totals` stamp moved since
+        the last call, so rows served under a version's ETag are at least as
+        new as that version even when another worker made the change. The
+        change stream cannot be relied on here: another worker bumps the stamp
+        before this process has necessarily applied the matching event.
+        """
+        if version != self.version:
+            await self.warm()
+            self.version = version
+        return await self.all()
+
+    async def refresh(self, keys: Iterable[TotalKey]) -> None:
+        """
+        Reload the given totals with a single query after this process wrote them.
+        """
+        keys = list(keys)
+        if not keys:
+            return
+        docs = await InventoryItemTotal.get_motor_collection().find({
+            "$or": [{"item_name": name, "item_type": item_type} for name, item_type in keys]
+        }).to_list(length=None)
+        for doc in docs:
+            self.put(doc)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "size": len(self._rows),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    async def start(self) -> None:
+        await self.warm()
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _apply_change(self, change: Dict[str, Any]) -> None:
+        operation = change["operationType"]
+        if operation in ("insert", "update", "replace"):
+            doc = change.get("fullDocument")
+            if doc is None:
+                # Deleted again before the lookup ran
+                self._drop_id(change["documentKey"]["_id"])
+            else:
+                self.put(doc)
+        elif operation == "delete":
+            self._drop_id(change["documentKey"]["_id"])
+        elif operation in ("drop", "rename", "invalidate"):
+            self._rows = {}
+            self._keys_by_id = {}
+            self.warmed = False
+
+    async def _watch(self) -> None:
+        collection = InventoryItemTotal.get_motor_collection()
+        while True:
+            try:
+                async with collection.watch(full_document="updateLookup") as stream:
+                    self.mode = "change_stream"
+                    # Catch up on anything written while the stream was closed
+                    await self.warm()
+                    async for change in stream:
+                        self._apply_change(change)
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info(f"Inventory cache falling back to polling: {e}")
+                    await self._poll()
+                    return
+                # Auth errors, a lost resume token, a stepdown: open a new
+                # stream (which warms the cache again) rather than poll for good
+                await self._retry_later(e)
+            except Exception as e:
+                await self._retry_later(e)
+
+    async def _retry_later(self, error: Exception) -> None:
+        self.mode = "reconnecting"
+        logger.error(f"Inventory cache change stream failed, retrying: {error}")
+        await asyncio.sleep(INVENTORY_CACHE_RETRY_SECONDS)
+
+    async def _poll(self) -> None:
+        self.mode = "polling"
+        while True:
+            await asyncio.sleep(INVENTORY_CACHE_POLL_SECONDS)
+            try:
+                await self.warm()
+            except Exception as e:
+                logger.error(f"Inventory cache reload failed: {e}")
+
+
+inventory_cache = InventoryTotalsCache()
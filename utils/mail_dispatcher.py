@@ -0,0 +1,229 @@
+from typing import Any, Dict, List, Optional
+from datetime import timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+from models.enums import MailStatusEnum
+from models.mail import MailOutbox, utcnow
+from utils.mail import conf
+from utils.metrics import mail_sent_total, mail_failures_total
+import aiosmtplib
+import asyncio
+import logging
+import os
+import time
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MAIL_WORKERS = int(os.getenv("MAIL_WORKERS", 2))
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", 20))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", 5))
+MAIL_RETRY_BASE_SECONDS = float(os.getenv("MAIL_RETRY_BASE_SECONDS", 30))
+MAIL_POLL_INTERVAL_SECONDS = float(os.getenv("MAIL_POLL_INTERVAL_SECONDS", 10))
+# A message left in Sending this long belongs to a worker that died mid-batch
+MAIL_CLAIM_TIMEOUT_SECONDS = float(os.getenv("MAIL_CLAIM_TIMEOUT_SECONDS", 300))
+# How often the workers look for such messages while the process runs
+MAIL_REQUEUE_INTERVAL_SECONDS = float(os.getenv("MAIL_REQUEUE_INTERVAL_SECONDS", 60))
+
+
+async def enqueue_mail(subject: str, recipients: List[str], body: str) -> MailOutbox:
+    """
+    Store an HTML message in the outbox and wake the dispatcher.
+    Returns as soon as the outbox entry is written; delivery happens in the background.
+    """
+    entry = MailOutbox(subject=subject, recipients=[str(r) for r in recipients], body=body)
+    await entry.insert()
+    mail_dispatcher.notify()
+    return entry
+
+
+async def enqueue_many(messages: List[Dict[str, Any]]) -> None:
+    """
+    Store several messages (dicts with `subject`, `recipients` and `body`) with one insert.
+    """
+    if not messages:
+        return
+    await MailOutbox.insert_many([
+        MailOutbox(subject=m["subject"], recipients=[str(r) for r in m["recipients"]], body=m["body"])
+        for m in messages
+    ])
+    mail_dispatcher.notify()
+
+
+def build_message(entry: Dict[str, Any]) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((conf.MAIL_FROM_NAME, conf.MAIL_FROM)) if conf.MAIL_FROM_NAME else conf.MAIL_FROM
+    message["To"] = ", ".join(entry["recipients"])
+    message["Subject"] = entry["subject"]
+    message.set_content(entry["body"], subtype="html")
+    return message
+
+
+class MailDispatcher:
+    """
+    Pool of asyncio workers draining the `MailOutbox` collection.
+
+    Each worker claims a batch of due messages, sends them over one SMTP
+    connection it keeps open while there is work, and reschedules failures
+    with exponential backoff until `MAIL_MAX_ATTEMPTS` is reached.
+    """
+
+    def __init__(self, workers: int = MAIL_WORKERS, batch_size: int = MAIL_BATCH_SIZE):
+        self.workers = workers
+        self.batch_size = batch_size
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._next_requeue_at = 0.0
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._next_requeue_at = 0.0
+        await self._requeue_stale()
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        logger.info(f"Mail dispatcher started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Mail dispatcher stopped")
+
+    async def _requeue_stale(self) -> int:
+        """
+        Put messages claimed by a worker that never finished them back in the queue.
+        """
+        self._next_requeue_at = time.monotonic() + MAIL_REQUEUE_INTERVAL_SECONDS
+        stale_before = utcnow() - timedelta(seconds=MAIL_CLAIM_TIMEOUT_SECONDS)
+        result = await MailOutbox.get_motor_collection().update_many(
+            {"status": MailStatusEnum.Sending.value, "claimed_at": {"$lt": stale_before}},
+            {"$set": {"status": MailStatusEnum.Pending.value, "claimed_at": None}}
+        )
+        if result.modified_count:
+            logger.warning(f"Requeued {result.modified_count} mails left in Sending")
+        return result.modified_count
+
+    async def _claim_batch(self) -> List[Dict[str, Any]]:
+        collection = MailOutbox.get_motor_collection()
+        batch = []
+        while len(batch) < self.batch_size:
+            now = utcnow()
+            entry = await collection.find_one_and_update(
+                {"status": MailStatusEnum.Pending.value, "next_attempt_at": {"$lte": now}},
+                {"$set": {"status": MailStatusEnum.Sending.value, "claimed_at": now}},
+                sort=[("next_attempt_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if entry is None:
+                break
+            batch.append(entry)
+        return batch
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=conf.MAIL_SERVER,
+            port=conf.MAIL_PORT,
+            use_tls=conf.MAIL_SSL_TLS,
+            start_tls=conf.MAIL_STARTTLS,
+            validate_certs=conf.VALIDATE_CERTS
+        )
+        await smtp.connect()
+        if conf.USE_CREDENTIALS:
+            await smtp.login(conf.MAIL_USERNAME, conf.MAIL_PASSWORD.get_secret_value())
+        return smtp
+
+    async def _mark_sent(self, entry: Dict[str, Any]) -> None:
+        mail_sent_total.inc()
+        await MailOutbox.get_motor_collection().update_one(
+            {"_id": entry["_id"]},
+            {"$set": {"status": MailStatusEnum.Sent.value, "sent_at": utcnow(), "last_error": None},
+             "$inc": {"attempts": 1}}
+        )
+
+    async def _mark_failed(self, entry: Dict[str, Any], error: Exception) -> None:
+        mail_failures_total.inc()
+        attempts = entry.get("attempts", 0) + 1
+        update = {"attempts": attempts, "last_error": str(error), "claimed_at": None}
+        if attempts >= MAIL_MAX_ATTEMPTS:
+            update["status"] = MailStatusEnum.Failed.value
+            logger.error(f"Giving up on mail {entry['_id']} after {attempts} attempts: {error}")
+        else:
+            update["status"] = MailStatusEnum.Pending.value
+            update["next_attempt_at"] = utcnow() + timedelta(
+                seconds=MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+            )
+            logger.warning(f"Failed to send mail {entry['_id']} (attempt {attempts}): {error}")
+        await MailOutbox.get_motor_collection().update_one({"_id": entry["_id"]}, {"$set": update})
+
+    async def _close(self, smtp: Optional[aiosmtplib.SMTP]) -> None:
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    async def _deliver(self, smtp: Optional[aiosmtplib.SMTP], entry: Dict[str, Any]) -> Optional[aiosmtplib.SMTP]:
+        """
+        Send one claimed message, reusing `smtp` when it is still connected.
+        Returns the connection to use for the next message.
+        """
+        try:
+            if smtp is None or not smtp.is_connected:
+                smtp = await self._connect()
+            await smtp.send_message(build_message(entry))
+        except Exception as e:
+            if isinstance(e, (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, OSError)):
+                await self._close(smtp)
+                smtp = None
+            await self._mark_failed(entry, e)
+            return smtp
+        await self._mark_sent(entry)
+        return smtp
+
+    async def _worker(self, number: int) -> None:
+        smtp: Optional[aiosmtplib.SMTP] = None
+        try:
+            while not self._stopping:
+                # Cleared before claiming so an enqueue during the claim is not missed
+                self._wakeup.clear()
+                try:
+                    # Whichever worker gets here first once the interval is up does the sweep
+                    if time.monotonic() >= self._next_requeue_at:
+                        await self._requeue_stale()
+                    batch = await self._claim_batch()
+                except Exception as e:
+                    logger.error(f"Mail worker {number} failed to claim messages: {e}")
+                    batch = []
+
+                if not batch:
+                    # Idle: release the SMTP connection and wait for new work
+                    await self._close(smtp)
+                    smtp = None
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=MAIL_POLL_INTERVAL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                for entry in batch:
+                    try:
+                        smtp = await self._deliver(smtp, entry)
+                    except Exception as e:
+                        # Left in Sending; requeued once the claim times out
+                        logger.error(f"Mail worker {number} failed to record delivery of {entry['_id']}: {e}")
+        finally:
+            await self._close(smtp)
+
+
+mail_dispatcher = MailDispatcher()
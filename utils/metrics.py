@@ -0,0 +1,283 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from abc import ABC, abstractmethod
+from pymongo import monitoring
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        # Mongo listeners run on Motor's worker threads, not the event loop
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def collect(self) -> List[str]:
+        ...
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> (per-bucket counts, sum, count)
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * len(self.buckets), [0.0, 0])
+            counts, totals = series
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            totals[0] += value
+            totals[1] += 1
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            series = {key: (list(counts), list(totals)) for key, (counts, totals) in self._series.items()}
+        lines = self.header()
+        for key, (counts, (total, count)) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {int(count)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests handled, by route and status code.",
+    ["method", "route", "status"]
+))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency in seconds, by route.",
+    ["method", "route"]
+))
+mongo_command_duration_seconds = registry.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency in seconds, by collection and command.",
+    ["collection", "command"]
+))
+mongo_command_failures_total = registry.register(Counter(
+    "mongo_command_failures_total", "MongoDB commands that returned an error, by collection and command.",
+    ["collection", "command"]
+))
+mail_sent_total = registry.register(Counter(
+    "mail_sent_total", "Notification emails delivered to the SMTP relay."
+))
+mail_failures_total = registry.register(Counter(
+    "mail_failures_total", "Notification email delivery attempts that failed."
+))
+mongo_pool_checkout_wait_seconds = registry.register(Histogram(
+    "mongo_pool_checkout_wait_seconds", "Time spent waiting to check a connection out of the Motor pool.",
+    ["address"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+))
+mongo_pool_checkout_failures_total = registry.register(Counter(
+    "mongo_pool_checkout_failures_total", "Connection checkouts that failed, by reason.",
+    ["address", "reason"]
+))
+barcode_renders_total = registry.register(Counter(
+    "barcode_renders_total", "Barcode images rendered (cache misses), by format.",
+    ["format"]
+))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count and latency per route template,
+    so `/get_indent/{indent_id}` is one series rather than one per id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_request_duration_seconds.observe(time.perf_counter() - start, method=method, route=route_path)
+            http_requests_total.inc(method=method, route=route_path, status=str(status_code))
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Times every command Motor sends, labelled by collection and command name.
+    """
+
+    def __init__(self):
+        self._collections: Dict[Tuple[int, Tuple[str, int]], str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(event) -> Tuple[int, Tuple[str, int]]:
+        return event.request_id, event.connection_id
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        collection = target if isinstance(target, str) else ""
+        with self._lock:
+            self._collections[self._key(event)] = collection
+
+    def _finish(self, event) -> str:
+        with self._lock:
+            return self._collections.pop(self._key(event), "")
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        collection = self._finish(event)
+        mongo_command_duration_seconds.observe(
+            event.duration_micros / 1_000_000, collection=collection, command=event.command_name
+        )
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        collection = self._finish(event)
+        mongo_command_duration_seconds.observe(
+            event.duration_micros / 1_000_000, collection=collection, command=event.command_name
+        )
+        mongo_command_failures_total.inc(collection=collection, command=event.command_name)
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """
+    Records how long operations wait for a pooled connection, which shows
+    when `maxPoolSize` is too small for the load.
+    """
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        mongo_pool_checkout_wait_seconds.observe(event.duration, address=self._address(event))
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        mongo_pool_checkout_wait_seconds.observe(event.duration, address=self._address(event))
+        mongo_pool_checkout_failures_total.inc(address=self._address(event), reason=str(event.reason))
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_checked_in(self, event) -> None:
+        pass
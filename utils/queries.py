@@ -0,0 +1,216 @@
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from datetime import datetime
+from dotenv import load_dotenv
+from models.inventory import Request, RequestItem, ReqIssue
+import base64
+import json
+import os
+
+
+load_dotenv()
+
+# "linked" stores line items / issued rows in their own collections,
+# "embedded" stores them inline on the Request. Reads understand both.
+REQUEST_STORAGE_MODE = os.getenv("REQUEST_STORAGE_MODE", "linked")
+EMBEDDED_STORAGE = REQUEST_STORAGE_MODE == "embedded"
+
+
+# Request fields read by `request_issue_dict`, the export and the migration;
+# the link arrays and inline rows they are built from are always kept
+REQUEST_FIELDS = {
+    "campus_name": 1,
+    "date_of_request": 1,
+    "date_of_approval": 1,
+    "status": 1,
+    "reason": 1,
+    "employee_id": 1,
+    "revision": 1,
+    "updated_at": 1,
+}
+# Fields `request_issue_dict` needs for a listing; everything else stays in Mongo
+REQUEST_RESPONSE_PROJECTION = {
+    "campus_name": 1,
+    "date_of_request": 1,
+    "status": 1,
+    "reason": 1,
+}
+LINK_PROJECTION = {"items": 1, "issued": 1, "embedded_items": 1, "embedded_issued": 1}
+# Fields kept from each joined RequestItem / ReqIssue
+ITEM_FIELDS = {"_id": 0, "item_name": 1, "qty": 1, "description": 1}
+ISSUE_FIELDS = {"_id": 0, "item_name": 1, "qty": 1, "Item_Type": 1, "employee_id": 1}
+
+KEYSET_SORT = {"date_of_request": 1, "_id": 1}
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def inline_or_linked(embedded_field: str, linked_field: str) -> Dict[str, Any]:
+    """
+    Aggregation expression preferring the inline rows over the looked-up ones.
+    Only a non-empty inline array wins: a request migrated before it was
+    approved may carry `embedded_issued: []` while its issued rows are linked.
+    """
+    inline = {"$ifNull": [f"${embedded_field}", []]}
+    return {"$cond": [{"$gt": [{"$size": inline}, 0]}, inline, f"${linked_field}"]}
+
+
+def request_links_pipeline(
+    match: Optional[Dict[str, Any]] = None,
+    sort: Optional[Dict[str, int]] = None,
+    limit: Optional[int] = None,
+    project: Optional[Dict[str, int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Build an aggregation pipeline that resolves the `items` and `issued`
+    links of every matched Request with `$lookup`, so a whole listing is
+    served by a single round trip instead of one `fetch_links` call per request.
+    Requests stored in embedded mode use their inline rows instead.
+
+    `project` names the Request fields to return (REQUEST_FIELDS by default);
+    `items` and `issued` always come back. Combining `localField` with a
+    `$lookup` pipeline needs MongoDB 5.0 or later.
+    """
+    pipeline: List[Dict[str, Any]] = []
+    if match:
+        pipeline.append({"$match": match})
+    if sort:
+        pipeline.append({"$sort": sort})
+    # Limit before the lookups so only the requested page is joined
+    if limit:
+        pipeline.append({"$limit": limit})
+    # Trim the request, and each joined row, to the fields the callers read
+    # before anything is joined
+    pipeline.extend([
+        {"$project": {**(project or REQUEST_FIELDS), **LINK_PROJECTION}},
+        {
+            "$lookup": {
+                "from": RequestItem.get_motor_collection().name,
+                "localField": "items.$id",
+                "foreignField": "_id",
+                "pipeline": [{"$project": ITEM_FIELDS}],
+                "as": "items",
+            }
+        },
+        {
+            "$lookup": {
+                "from": ReqIssue.get_motor_collection().name,
+                "localField": "issued.$id",
+                "foreignField": "_id",
+                "pipeline": [{"$project": ISSUE_FIELDS}],
+                "as": "issued",
+            }
+        },
+        {
+            "$project": {
+                **(project or REQUEST_FIELDS),
+                "items": inline_or_linked("embedded_items", "items"),
+                "issued": inline_or_linked("embedded_issued", "issued"),
+            }
+        },
+    ])
+    return pipeline
+
+
+async def find_requests_with_links(
+    match: Optional[Dict[str, Any]] = None,
+    sort: Optional[Dict[str, int]] = None,
+    limit: Optional[int] = None,
+    project: Optional[Dict[str, int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch requests together with their line items and issued rows as raw documents.
+    """
+    pipeline = request_links_pipeline(match, sort, limit, project)
+    return await Request.aggregate(pipeline).to_list()
+
+
+async def find_request_with_links(request_id: ObjectId) -> Optional[Dict[str, Any]]:
+    docs = await find_requests_with_links({"_id": request_id}, limit=1)
+    return docs[0] if docs else None
+
+
+def request_items(request: Request) -> List[Any]:
+    """
+    Line items of a Request loaded with `fetch_links`, in either storage mode.
+    """
+    if request.embedded_items is not None:
+        return request.embedded_items
+    return request.items or []
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """
+    Encode the keyset position (`date_of_request`, `_id`) of a document as an opaque token.
+    """
+    payload = {"d": doc["date_of_request"].isoformat(), "id": str(doc["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(payload["d"]), ObjectId(payload["id"])
+    except Exception as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+async def find_requests_page(
+    match: Optional[Dict[str, Any]] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one page of requests ordered by (`date_of_request`, `_id`), projected to
+    the response fields. Returns the documents and the cursor of the next page,
+    or None when this is the last page.
+    """
+    match = dict(match or {})
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        match["$or"] = [
+            {"date_of_request": {"$gt": last_date}},
+            {"date_of_request": last_date, "_id": {"$gt": last_id}},
+        ]
+
+    # Fetch one extra document to know whether another page exists
+    docs = await find_requests_with_links(
+        match,
+        sort=KEYSET_SORT,
+        limit=limit + 1,
+        project=REQUEST_RESPONSE_PROJECTION,
+    )
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1])
+    return docs, None
+
+
+def _as_date(value: Any) -> Any:
+    # Beanie stores `date` fields as midnight datetimes
+    return value.date() if isinstance(value, datetime) else value
+
+
+def request_issue_dict(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shape an aggregated request document into the fields of `RequestIssueResponse`,
+    already in response form so it can also be sent without re-validation.
+    """
+    return {
+        "request_id": str(doc["_id"]),
+        "campus_name": doc["campus_name"],
+        "date_of_request": _as_date(doc["date_of_request"]),
+        "date_of_approval": _as_date(doc.get("date_of_approval")),
+        "status": doc["status"],
+        "reason": doc.get("reason"),
+        "items": [
+            {"item_name": item["item_name"], "qty": item["qty"], "description": item.get("description")}
+            for item in doc.get("items") or []
+        ],
+        "issued": [
+            {"item_name": issue["item_name"], "qty": issue["qty"], "Item_Type": issue["Item_Type"]}
+            for issue in doc.get("issued") or []
+        ],
+    }
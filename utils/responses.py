@@ -0,0 +1,51 @@
+from typing import Any, Dict, List, Type
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from dotenv import load_dotenv
+import logging
+import os
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Send large listings built from our own queries straight through orjson,
+# skipping the pydantic model construction and FastAPI's response_model
+# re-validation. Off by default; the JSON is the same either way.
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+
+try:
+    import orjson  # noqa: F401
+except ImportError:
+    if FAST_JSON_RESPONSES:
+        logger.warning("FAST_JSON_RESPONSES is set but orjson is not installed; using the pydantic path")
+    FAST_JSON_RESPONSES = False
+
+
+def shape(row: Dict[str, Any], model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Keep exactly the top-level fields `model` would serialize, in its order.
+    """
+    return {name: row.get(name) for name in model.model_fields}
+
+
+def trusted_list(rows: List[Dict[str, Any]], model: Type[BaseModel]) -> Any:
+    """
+    Response for a list of rows already in response form (see
+    `utils.queries.request_issue_dict`): an ORJSONResponse when fast responses
+    are enabled, otherwise the validated models for FastAPI to serialize.
+    """
+    if FAST_JSON_RESPONSES:
+        return ORJSONResponse([shape(row, model) for row in rows])
+    return [model(**row) for row in rows]
+
+
+def trusted_page(rows: List[Dict[str, Any]], model: Type[BaseModel], page_model: Type[BaseModel], **extra: Any) -> Any:
+    """
+    Like `trusted_list`, for a page object whose first field holds the rows.
+    """
+    field = next(iter(page_model.model_fields))
+    if FAST_JSON_RESPONSES:
+        return ORJSONResponse({field: [shape(row, model) for row in rows], **extra})
+    return page_model(**{field: [model(**row) for row in rows], **extra})
@@ -0,0 +1,134 @@
+from typing import Any, Dict, List, Optional, Sequence, Type
+from beanie import Document
+from models.enums import SearchScopeEnum
+from models.indent import Indent
+from models.inventory import Request, RequestItem
+from models.search import SearchHit, SearchPage
+from models.stock import Item
+from utils.catalogue import normalize_name
+import asyncio
+import re
+
+# Hits beyond this many per query are not reachable by paging
+MAX_SEARCH_WINDOW = 500
+# Added to the text score of documents whose title starts with the query, so
+# typeahead completions rank above documents that merely mention the word
+PREFIX_BONUS = 2.0
+EXACT_BONUS = 3.0
+
+
+class SearchScope:
+    """
+    How one collection is searched: the fields covered by its `search_text`
+    index and the field shown as the hit title. Partial words are matched as
+    a prefix of the model's `search_key`, the normalized copy of the title.
+    """
+
+    def __init__(self, scope: SearchScopeEnum, model: Type[Document], fields: Sequence[str], title: str):
+        self.scope = scope
+        self.model = model
+        self.fields = tuple(fields)
+        self.title = title
+
+    @property
+    def projection(self) -> Dict[str, Any]:
+        projection: Dict[str, Any] = {field: 1 for field in self.fields}
+        if self.model is RequestItem:
+            projection["request"] = 1
+        return projection
+
+
+SEARCH_SCOPES: Dict[SearchScopeEnum, SearchScope] = {
+    scope.scope: scope for scope in (
+        SearchScope(SearchScopeEnum.Items, Item, ["item_name", "item_type"], "item_name"),
+        SearchScope(SearchScopeEnum.RequestItems, RequestItem, ["item_name", "description"], "item_name"),
+        SearchScope(
+            SearchScopeEnum.Requests, Request, ["campus_name", "reason", "status", "embedded_items.item_name"], "campus_name"
+        ),
+        SearchScope(SearchScopeEnum.Indents, Indent, ["item_name", "Department", "Item_Type"], "item_name"),
+    )
+}
+
+
+def _field(doc: Dict[str, Any], path: str) -> Optional[str]:
+    value: Any = doc
+    for part in path.split("."):
+        if isinstance(value, list):
+            value = ", ".join(str(v.get(part)) for v in value if isinstance(v, dict) and v.get(part))
+            break
+        value = value.get(part) if isinstance(value, dict) else None
+    return str(value) if value not in (None, "") else None
+
+
+async def _text_hits(scope: SearchScope, query: str, limit: int) -> List[Dict[str, Any]]:
+    return await scope.model.get_motor_collection().find(
+        {"$text": {"$search": query}},
+        {**scope.projection, "score": {"$meta": "textScore"}}
+    ).sort([("score", {"$meta": "textScore"})]).limit(limit).to_list(length=None)
+
+
+async def _prefix_hits(scope: SearchScope, query: str, limit: int) -> List[Dict[str, Any]]:
+    # A case-sensitive anchored regex on the already normalized key becomes a
+    # tight range on the search_key index; "$options": "i" would scan all of it
+    return await scope.model.get_motor_collection().find(
+        {"search_key": {"$regex": f"^{re.escape(normalize_name(query))}"}},
+        scope.projection
+    ).limit(limit).to_list(length=None)
+
+
+def _hit(scope: SearchScope, doc: Dict[str, Any], query: str) -> SearchHit:
+    title = _field(doc, scope.title) or ""
+    score = float(doc.get("score", 0))
+    if normalize_name(title).startswith(normalize_name(query)):
+        score += PREFIX_BONUS
+    if normalize_name(title) == normalize_name(query):
+        score += EXACT_BONUS
+    request = doc.get("request")
+    return SearchHit(
+        scope=scope.scope,
+        id=str(doc["_id"]),
+        request_id=str(request.id) if request is not None else None,
+        title=title,
+        fields={field: _field(doc, field) for field in scope.fields},
+        score=round(score, 4)
+    )
+
+
+async def _search_scope(scope: SearchScope, query: str, limit: int) -> List[SearchHit]:
+    text_docs, prefix_docs = await asyncio.gather(
+        _text_hits(scope, query, limit), _prefix_hits(scope, query, limit)
+    )
+    docs: Dict[Any, Dict[str, Any]] = {doc["_id"]: doc for doc in prefix_docs}
+    # Text hits carry the score, so they win over the prefix copy of the same document
+    docs.update({doc["_id"]: doc for doc in text_docs})
+    return [_hit(scope, doc, query) for doc in docs.values()]
+
+
+async def search(
+    query: str,
+    scopes: Optional[Sequence[SearchScopeEnum]] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> SearchPage:
+    """
+    Ranked hits for `query` across the selected collections. Whole words are
+    matched through each collection's text index; the query is also matched
+    as a prefix of each document's title so partial words complete.
+    """
+    query = query.strip()
+    if offset + limit > MAX_SEARCH_WINDOW:
+        raise ValueError(f"offset + limit must not exceed {MAX_SEARCH_WINDOW}")
+    selected = [SEARCH_SCOPES[s] for s in (scopes or list(SEARCH_SCOPES))]
+
+    # One more than the page so we know whether another page exists
+    window = offset + limit + 1
+    per_scope = await asyncio.gather(*(_search_scope(scope, query, window) for scope in selected))
+    hits = [hit for scope_hits in per_scope for hit in scope_hits]
+    hits.sort(key=lambda hit: (-hit.score, hit.title.lower(), hit.id))
+
+    page = hits[offset:offset + limit]
+    return SearchPage(
+        query=query,
+        hits=page,
+        next_offset=offset + limit if len(hits) > offset + limit else None
+    )
@@ -0,0 +1,197 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pymongo import ReturnDocument, UpdateOne
+from models.stock import InventoryItemTotal
+from utils.inventory_cache import inventory_cache
+from utils.http_cache import bump_version, INVENTORY_TOTALS_VERSION
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (item_name, item_type) -> quantity
+StockLines = Dict[Tuple[str, str], int]
+# (item_name, item_type) -> (quantity, purchase value)
+StockReceipts = Dict[Tuple[str, str], Tuple[int, float]]
+
+# Recomputes the derived fields after a quantity/value change, inside the same
+# pipeline update: weighted average cost, and whether the item is at or below
+# its reorder level
+VALUATION_STAGE: Dict[str, Any] = {
+    "$set": {
+        "average_cost": {
+            "$cond": [
+                {"$gt": ["$total_quantity", 0]},
+                {"$divide": ["$total_value", "$total_quantity"]},
+                {"$ifNull": ["$average_cost", 0]},
+            ]
+        },
+        "low_stock": {
+            "$and": [
+                {"$ne": [{"$ifNull": ["$reorder_level", None]}, None]},
+                {"$lte": ["$total_quantity", "$reorder_level"]},
+            ]
+        },
+    }
+}
+
+
+def _adjust_stock(qty: int) -> List[Dict[str, Any]]:
+    """
+    Pipeline update moving `qty` units in (positive) or out (negative) of stock
+    at the current average cost, so issues leave the average cost unchanged.
+    """
+    return [
+        {
+            "$set": {
+                "total_value": {
+                    "$max": [0, {"$add": [
+                        {"$ifNull": ["$total_value", 0]},
+                        {"$multiply": [qty, {"$ifNull": ["$average_cost", 0]}]},
+                    ]}]
+                },
+                "total_quantity": {"$add": ["$total_quantity", qty]},
+            }
+        },
+        VALUATION_STAGE,
+    ]
+
+
+def _receive_stock(qty: int, value: float) -> List[Dict[str, Any]]:
+    """
+    Pipeline upsert adding a delivery of `qty` units bought for `value` in total.
+    """
+    return [
+        {
+            "$set": {
+                "total_quantity": {"$add": [{"$ifNull": ["$total_quantity", 0]}, qty]},
+                "total_value": {"$add": [{"$ifNull": ["$total_value", 0]}, value]},
+            }
+        },
+        VALUATION_STAGE,
+    ]
+
+
+class StockError(Exception):
+    def __init__(self, item_name: str, message: str):
+        self.item_name = item_name
+        super().__init__(message)
+
+
+class InventoryNotFoundError(StockError):
+    def __init__(self, item_name: str):
+        super().__init__(item_name, f"No inventory found for item: {item_name}")
+
+
+class InsufficientStockError(StockError):
+    def __init__(self, item_name: str):
+        super().__init__(item_name, f"Insufficient quantity for item: {item_name}")
+
+
+def merge_lines(lines: Iterable[Tuple[str, str, int]]) -> StockLines:
+    """
+    Sum quantities per (item_name, item_type) so an item listed twice is
+    checked against stock once, for its combined quantity.
+    """
+    merged: StockLines = {}
+    for item_name, item_type, qty in lines:
+        key = (item_name, getattr(item_type, "value", item_type))
+        merged[key] = merged.get(key, 0) + qty
+    return merged
+
+
+def merge_receipts(lines: Iterable[Tuple[str, str, int, float]]) -> StockReceipts:
+    """
+    Sum quantity and purchase value (quantity x unit price) per (item_name, item_type).
+    """
+    merged: StockReceipts = {}
+    for item_name, item_type, qty, unit_price in lines:
+        key = (item_name, getattr(item_type, "value", item_type))
+        total_qty, total_value = merged.get(key, (0, 0.0))
+        merged[key] = (total_qty + qty, total_value + qty * unit_price)
+    return merged
+
+
+async def add_items(receipts: StockReceipts) -> None:
+    """
+    Add delivered quantities and their value to the running totals with one
+    bulk write of upserts, creating the total for items seen for the first time.
+    """
+    if not receipts:
+        return
+    await InventoryItemTotal.get_motor_collection().bulk_write([
+        UpdateOne(
+            {"item_name": name, "item_type": item_type},
+            _receive_stock(qty, value),
+            upsert=True
+        )
+        for (name, item_type), (qty, value) in receipts.items()
+    ], ordered=False)
+    await bump_version(INVENTORY_TOTALS_VERSION)
+    await inventory_cache.refresh(receipts.keys())
+
+
+async def release_items(lines: StockLines) -> None:
+    """
+    Add quantities back to the running totals in a single bulk write.
+    """
+    if not lines:
+        return
+    await InventoryItemTotal.get_motor_collection().bulk_write([
+        UpdateOne({"item_name": name, "item_type": item_type}, _adjust_stock(qty))
+        for (name, item_type), qty in lines.items()
+    ], ordered=False)
+    await bump_version(INVENTORY_TOTALS_VERSION)
+    await inventory_cache.refresh(lines.keys())
+
+
+async def reserve_items(lines: StockLines) -> List[dict]:
+    """
+    Decrement the running totals for every line, or for none of them.
+
+    Each decrement is a conditional `find_one_and_update` that only matches while
+    `total_quantity >= qty`, so concurrent approvals can never drive a total below
+    zero. The same update keeps the stock value and low-stock flag current. If
+    any line cannot be satisfied, the lines already applied are put back before
+    the error is raised. Returns the updated total documents.
+    """
+    collection = InventoryItemTotal.get_motor_collection()
+    applied: StockLines = {}
+    updated = []
+    try:
+        for (name, item_type), qty in lines.items():
+            if await inventory_cache.get(name, item_type) is None:
+                raise InventoryNotFoundError(name)
+            doc = await collection.find_one_and_update(
+                {"item_name": name, "item_type": item_type, "total_quantity": {"$gte": qty}},
+                _adjust_stock(-qty),
+                return_document=ReturnDocument.AFTER
+            )
+            if doc is None:
+                raise InsufficientStockError(name)
+            inventory_cache.put(doc)
+            applied[(name, item_type)] = qty
+            updated.append(doc)
+    except Exception:
+        try:
+            await release_items(applied)
+        except Exception as e:
+            logger.error(f"Failed to restore stock after a partial reservation {applied}: {e}")
+        raise
+    if updated:
+        await bump_version(INVENTORY_TOTALS_VERSION)
+    return updated
+
+
+async def set_reorder_level(item_name: str, item_type: str, reorder_level: Optional[int]) -> Optional[dict]:
+    """
+    Set (or clear, with None) an item's reorder level and recompute its
+    low-stock flag. Returns the updated total, or None if the item is unknown.
+    """
+    doc = await InventoryItemTotal.get_motor_collection().find_one_and_update(
+        {"item_name": item_name, "item_type": getattr(item_type, "value", item_type)},
+        [{"$set": {"reorder_level": reorder_level}}, VALUATION_STAGE],
+        return_document=ReturnDocument.AFTER
+    )
+    if doc is not None:
+        inventory_cache.put(doc)
+        await bump_version(INVENTORY_TOTALS_VERSION)
+    return doc
@@ -0,0 +1,30 @@
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from typing import Any
+import os
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+# Compiled once at import; rendering only evaluates the cached template code
+env = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=select_autoescape(["html"]),
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False
+)
+
+request_created_template = env.get_template("email/request_created.html")
+request_approved_template = env.get_template("email/request_approved.html")
+request_rejected_template = env.get_template("email/request_rejected.html")
+
+
+def render_request_created(request: Any, items: Any) -> str:
+    return request_created_template.render(request=request, items=items)
+
+
+def render_request_approved(request: Any, issued: Any) -> str:
+    return request_approved_template.render(request=request, issued=issued)
+
+
+def render_request_rejected(request: Any, reason: str) -> str:
+    return request_rejected_template.render(request=request, reason=reason)
@@ -0,0 +1,165 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, time, timedelta
+from bson import DBRef, ObjectId
+from pymongo import ReturnDocument
+from models.enums import StatusEnum
+from models.inventory import Request, ReqIssue, RequestSelection, TransitionResult
+from utils.http_cache import requests_changed, with_revision
+from utils.queries import EMBEDDED_STORAGE
+
+# Each step only applies to requests still in the status it expects, so a
+# request can never be moved twice or skip a step, even under concurrent calls
+SEMI_APPROVE_FROM = {"status": StatusEnum.Pending.value}
+MEDIATOR_APPROVE_FROM = {"status": StatusEnum.SemiApproved.value, "semi_approved": True}
+# Final approval: whichever writer sets the status first owns the request's stock
+FINAL_APPROVE_FROM = {
+    "semi_approved": True, "mediator_approved": True, "status": {"$ne": StatusEnum.Approved.value}
+}
+# Approved requests hold stock and issue rows, so they cannot be rejected
+REJECT_FROM = {"status": {"$ne": StatusEnum.Approved.value}}
+
+
+class InvalidSelectionError(ValueError):
+    pass
+
+
+def _semi_approve_update() -> Dict[str, Any]:
+    return {"$set": {"semi_approved": True, "status": StatusEnum.SemiApproved.value}}
+
+
+def _mediator_approve_update(employee_id: str) -> Dict[str, Any]:
+    return {"$set": {
+        "mediator_approved": True,
+        "employee_id": employee_id,
+        "status": StatusEnum.MediatorApproved.value,
+    }}
+
+
+def selection_match(selection: RequestSelection) -> Dict[str, Any]:
+    """
+    Mongo filter for the requests a selection names.
+    """
+    match: Dict[str, Any] = {}
+    if selection.request_ids:
+        invalid = [i for i in selection.request_ids if not ObjectId.is_valid(i)]
+        if invalid:
+            raise InvalidSelectionError(f"Invalid request ID: {invalid[0]}")
+        match["_id"] = {"$in": [ObjectId(i) for i in set(selection.request_ids)]}
+    if selection.campus_name:
+        match["campus_name"] = selection.campus_name
+    if selection.start_date or selection.end_date:
+        # Beanie stores `date` fields as midnight datetimes
+        dates: Dict[str, datetime] = {}
+        if selection.start_date:
+            dates["$gte"] = datetime.combine(selection.start_date, time())
+        if selection.end_date:
+            dates["$lt"] = datetime.combine(selection.end_date + timedelta(days=1), time())
+        match["date_of_request"] = dates
+    return match
+
+
+async def _transition_many(match: Dict[str, Any], expected: Dict[str, Any], update: Dict[str, Any]) -> TransitionResult:
+    collection = Request.get_motor_collection()
+    selected = await collection.count_documents(match)
+    result = await collection.update_many({**match, **expected}, with_revision(update))
+    if result.modified_count:
+        await requests_changed()
+    return TransitionResult(
+        selected=selected,
+        transitioned=result.modified_count,
+        skipped=max(selected - result.modified_count, 0)
+    )
+
+
+async def _transition_one(request_id: ObjectId, expected: Dict[str, Any], update: Dict[str, Any]) -> Optional[dict]:
+    doc = await Request.get_motor_collection().find_one_and_update(
+        {"_id": request_id, **expected},
+        with_revision(update),
+        projection={"status": 1, "employee_id": 1, "revision": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if doc is not None:
+        await requests_changed()
+    return doc
+
+
+async def current_status(request_id: ObjectId) -> Optional[str]:
+    """
+    Status of a request a transition did not apply to, or None if it does not exist.
+    """
+    doc = await Request.get_motor_collection().find_one({"_id": request_id}, {"status": 1})
+    return doc["status"] if doc else None
+
+
+async def semi_approve(request_id: ObjectId) -> Optional[dict]:
+    return await _transition_one(request_id, SEMI_APPROVE_FROM, _semi_approve_update())
+
+
+async def mediator_approve(request_id: ObjectId, employee_id: str) -> Optional[dict]:
+    return await _transition_one(request_id, MEDIATOR_APPROVE_FROM, _mediator_approve_update(employee_id))
+
+
+async def semi_approve_many(selection: RequestSelection) -> TransitionResult:
+    return await _transition_many(selection_match(selection), SEMI_APPROVE_FROM, _semi_approve_update())
+
+
+async def mediator_approve_many(selection: RequestSelection, employee_id: str) -> TransitionResult:
+    return await _transition_many(
+        selection_match(selection), MEDIATOR_APPROVE_FROM, _mediator_approve_update(employee_id)
+    )
+
+
+async def reject(request_id: ObjectId, reason: str) -> Optional[dict]:
+    return await _transition_one(
+        request_id, REJECT_FROM, {"$set": {"status": StatusEnum.Rejected.value, "reason": reason}}
+    )
+
+
+async def claim_final_approval(request_id: ObjectId) -> Optional[dict]:
+    """
+    Mark a request approved before its stock is taken, so of two concurrent
+    final approvals only one gets to reserve. None if it is not eligible
+    (or another call claimed it first).
+    """
+    return await _transition_one(
+        request_id, FINAL_APPROVE_FROM, {"$set": {"status": StatusEnum.Approved.value}}
+    )
+
+
+async def release_final_approval(request_id: ObjectId, previous_status: str) -> None:
+    """
+    Undo `claim_final_approval` when the approval could not be completed.
+    """
+    await Request.get_motor_collection().update_one(
+        {"_id": request_id, "status": StatusEnum.Approved.value},
+        with_revision({"$set": {"status": previous_status}})
+    )
+    await requests_changed()
+
+
+def issued_fields(rows: List[Dict[str, Any]], issue_ids: List[ObjectId]) -> Dict[str, Any]:
+    """
+    `$set` fields recording a request's issued rows in the configured storage mode.
+    """
+    if EMBEDDED_STORAGE:
+        return {"embedded_issued": rows}
+    # Linked writes clear any inline copy, so reads see the new links
+    issue_collection = ReqIssue.get_motor_collection().name
+    return {"issued": [DBRef(issue_collection, issue_id) for issue_id in issue_ids], "embedded_issued": None}
+
+
+async def complete_final_approval(
+    request_id: ObjectId,
+    rows: List[Dict[str, Any]],
+    issue_ids: List[ObjectId],
+    approved_on: datetime,
+) -> bool:
+    """
+    Record the issued rows of a request claimed by `claim_final_approval`,
+    touching only those fields. False if it is no longer Approved.
+    """
+    result = await Request.get_motor_collection().update_one(
+        {"_id": request_id, "status": StatusEnum.Approved.value},
+        with_revision({"$set": {"date_of_approval": approved_on, **issued_fields(rows, issue_ids)}})
+    )
+    return result.matched_count == 1